@@ -0,0 +1,1028 @@
+/*
+ * Java sandbox worker for EVALUX code practice
+ * Long-lived JVM started by sandbox.SandboxPool, run with the source-file
+ * launcher so no build step is needed. Like sandbox_worker.py it reads one
+ * request per line and answers with one JSON line, but requests come in the
+ * token format of sandbox.encode_tokens (see Tokens), so the worker carries
+ * no JSON parser. Submissions are compiled in memory with javax.tools and
+ * the class bytes are cached by source hash, so running the same code again
+ * skips javac. Each request loads the classes in a fresh class loader (static
+ * state never leaks between runs), checks that they only reference an
+ * allowed part of the JDK, then calls the solution method for every test
+ * case under a per-request time budget. The heap is capped by the pool with
+ * -Xmx. A run that blows its budget cannot be stopped safely, so the reply
+ * asks the pool to replace this worker.
+ *
+ * Usage: java SandboxWorker.java <cpu_seconds> <class_cache_size>
+ */
+import java.io.BufferedReader;
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.DataInputStream;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.reflect.Constructor;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.lang.reflect.Modifier;
+import java.lang.reflect.ParameterizedType;
+import java.lang.reflect.Type;
+import java.math.BigDecimal;
+import java.math.BigInteger;
+import java.net.URI;
+import java.nio.charset.StandardCharsets;
+import java.security.MessageDigest;
+import java.security.NoSuchAlgorithmException;
+import java.util.ArrayList;
+import java.util.Base64;
+import java.util.Collection;
+import java.util.HashSet;
+import java.util.LinkedHashMap;
+import java.util.LinkedHashSet;
+import java.util.List;
+import java.util.Locale;
+import java.util.Map;
+import java.util.Set;
+import java.util.regex.Matcher;
+import java.util.regex.Pattern;
+import javax.tools.Diagnostic;
+import javax.tools.DiagnosticCollector;
+import javax.tools.FileObject;
+import javax.tools.ForwardingJavaFileManager;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileManager;
+import javax.tools.JavaFileObject;
+import javax.tools.SimpleJavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.ToolProvider;
+
+@SuppressWarnings("unchecked")
+public final class SandboxWorker {
+    static final int MAX_OUTPUT_CHARS = 10000;
+    static final Pattern PUBLIC_CLASS = Pattern.compile("public\\s+(?:(?:final|abstract)\\s+)*class\\s+([A-Za-z_$][\\w$]*)");
+    static final Pattern ANY_CLASS = Pattern.compile("\\bclass\\s+([A-Za-z_$][\\w$]*)");
+    // Plain ASCII decimals only: Double.parseDouble also takes "1d", "0x1p4", "NaN"
+    static final Pattern NUMBER = Pattern.compile("[+-]?(\\d+\\.?\\d*|\\.\\d+)([eE][+-]?\\d+)?");
+    // ASCII whitespace only: String.trim() also strips every other control character
+    static final Pattern EDGE_WHITESPACE = Pattern.compile("^[ \\t\\n\\r\\f\\u000B]+|[ \\t\\n\\r\\f\\u000B]+$");
+
+    static PrintStream replies;
+    static double cpuSeconds;
+    static JavaCompiler javac;
+    static StandardJavaFileManager platformFiles;
+    static Map<String, Compiled> compiled;
+
+    public static void main(String[] args) throws Exception {
+        cpuSeconds = args.length > 0 ? Double.parseDouble(args[0]) : 5;
+        final int cacheSize = args.length > 1 ? Integer.parseInt(args[1]) : 256;
+
+        // Compiled submissions, least recently used evicted first
+        compiled = new LinkedHashMap<String, Compiled>(16, 0.75f, true) {
+            @Override
+            protected boolean removeEldestEntry(Map.Entry<String, Compiled> eldest) {
+                return size() > cacheSize;
+            }
+        };
+
+        // Keep a private handle for replies; submissions only ever see the
+        // per-case buffers installed as System.out / System.err
+        replies = new PrintStream(new FileOutputStream(FileDescriptor.out), true, StandardCharsets.UTF_8);
+        System.setOut(new PrintStream(OutputStream.nullOutputStream()));
+        System.setErr(new PrintStream(OutputStream.nullOutputStream()));
+
+        javac = ToolProvider.getSystemJavaCompiler();
+        if (javac == null) {
+            // A JRE without jdk.compiler; the pool reports the failed start
+            System.exit(1);
+        }
+        platformFiles = javac.getStandardFileManager(null, Locale.ROOT, StandardCharsets.UTF_8);
+
+        warmUp();
+        reply(Map.of("ready", true));
+
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        String line;
+        while ((line = in.readLine()) != null) {
+            Map<String, Object> request;
+            try {
+                request = (Map<String, Object>) Tokens.decode(line);
+            } catch (RuntimeException | StackOverflowError e) {
+                continue;
+            }
+
+            Map<String, Object> response;
+            try {
+                response = handle(request);
+            } catch (RuntimeException | StackOverflowError e) {
+                response = stage("runtime", describe(e));
+            }
+            reply(response);
+        }
+    }
+
+    static void reply(Object message) {
+        replies.println(Json.write(message));
+    }
+
+    static Map<String, Object> handle(Map<String, Object> request) throws InterruptedException {
+        String code = String.valueOf(request.get("code"));
+        Object cases = request.get("cases");
+        boolean stopOnFailure = Boolean.TRUE.equals(request.get("stop_on_failure"));
+
+        Compiled program = compile(code);
+        if (program.error != null) {
+            return stage("compile", program.error);
+        }
+
+        Runner runner = new Runner(program, cases instanceof List ? (List<Object>) cases : new ArrayList<Object>(), stopOnFailure);
+        Thread thread = new Thread(null, runner, "submission", 64L * 1024 * 1024);
+        thread.setDaemon(true);
+        thread.start();
+        thread.join(Math.max(1L, (long) (cpuSeconds * 1000)));
+
+        if (thread.isAlive()) {
+            Map<String, Object> timeout = stage("timeout", "Time limit exceeded");
+            timeout.put("restart", true);
+            return timeout;
+        }
+        return runner.response;
+    }
+
+    static final class Runner implements Runnable {
+        final Compiled program;
+        final List<Object> cases;
+        final boolean stopOnFailure;
+        Map<String, Object> response;
+
+        Runner(Compiled program, List<Object> cases, boolean stopOnFailure) {
+            this.program = program;
+            this.cases = cases;
+            this.stopOnFailure = stopOnFailure;
+        }
+
+        @Override
+        public void run() {
+            try {
+                response = runCases(program, cases, stopOnFailure);
+            } catch (Throwable e) {
+                response = stage("runtime", describe(e));
+            }
+        }
+    }
+
+    static Map<String, Object> runCases(Compiled program, List<Object> cases, boolean stopOnFailure) throws Exception {
+        Class<?> mainClass;
+        try {
+            mainClass = Class.forName(program.mainClass, false, new MemoryClassLoader(program.classes));
+        } catch (ClassNotFoundException e) {
+            return stage("lookup", "Class " + program.mainClass + " not found");
+        }
+
+        int arity = cases.isEmpty() ? 0 : argsOf(cases.get(0)).size();
+        Method method = findMethod(mainClass, arity);
+        if (method == null) {
+            return stage("lookup", "No solution() method found in class " + mainClass.getSimpleName());
+        }
+        method.setAccessible(true);
+
+        Object target = null;
+        if (!Modifier.isStatic(method.getModifiers())) {
+            try {
+                Constructor<?> constructor = mainClass.getDeclaredConstructor();
+                constructor.setAccessible(true);
+                target = constructor.newInstance();
+            } catch (InvocationTargetException e) {
+                return stage("runtime", describe(e.getCause()));
+            } catch (ReflectiveOperationException e) {
+                return stage("lookup", "Make " + method.getName() + "() static or give "
+                        + mainClass.getSimpleName() + " a no-argument constructor");
+            }
+        }
+
+        List<Object> results = new ArrayList<>();
+        for (Object item : cases) {
+            List<Object> args = argsOf(item);
+            Object expectedValue = ((Map<String, Object>) item).get("expected");
+            String expected = expectedValue == null ? "" : String.valueOf(expectedValue);
+
+            ByteArrayOutputStream stdout = new ByteArrayOutputStream();
+            ByteArrayOutputStream stderr = new ByteArrayOutputStream();
+            System.setOut(new PrintStream(stdout, true, StandardCharsets.UTF_8));
+            System.setErr(new PrintStream(stderr, true, StandardCharsets.UTF_8));
+
+            String result = null;
+            String error = null;
+            long started = System.nanoTime();
+            try {
+                result = format(method.invoke(target, convertArguments(method, args)));
+            } catch (InvocationTargetException e) {
+                error = "Runtime error: " + describe(e.getCause());
+            } catch (RuntimeException e) {
+                error = "Runtime error: " + describe(e);
+            }
+            double elapsedMs = (System.nanoTime() - started) / 1e6;
+
+            String printed = truncate(stdout.toString(StandardCharsets.UTF_8)).trim();
+            String errors = truncate(stderr.toString(StandardCharsets.UTF_8)).trim();
+
+            // The answer is the RETURN VALUE; printed text only if nothing was returned
+            String actual = error == null && result != null ? truncate(result) : printed;
+            if (error == null && !errors.isEmpty()) {
+                error = errors;
+            }
+            boolean passed = error == null && compareAnswers(actual, expected);
+
+            Map<String, Object> caseResult = new LinkedHashMap<>();
+            caseResult.put("passed", passed);
+            caseResult.put("expected", expected);
+            caseResult.put("actual", actual);
+            caseResult.put("error", error);
+            caseResult.put("ms", Math.round(elapsedMs * 1000) / 1000.0);
+            results.add(caseResult);
+
+            if (stopOnFailure && !passed) {
+                break;
+            }
+        }
+
+        Map<String, Object> response = stage("done", null);
+        response.put("cases", results);
+        return response;
+    }
+
+    static List<Object> argsOf(Object testCase) {
+        Object input = testCase instanceof Map ? ((Map<String, Object>) testCase).get("input") : null;
+        if (input == null) {
+            return new ArrayList<>();
+        }
+        if (input instanceof List) {
+            return (List<Object>) input;
+        }
+        List<Object> args = new ArrayList<>();
+        args.add(input);
+        return args;
+    }
+
+    /** solution() with the right arity, else any solution(), else a public method with the right arity */
+    static Method findMethod(Class<?> type, int arity) {
+        Method best = null;
+        int bestScore = 0;
+        for (Method method : type.getDeclaredMethods()) {
+            if (method.isSynthetic() || method.getName().equals("main")) {
+                continue;
+            }
+            int score = 0;
+            if (method.getName().equals("solution")) {
+                score += 2;
+            }
+            if (method.getParameterCount() == arity) {
+                score += 1;
+            }
+            if (score == 1 && !Modifier.isPublic(method.getModifiers())) {
+                continue;
+            }
+            if (score > bestScore) {
+                best = method;
+                bestScore = score;
+            }
+        }
+        return best;
+    }
+
+    static Object[] convertArguments(Method method, List<Object> args) {
+        Type[] types = method.getGenericParameterTypes();
+        if (types.length != args.size()) {
+            throw new IllegalArgumentException(method.getName() + "() takes " + types.length
+                    + " arguments but " + args.size() + " were given");
+        }
+        Object[] values = new Object[types.length];
+        for (int i = 0; i < types.length; i++) {
+            values[i] = convert(args.get(i), types[i]);
+        }
+        return values;
+    }
+
+    /** JSON value -> the declared parameter type (int[], List<String>, long, ...) */
+    static Object convert(Object value, Type type) {
+        if (value == null) {
+            return null;
+        }
+
+        if (type instanceof ParameterizedType) {
+            ParameterizedType generic = (ParameterizedType) type;
+            Class<?> raw = (Class<?>) generic.getRawType();
+            Type[] params = generic.getActualTypeArguments();
+
+            if (Map.class.isAssignableFrom(raw) && value instanceof Map) {
+                Map<Object, Object> map = new LinkedHashMap<>();
+                for (Map.Entry<String, Object> entry : ((Map<String, Object>) value).entrySet()) {
+                    map.put(convert(entry.getKey(), params[0]), convert(entry.getValue(), params[1]));
+                }
+                return map;
+            }
+            if ((Collection.class.isAssignableFrom(raw) || raw == Iterable.class) && value instanceof List) {
+                Collection<Object> items = Set.class.isAssignableFrom(raw)
+                        ? new LinkedHashSet<Object>() : new ArrayList<Object>();
+                for (Object item : (List<Object>) value) {
+                    items.add(convert(item, params[0]));
+                }
+                return items;
+            }
+            return convert(value, raw);
+        }
+
+        if (!(type instanceof Class)) {
+            return value;
+        }
+        Class<?> target = (Class<?>) type;
+
+        if (target == String.class) {
+            return value instanceof String ? value : Json.write(value);
+        }
+        if (target == int.class || target == Integer.class) {
+            return toNumber(value).intValue();
+        }
+        if (target == long.class || target == Long.class) {
+            return toNumber(value).longValue();
+        }
+        if (target == double.class || target == Double.class) {
+            return toNumber(value).doubleValue();
+        }
+        if (target == float.class || target == Float.class) {
+            return toNumber(value).floatValue();
+        }
+        if (target == short.class || target == Short.class) {
+            return toNumber(value).shortValue();
+        }
+        if (target == byte.class || target == Byte.class) {
+            return toNumber(value).byteValue();
+        }
+        if (target == boolean.class || target == Boolean.class) {
+            return value instanceof Boolean ? value : Boolean.parseBoolean(String.valueOf(value));
+        }
+        if (target == char.class || target == Character.class) {
+            String text = String.valueOf(value);
+            return text.isEmpty() ? '\0' : text.charAt(0);
+        }
+        if (target.isArray() && value instanceof List) {
+            List<Object> items = (List<Object>) value;
+            Class<?> component = target.getComponentType();
+            Object array = java.lang.reflect.Array.newInstance(component, items.size());
+            for (int i = 0; i < items.size(); i++) {
+                java.lang.reflect.Array.set(array, i, convert(items.get(i), component));
+            }
+            return array;
+        }
+        if (value instanceof List && target.isAssignableFrom(ArrayList.class)) {
+            return new ArrayList<>((List<Object>) value);
+        }
+        return value;
+    }
+
+    static Number toNumber(Object value) {
+        if (value instanceof Number) {
+            return (Number) value;
+        }
+        return new BigDecimal(String.valueOf(value).trim());
+    }
+
+    static String format(Object value) {
+        if (value == null) {
+            return null;
+        }
+        if (value.getClass().isArray()) {
+            StringBuilder text = new StringBuilder("[");
+            int length = java.lang.reflect.Array.getLength(value);
+            for (int i = 0; i < length; i++) {
+                if (i > 0) {
+                    text.append(", ");
+                }
+                text.append(format(java.lang.reflect.Array.get(value, i)));
+            }
+            return text.append("]").toString();
+        }
+        if (value instanceof Collection) {
+            StringBuilder text = new StringBuilder("[");
+            for (Object item : (Collection<Object>) value) {
+                if (text.length() > 1) {
+                    text.append(", ");
+                }
+                text.append(format(item));
+            }
+            return text.append("]").toString();
+        }
+        return String.valueOf(value);
+    }
+
+    static String cleanAnswer(String value) {
+        return EDGE_WHITESPACE.matcher(value).replaceAll("").replace(" ", "").replace("\n", "").replace("\r", "");
+    }
+
+    // Keep in step with answers.py (compare_answers); tests/answer_vectors.json
+    // holds the cases both must agree on
+    static boolean compareAnswers(String actual, String expected) {
+        String actualClean = cleanAnswer(actual);
+        String expectedClean = cleanAnswer(expected);
+        String actualLower = actualClean.toLowerCase(Locale.ROOT);
+        String expectedLower = expectedClean.toLowerCase(Locale.ROOT);
+
+        if (actualLower.equals(expectedLower)) {
+            return true;
+        }
+
+        if (NUMBER.matcher(actualClean).matches() && NUMBER.matcher(expectedClean).matches()) {
+            double actualNumber = Double.parseDouble(actualClean);
+            double expectedNumber = Double.parseDouble(expectedClean);
+            return Math.abs(actualNumber - expectedNumber) < 0.01;
+        }
+
+        List<String> trueValues = List.of("true", "1", "yes");
+        List<String> falseValues = List.of("false", "0", "no");
+        if (trueValues.contains(actualLower) && trueValues.contains(expectedLower)) {
+            return true;
+        }
+        if (falseValues.contains(actualLower) && falseValues.contains(expectedLower)) {
+            return true;
+        }
+
+        return actualClean.contains(expectedClean);
+    }
+
+    static String describe(Throwable error) {
+        if (error == null) {
+            return "Unknown error";
+        }
+        String message = error.getMessage();
+        String name = error.getClass().getSimpleName();
+        return message == null || message.isEmpty() ? name : name + ": " + message;
+    }
+
+    static String truncate(String text) {
+        return text.length() > MAX_OUTPUT_CHARS ? text.substring(0, MAX_OUTPUT_CHARS) : text;
+    }
+
+    static Map<String, Object> stage(String name, String error) {
+        Map<String, Object> reply = new LinkedHashMap<>();
+        reply.put("stage", name);
+        if (error != null) {
+            reply.put("error", error);
+        }
+        return reply;
+    }
+
+    // ------------------------------------------------------------------
+    // In-memory compilation, cached by source hash
+    // ------------------------------------------------------------------
+
+    static final class Compiled {
+        final Map<String, byte[]> classes;
+        final String mainClass;
+        final String error;
+
+        Compiled(Map<String, byte[]> classes, String mainClass, String error) {
+            this.classes = classes;
+            this.mainClass = mainClass;
+            this.error = error;
+        }
+
+        static Compiled failed(String error) {
+            return new Compiled(null, null, error);
+        }
+    }
+
+    static Compiled compile(String code) {
+        String key = sourceHash(code);
+        Compiled program = compiled.get(key);
+        if (program == null) {
+            program = compileSource(code);
+            compiled.put(key, program);
+        }
+        return program;
+    }
+
+    static String sourceHash(String code) {
+        try {
+            byte[] digest = MessageDigest.getInstance("SHA-256").digest(code.getBytes(StandardCharsets.UTF_8));
+            return new BigInteger(1, digest).toString(16);
+        } catch (NoSuchAlgorithmException e) {
+            return code;
+        }
+    }
+
+    static String mainClassName(String code) {
+        Matcher match = PUBLIC_CLASS.matcher(code);
+        if (match.find()) {
+            return match.group(1);
+        }
+        match = ANY_CLASS.matcher(code);
+        return match.find() ? match.group(1) : null;
+    }
+
+    static Compiled compileSource(String code) {
+        String mainClass = mainClassName(code);
+        if (mainClass == null) {
+            return Compiled.failed("Define a class, e.g. public class Solution { ... }");
+        }
+
+        DiagnosticCollector<JavaFileObject> diagnostics = new DiagnosticCollector<>();
+        MemoryFileManager files = new MemoryFileManager(platformFiles);
+        // -proc:none: never run annotation processors inside the worker
+        List<String> options = List.of("-proc:none", "-nowarn", "-g:source,lines");
+        JavaCompiler.CompilationTask task = javac.getTask(
+                null, files, diagnostics, options, null, List.of(new SourceFile(mainClass, code)));
+
+        if (!task.call()) {
+            StringBuilder errors = new StringBuilder();
+            for (Diagnostic<? extends JavaFileObject> diagnostic : diagnostics.getDiagnostics()) {
+                if (diagnostic.getKind() != Diagnostic.Kind.ERROR) {
+                    continue;
+                }
+                if (errors.length() > 0) {
+                    errors.append("\n");
+                }
+                errors.append("Line ").append(diagnostic.getLineNumber()).append(": ")
+                        .append(diagnostic.getMessage(Locale.ROOT));
+            }
+            return Compiled.failed(errors.length() > 0 ? errors.toString() : "Compilation failed");
+        }
+
+        Map<String, byte[]> classes = files.classBytes();
+        String violation = ClassPolicy.check(classes);
+        if (violation != null) {
+            return Compiled.failed(violation);
+        }
+
+        String binaryName = mainClass;
+        for (String name : classes.keySet()) {
+            if (name.equals(mainClass) || name.endsWith("." + mainClass)) {
+                binaryName = name;
+                break;
+            }
+        }
+        return new Compiled(classes, binaryName, null);
+    }
+
+    static void warmUp() {
+        // Load and JIT the compiler and reflection paths before taking work
+        try {
+            Compiled program = compileSource("public class Warmup { public static int solution(int n) { return n + 1; } }");
+            if (program.error == null) {
+                Map<String, Object> testCase = new LinkedHashMap<>();
+                List<Object> input = new ArrayList<>();
+                input.add(1L);
+                testCase.put("input", input);
+                testCase.put("expected", "2");
+                List<Object> cases = new ArrayList<>();
+                cases.add(testCase);
+                runCases(program, cases, false);
+            }
+        } catch (Exception e) {
+            // the first real run just pays the warm-up instead
+        }
+    }
+
+    static final class SourceFile extends SimpleJavaFileObject {
+        final String code;
+
+        SourceFile(String className, String code) {
+            super(URI.create("string:///" + className + JavaFileObject.Kind.SOURCE.extension), JavaFileObject.Kind.SOURCE);
+            this.code = code;
+        }
+
+        @Override
+        public CharSequence getCharContent(boolean ignoreEncodingErrors) {
+            return code;
+        }
+    }
+
+    static final class ClassFile extends SimpleJavaFileObject {
+        final ByteArrayOutputStream bytes = new ByteArrayOutputStream();
+
+        ClassFile(String className) {
+            super(URI.create("bytes:///" + className.replace('.', '/') + JavaFileObject.Kind.CLASS.extension), JavaFileObject.Kind.CLASS);
+        }
+
+        @Override
+        public OutputStream openOutputStream() {
+            return bytes;
+        }
+    }
+
+    static final class MemoryFileManager extends ForwardingJavaFileManager<StandardJavaFileManager> {
+        final Map<String, ClassFile> outputs = new LinkedHashMap<>();
+
+        MemoryFileManager(StandardJavaFileManager files) {
+            super(files);
+        }
+
+        @Override
+        public JavaFileObject getJavaFileForOutput(JavaFileManager.Location location, String className,
+                                                   JavaFileObject.Kind kind, FileObject sibling) {
+            ClassFile file = new ClassFile(className);
+            outputs.put(className, file);
+            return file;
+        }
+
+        // javac 18+ asks for outputs through this method; older JDKs never call it
+        public JavaFileObject getJavaFileForOutputForOriginatingFiles(JavaFileManager.Location location, String className,
+                                                                     JavaFileObject.Kind kind, FileObject... originatingFiles) {
+            return getJavaFileForOutput(location, className, kind, null);
+        }
+
+        @Override
+        public void close() {
+            // the platform file manager is shared between compilations
+        }
+
+        Map<String, byte[]> classBytes() {
+            Map<String, byte[]> classes = new LinkedHashMap<>();
+            for (Map.Entry<String, ClassFile> entry : outputs.entrySet()) {
+                classes.put(entry.getKey(), entry.getValue().bytes.toByteArray());
+            }
+            return classes;
+        }
+    }
+
+    static final class MemoryClassLoader extends ClassLoader {
+        private final Map<String, byte[]> classes;
+
+        MemoryClassLoader(Map<String, byte[]> classes) {
+            // Only the JDK is visible to submissions, never the worker itself
+            super(ClassLoader.getPlatformClassLoader());
+            this.classes = classes;
+        }
+
+        @Override
+        protected Class<?> findClass(String name) throws ClassNotFoundException {
+            byte[] bytes = classes.get(name);
+            if (bytes == null) {
+                throw new ClassNotFoundException(name);
+            }
+            return defineClass(name, bytes, 0, bytes.length);
+        }
+    }
+
+    // ------------------------------------------------------------------
+    // Class policy: which JDK classes and members compiled code may use
+    // ------------------------------------------------------------------
+
+    static final class ClassPolicy {
+        static final String[] PACKAGES = {"java/lang/", "java/util/", "java/math/", "java/text/", "java/time/"};
+
+        static final Set<String> ALLOWED = Set.of(
+                "java/io/PrintStream", "java/io/Serializable", "java/io/IOException", "java/io/UncheckedIOException",
+                // javac emits these for lambdas and string concatenation
+                "java/lang/invoke/LambdaMetafactory", "java/lang/invoke/StringConcatFactory",
+                "java/lang/invoke/MethodHandles", "java/lang/invoke/MethodHandles$Lookup",
+                "java/util/concurrent/ConcurrentHashMap", "java/util/concurrent/ConcurrentLinkedQueue",
+                "java/util/concurrent/ConcurrentLinkedDeque", "java/util/concurrent/ConcurrentSkipListMap",
+                "java/util/concurrent/ConcurrentSkipListSet", "java/util/concurrent/CopyOnWriteArrayList",
+                "java/util/concurrent/ThreadLocalRandom");
+
+        // Allowed even though their parent package is denied below
+        static final String[] ALLOWED_SUBPACKAGES = {"java/lang/runtime/", "java/util/concurrent/atomic/"};
+
+        static final Set<String> DENIED = Set.of(
+                "java/lang/Runtime", "java/lang/Process", "java/lang/ProcessBuilder", "java/lang/ProcessHandle",
+                "java/lang/Thread", "java/lang/ThreadGroup", "java/lang/InheritableThreadLocal",
+                "java/lang/ClassLoader", "java/lang/Module", "java/lang/ModuleLayer", "java/lang/StackWalker",
+                "java/lang/SecurityManager", "java/util/ServiceLoader", "java/util/ResourceBundle",
+                "java/util/Timer", "java/util/Formatter");
+
+        static final String[] DENIED_PACKAGES = {
+                "java/util/concurrent/", "java/util/logging/", "java/util/prefs/", "java/util/jar/",
+                "java/util/zip/", "java/util/spi/"};
+
+        static final Set<String> SYSTEM_MEMBERS = Set.of(
+                "out", "err", "currentTimeMillis", "nanoTime", "arraycopy", "lineSeparator", "identityHashCode");
+
+        static final Set<String> CLASS_MEMBERS = Set.of(
+                "getName", "getSimpleName", "desiredAssertionStatus", "isInstance", "cast");
+
+        static String check(Map<String, byte[]> classes) {
+            Set<String> own = new HashSet<>();
+            for (String name : classes.keySet()) {
+                own.add(name.replace('.', '/'));
+            }
+            for (byte[] bytes : classes.values()) {
+                String violation = checkClass(bytes, own);
+                if (violation != null) {
+                    return violation;
+                }
+            }
+            return null;
+        }
+
+        /** Walk the constant pool: every class and member reference must be allowed */
+        static String checkClass(byte[] bytes, Set<String> own) {
+            try {
+                DataInputStream in = new DataInputStream(new ByteArrayInputStream(bytes));
+                in.readInt();              // magic
+                in.readUnsignedShort();    // minor
+                in.readUnsignedShort();    // major
+                int count = in.readUnsignedShort();
+
+                int[] tags = new int[count];
+                int[] first = new int[count];
+                int[] second = new int[count];
+                String[] utf8 = new String[count];
+
+                for (int i = 1; i < count; i++) {
+                    int tag = in.readUnsignedByte();
+                    tags[i] = tag;
+                    switch (tag) {
+                        case 1:
+                            utf8[i] = in.readUTF();
+                            break;
+                        case 3:
+                        case 4:
+                            in.readInt();
+                            break;
+                        case 5:
+                        case 6:
+                            in.readLong();
+                            i++;    // 8-byte constants take two slots
+                            break;
+                        case 7:
+                        case 8:
+                        case 16:
+                        case 19:
+                        case 20:
+                            first[i] = in.readUnsignedShort();
+                            break;
+                        case 9:
+                        case 10:
+                        case 11:
+                        case 12:
+                        case 17:
+                        case 18:
+                            first[i] = in.readUnsignedShort();
+                            second[i] = in.readUnsignedShort();
+                            break;
+                        case 15:
+                            in.readUnsignedByte();
+                            first[i] = in.readUnsignedShort();
+                            break;
+                        default:
+                            return "Unsupported class file";
+                    }
+                }
+
+                for (int i = 1; i < count; i++) {
+                    if (tags[i] == 7) {
+                        String type = typeName(utf8[first[i]]);
+                        if (type != null && !own.contains(type) && !allowedClass(type)) {
+                            return denied(type);
+                        }
+                    } else if (tags[i] == 9 || tags[i] == 10 || tags[i] == 11) {
+                        String owner = typeName(utf8[first[first[i]]]);
+                        String member = utf8[first[second[i]]];
+                        if (owner != null && !own.contains(owner) && !allowedMember(owner, member)) {
+                            return denied(owner + "." + member);
+                        }
+                    }
+                }
+                return null;
+            } catch (IOException | ArrayIndexOutOfBoundsException e) {
+                return "Unreadable class file";
+            }
+        }
+
+        /** Internal name of a class entry; array entries give their element class, primitives null */
+        static String typeName(String name) {
+            if (!name.startsWith("[")) {
+                return name;
+            }
+            String element = name.replaceFirst("^\\[+", "");
+            if (element.startsWith("L") && element.endsWith(";")) {
+                return element.substring(1, element.length() - 1);
+            }
+            return null;
+        }
+
+        static boolean allowedClass(String type) {
+            if (ALLOWED.contains(type)) {
+                return true;
+            }
+            int nested = type.indexOf('$');
+            String outer = nested < 0 ? type : type.substring(0, nested);
+            if (DENIED.contains(outer)) {
+                return false;
+            }
+            for (String prefix : ALLOWED_SUBPACKAGES) {
+                if (type.startsWith(prefix)) {
+                    return true;
+                }
+            }
+            for (String prefix : DENIED_PACKAGES) {
+                if (type.startsWith(prefix)) {
+                    return false;
+                }
+            }
+            if (type.startsWith("java/lang/")) {
+                // java/lang/reflect, java/lang/invoke, java/lang/foreign, ...
+                return type.indexOf('/', "java/lang/".length()) < 0;
+            }
+            for (String prefix : PACKAGES) {
+                if (type.startsWith(prefix)) {
+                    return true;
+                }
+            }
+            return false;
+        }
+
+        static boolean allowedMember(String owner, String member) {
+            switch (owner) {
+                case "java/lang/System":
+                    return SYSTEM_MEMBERS.contains(member);
+                case "java/lang/Class":
+                    return CLASS_MEMBERS.contains(member);
+                case "java/io/PrintStream":
+                    // new PrintStream("file") would write to disk
+                    return !member.equals("<init>");
+                case "java/lang/invoke/MethodHandles":
+                case "java/lang/invoke/MethodHandles$Lookup":
+                    return false;
+                default:
+                    return allowedClass(owner);
+            }
+        }
+
+        static String denied(String name) {
+            return "Use of " + name.replace('/', '.') + " is not allowed";
+        }
+    }
+
+    // ------------------------------------------------------------------
+    // Minimal JSON for the line protocol
+    // ------------------------------------------------------------------
+
+    /**
+     * Request decoder. sandbox.encode_tokens writes each request as one line
+     * of space-separated tokens in prefix order: n, t, f, i<integer>,
+     * d<double>, s<base64 UTF-8>, l<count> followed by that many values and
+     * m<count> followed by that many key/value pairs. There is no quoting or
+     * escaping to get wrong, so this is all the parsing the worker does.
+     */
+    static final class Tokens {
+        private final String[] tokens;
+        private int pos;
+
+        private Tokens(String[] tokens) {
+            this.tokens = tokens;
+        }
+
+        static Object decode(String line) {
+            Tokens reader = new Tokens(line.split(" ", -1));
+            Object value = reader.next();
+            if (reader.pos != reader.tokens.length) {
+                throw new IllegalArgumentException("Trailing tokens at " + reader.pos);
+            }
+            return value;
+        }
+
+        private Object next() {
+            if (pos >= tokens.length) {
+                throw new IllegalArgumentException("Request ends early");
+            }
+            String token = tokens[pos++];
+            if (token.isEmpty()) {
+                throw new IllegalArgumentException("Empty token at " + (pos - 1));
+            }
+            String body = token.substring(1);
+            switch (token.charAt(0)) {
+                case 'n':
+                    return null;
+                case 't':
+                    return Boolean.TRUE;
+                case 'f':
+                    return Boolean.FALSE;
+                case 'i':
+                    try {
+                        return Long.parseLong(body);
+                    } catch (NumberFormatException e) {
+                        return new BigInteger(body);
+                    }
+                case 'd':
+                    return Double.parseDouble(body);
+                case 's':
+                    return new String(Base64.getDecoder().decode(body), StandardCharsets.UTF_8);
+                case 'l': {
+                    int count = count(body, 1);
+                    List<Object> list = new ArrayList<>(count);
+                    for (int i = 0; i < count; i++) {
+                        list.add(next());
+                    }
+                    return list;
+                }
+                case 'm': {
+                    int count = count(body, 2);
+                    Map<String, Object> map = new LinkedHashMap<>();
+                    for (int i = 0; i < count; i++) {
+                        Object key = next();
+                        if (!(key instanceof String)) {
+                            throw new IllegalArgumentException("Map key is not a string at " + (pos - 1));
+                        }
+                        map.put((String) key, next());
+                    }
+                    return map;
+                }
+                default:
+                    throw new IllegalArgumentException("Unknown token at " + (pos - 1));
+            }
+        }
+
+        /** Element count of a list or map, which can't exceed the tokens left */
+        private int count(String body, int tokensPerItem) {
+            int count = Integer.parseInt(body);
+            if (count < 0 || (long) count * tokensPerItem > tokens.length - pos) {
+                throw new IllegalArgumentException("Bad count at " + (pos - 1));
+            }
+            return count;
+        }
+    }
+
+    /** Reply encoder; replies are JSON lines like the other workers' */
+    static final class Json {
+        static String write(Object value) {
+            StringBuilder out = new StringBuilder();
+            write(value, out);
+            return out.toString();
+        }
+
+        private static void write(Object value, StringBuilder out) {
+            if (value == null) {
+                out.append("null");
+            } else if (value instanceof String) {
+                quote((String) value, out);
+            } else if (value instanceof Boolean || value instanceof Integer || value instanceof Long
+                    || value instanceof Short || value instanceof Byte || value instanceof BigInteger) {
+                out.append(value);
+            } else if (value instanceof Number) {
+                double number = ((Number) value).doubleValue();
+                out.append(Double.isFinite(number) ? String.valueOf(number) : "null");
+            } else if (value instanceof Map) {
+                out.append('{');
+                boolean firstEntry = true;
+                for (Map.Entry<Object, Object> entry : ((Map<Object, Object>) value).entrySet()) {
+                    if (!firstEntry) {
+                        out.append(',');
+                    }
+                    firstEntry = false;
+                    quote(String.valueOf(entry.getKey()), out);
+                    out.append(':');
+                    write(entry.getValue(), out);
+                }
+                out.append('}');
+            } else if (value instanceof Collection) {
+                out.append('[');
+                boolean firstItem = true;
+                for (Object item : (Collection<Object>) value) {
+                    if (!firstItem) {
+                        out.append(',');
+                    }
+                    firstItem = false;
+                    write(item, out);
+                }
+                out.append(']');
+            } else {
+                quote(String.valueOf(value), out);
+            }
+        }
+
+        private static void quote(String text, StringBuilder out) {
+            out.append('"');
+            for (int i = 0; i < text.length(); i++) {
+                char c = text.charAt(i);
+                switch (c) {
+                    case '"':
+                        out.append("\\\"");
+                        break;
+                    case '\\':
+                        out.append("\\\\");
+                        break;
+                    case '\n':
+                        out.append("\\n");
+                        break;
+                    case '\r':
+                        out.append("\\r");
+                        break;
+                    case '\t':
+                        out.append("\\t");
+                        break;
+                    default:
+                        if (c < 0x20 || c == 0x2028 || c == 0x2029) {
+                            out.append(String.format("\\u%04x", (int) c));
+                        } else {
+                            out.append(c);
+                        }
+                }
+            }
+            out.append('"');
+        }
+    }
+}
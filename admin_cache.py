@@ -0,0 +1,62 @@
+"""
+Admin flag cache for EVALUX
+get_current_admin and /api/admin/check read users.is_admin (and the username)
+through a short-TTL in-process LRU keyed by user_id, so the admin dashboard's
+polling does not cost a DB round trip per request. Whatever changes the flag
+must call invalidate(); other workers pick the change up within
+ADMIN_CACHE_TTL seconds.
+"""
+import os
+import logging
+from typing import Dict, Optional
+
+import async_db
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+ADMIN_CACHE_SIZE = int(os.getenv("ADMIN_CACHE_SIZE", "4096"))
+ADMIN_CACHE_TTL = float(os.getenv("ADMIN_CACHE_TTL", "60"))
+
+_memory = LRUCache(maxsize=ADMIN_CACHE_SIZE, ttl=ADMIN_CACHE_TTL)
+
+_stats = {"invalidations": 0}
+
+
+async def lookup(user_id: int) -> Dict:
+    """
+    {"is_admin": bool, "username": str | None} for `user_id`. Unknown users
+    come back as non-admins (and are cached as such, so bad tokens stay cheap).
+    """
+    cached = _memory.get(user_id)
+    if cached is not None:
+        return cached
+
+    row = await async_db.fetch_one(
+        "SELECT is_admin, username FROM users WHERE id = %s",
+        (user_id,)
+    )
+
+    entry = {
+        "is_admin": bool(row.get("is_admin")) if row else False,
+        "username": row.get("username") if row else None,
+    }
+    _memory.set(user_id, entry)
+    return entry
+
+
+def invalidate(user_id: Optional[int] = None):
+    """Forget one user's cached flag, or everyone's when user_id is None"""
+    if user_id is None:
+        _memory.clear()
+    else:
+        _memory.pop(user_id)
+    _stats["invalidations"] += 1
+
+
+def stats() -> Dict:
+    return {
+        **_memory.stats(),
+        **_stats,
+        "ttl": ADMIN_CACHE_TTL,
+    }
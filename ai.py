@@ -5,26 +5,19 @@ Handles CV analysis and adaptive interview questions
 from dotenv import load_dotenv
 load_dotenv()
 
-import os
 import json
+import time
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-logger = logging.getLogger(__name__)
-
-# Groq Configuration
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+import llm_client
+import skill_taxonomy
+from llm_client import GROQ_AVAILABLE, GROQ_API_KEY
 
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
-    logger.warning("Groq SDK not installed")
+logger = logging.getLogger(__name__)
 
 
-def analyze_cv(cv_text: str) -> Dict:
+async def analyze_cv(cv_text: str) -> Dict:
     """
     Analyze CV text and extract skills + generate questions
     
@@ -53,8 +46,6 @@ def analyze_cv(cv_text: str) -> Dict:
     # Try AI-powered analysis
     if GROQ_AVAILABLE and GROQ_API_KEY:
         try:
-            client = Groq(api_key=GROQ_API_KEY)
-            
             prompt = f"""Analyze this CV and extract information in JSON format:
 
 CV Text:
@@ -77,14 +68,11 @@ Rules:
 - Generate 5 specific questions based on their CV content
 - Questions should be natural and conversational"""
 
-            response = client.chat.completions.create(
-                model=GROQ_MODEL,
+            result_text = (await llm_client.chat_completion(
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.5,
                 max_tokens=800
-            )
-            
-            result_text = response.choices[0].message.content.strip()
+            )).strip()
             
             # Clean markdown if present
             if "```json" in result_text:
@@ -97,7 +85,8 @@ Rules:
             logger.info(f"✅ AI Analysis: {len(result.get('skills', []))} skills, {len(result.get('interview_questions', []))} questions")
             
             return {
-                "skills": result.get("skills", [])[:8],
+                # "ReactJS" / "React.js" / "react" -> "React"
+                "skills": skill_taxonomy.canonicalize(result.get("skills", []), limit=8),
                 "interview_questions": result.get("interview_questions", [])[:5]
             }
             
@@ -107,20 +96,8 @@ Rules:
     # Keyword-based fallback
     logger.info("Using keyword extraction fallback")
     
-    lower_text = cv_text.lower()
-    skills = []
-    
-    # Common tech skills
-    skill_map = {
-        "python": "Python", "java": "Java", "javascript": "JavaScript",
-        "react": "React", "node": "Node.js", "sql": "SQL",
-        "aws": "AWS", "docker": "Docker", "git": "Git",
-        "html": "HTML", "css": "CSS"
-    }
-    
-    for keyword, skill_name in skill_map.items():
-        if keyword in lower_text:
-            skills.append(skill_name)
+    # Whole-word, single-pass match against the skill taxonomy
+    skills = skill_taxonomy.extract_skills(cv_text, limit=8)
     
     if not skills:
         skills = ["Software Development", "Problem Solving"]
@@ -142,22 +119,23 @@ Rules:
     }
 
 
-def generate_interview_question(
+# Fallback questions based on count
+FALLBACK_QUESTIONS = [
+    "Tell me more about your background.",
+    "What's your experience with the skills on your CV?",
+    "Describe a challenging project you worked on.",
+    "How do you handle difficult technical problems?",
+    "What are your career goals?",
+    "Can you elaborate on that?"
+]
+
+
+def _build_question_prompt(
     user_answer: str,
     conversation_history: List[Dict],
     cv_skills: Optional[List[str]] = None
-) -> Tuple[str, Dict]:
-    """
-    Generate next interview question based on conversation and CV
-    
-    Args:
-        user_answer: Latest answer from candidate
-        conversation_history: Previous Q&A
-        cv_skills: Skills from CV analysis
-        
-    Returns:
-        Tuple of (question_text, metadata)
-    """
+) -> Tuple[str, int]:
+    """Build the interviewer prompt; returns (prompt, questions_asked_so_far)"""
     question_count = len([m for m in conversation_history if m.get("role") == "assistant"])
     
     # Build context
@@ -180,22 +158,47 @@ def generate_interview_question(
     
     context += "\nGenerate ONE follow-up question (max 20 words). Be conversational and natural."
     
+    return context, question_count
+
+
+def _clean_question(question: str) -> str:
+    return question.strip().replace('"', '').replace("Question:", "").strip()
+
+
+def _fallback_question(question_count: int) -> str:
+    return FALLBACK_QUESTIONS[min(question_count, len(FALLBACK_QUESTIONS) - 1)]
+
+
+async def generate_interview_question(
+    user_answer: str,
+    conversation_history: List[Dict],
+    cv_skills: Optional[List[str]] = None
+) -> Tuple[str, Dict]:
+    """
+    Generate next interview question based on conversation and CV
+    
+    Args:
+        user_answer: Latest answer from candidate
+        conversation_history: Previous Q&A
+        cv_skills: Skills from CV analysis
+        
+    Returns:
+        Tuple of (question_text, metadata)
+    """
+    context, question_count = _build_question_prompt(user_answer, conversation_history, cv_skills)
+    
     # Try AI generation
     if GROQ_AVAILABLE and GROQ_API_KEY:
         try:
-            client = Groq(api_key=GROQ_API_KEY)
-            
-            response = client.chat.completions.create(
-                model=GROQ_MODEL,
+            question = await llm_client.chat_completion(
                 messages=[{"role": "user", "content": context}],
                 temperature=0.7,
-                max_tokens=60
+                max_tokens=60,
+                deadline=llm_client.LLM_INTERACTIVE_DEADLINE
             )
             
-            question = response.choices[0].message.content.strip()
-            
             # Clean up formatting
-            question = question.replace('"', '').replace("Question:", "").strip()
+            question = _clean_question(question)
             
             logger.info(f"✅ AI Question: {question[:50]}...")
             
@@ -204,22 +207,53 @@ def generate_interview_question(
         except Exception as e:
             logger.error(f"Question generation failed: {e}")
     
-    # Fallback questions based on count
-    fallback_questions = [
-        "Tell me more about your background.",
-        "What's your experience with the skills on your CV?",
-        "Describe a challenging project you worked on.",
-        "How do you handle difficult technical problems?",
-        "What are your career goals?",
-        "Can you elaborate on that?"
-    ]
-    
-    question = fallback_questions[min(question_count, len(fallback_questions) - 1)]
+    question = _fallback_question(question_count)
     
     return question, {"provider": "fallback", "question_number": question_count + 1}
 
 
-def rate_interview(conversation_history: List[Dict]) -> Dict:
+async def stream_interview_question(
+    user_answer: str,
+    conversation_history: List[Dict],
+    cv_skills: Optional[List[str]] = None
+) -> AsyncIterator[Dict]:
+    """
+    Streaming variant of generate_interview_question
+    
+    Yields {"delta": text} events as tokens arrive, then one final
+    {"done": True, "question": cleaned_text, "metadata": {...}} event.
+    """
+    context, question_count = _build_question_prompt(user_answer, conversation_history, cv_skills)
+    metadata = {"provider": "fallback", "question_number": question_count + 1}
+    parts = []
+    
+    if GROQ_AVAILABLE and GROQ_API_KEY:
+        try:
+            async for delta in llm_client.stream_chat_completion(
+                messages=[{"role": "user", "content": context}],
+                temperature=0.7,
+                max_tokens=60,
+                deadline=llm_client.LLM_INTERACTIVE_DEADLINE
+            ):
+                metadata["provider"] = "groq"
+                parts.append(delta)
+                yield {"delta": delta}
+        except Exception as e:
+            logger.error(f"Question streaming failed: {e}")
+    
+    question = _clean_question("".join(parts))
+    
+    if not question:
+        question = _fallback_question(question_count)
+        metadata["provider"] = "fallback"
+        yield {"delta": question}
+    
+    logger.info(f"✅ Streamed question ({metadata['provider']}): {question[:50]}...")
+    
+    yield {"done": True, "question": question, "metadata": metadata}
+
+
+async def rate_interview(conversation_history: List[Dict]) -> Dict:
     """
     Rate interview performance
     
@@ -242,8 +276,6 @@ def rate_interview(conversation_history: List[Dict]) -> Dict:
     # Try AI rating
     if GROQ_AVAILABLE and GROQ_API_KEY:
         try:
-            client = Groq(api_key=GROQ_API_KEY)
-            
             # Build transcript
             transcript = "\n".join([
                 f"{m['role'].upper()}: {m.get('content', '')}"
@@ -262,14 +294,11 @@ def rate_interview(conversation_history: List[Dict]) -> Dict:
 TRANSCRIPT:
 {transcript[:2000]}"""
 
-            response = client.chat.completions.create(
-                model=GROQ_MODEL,
+            rating_text = (await llm_client.chat_completion(
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
                 max_tokens=400
-            )
-            
-            rating_text = response.choices[0].message.content.strip()
+            )).strip()
             
             # Clean markdown
             if "```json" in rating_text:
@@ -294,4 +323,103 @@ TRANSCRIPT:
         "strengths": ["Engaged with questions"],
         "improvements": ["Provide more specific examples"],
         "incomplete": False
-    }
\ No newline at end of file
+    }
+
+
+async def generate_coding_problems(
+    difficulty: str,
+    problem_type: str,
+    count: int = 1,
+    deadline: Optional[float] = None
+) -> List[Dict]:
+    """
+    Generate `count` distinct NO-INPUT coding problems in one completion
+    
+    Args:
+        difficulty: Difficulty description for the prompt
+        problem_type: Problem category for the prompt
+        count: Problems to generate
+        deadline: Seconds to wait for the LLM (default LLM_DEADLINE)
+        
+    Returns:
+        List of raw problem dicts (not yet validated), each with a
+        `reference_solution_python` to verify expected_answer against
+    
+    Raises:
+        llm_client.LLMUnavailable, ValueError on an unusable answer
+    """
+    prompt = f"""Generate {count} UNIQUE {difficulty} coding problems about {problem_type}.
+
+TIMESTAMP: {int(time.time())} (use this to ensure variety)
+
+CRITICAL RULES:
+- NO parameters in the function - function takes NO INPUT
+- Data must be HARDCODED in the problem description
+- Make it DIFFERENT from simple counting problems
+- Include some logic or calculation
+- NOT just "count letters" or basic math
+- Every problem in the list must be different from the others
+
+PROBLEM VARIETY IDEAS:
+✅ "Find the sum of all prime numbers between 1 and 20"
+✅ "Reverse the string 'hello world' and return it"
+✅ "Find the second largest number in [15, 8, 23, 42, 4, 16]"
+✅ "Count how many palindromes are in ['racecar', 'hello', 'level', 'world']"
+✅ "Calculate the factorial of 5"
+✅ "Find the missing number in the sequence [1, 2, 4, 5, 6]"
+✅ "Check if 'A man a plan a canal Panama' is a palindrome (ignore spaces/caps)"
+✅ "Find the Fibonacci number at position 8"
+✅ "Count vowels and consonants in 'programming' - return difference"
+✅ "Sort the list [5, 2, 8, 1, 9] in descending order, return the middle element"
+
+AVOID:
+❌ Simple counting like "count letters in hello"
+❌ Basic addition like "5 + 3"
+❌ Overly simple problems
+
+Return ONLY a valid JSON array of {count} objects like this:
+[
+  {{
+    "title": "Descriptive Title (5-8 words)",
+    "description": "Clear problem statement with specific data. Be precise about what to return.",
+    "expected_answer": "the correct answer as string",
+    "hint": "Helpful hint about the approach (optional)",
+    "difficulty": "{difficulty}",
+    "starter_code_python": "def solution():\\n    # Write your code here\\n    pass",
+    "starter_code_javascript": "function solution() {{\\n    // Write your code here\\n}}",
+    "starter_code_java": "public class Solution {{\\n    public static String solution() {{\\n        // Write your code here\\n        return \\"\\";\\n    }}\\n}}",
+    "reference_solution_python": "def solution():\\n    # complete, working solution that RETURNS the answer\\n    ..."
+  }}
+]
+
+The reference solution is executed to check expected_answer: it must define
+solution() with no parameters, use only Python builtins (no imports) and
+return the answer.
+
+Make them interesting and educational!"""
+
+    result_text = (await llm_client.chat_completion(
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.9,  # Higher temperature for more variety
+        max_tokens=min(900 * count, 6000),
+        deadline=deadline
+    )).strip()
+    
+    # Clean markdown if present
+    if "```json" in result_text:
+        result_text = result_text.split("```json")[1].split("```")[0]
+    elif "```" in result_text:
+        result_text = result_text.split("```")[1].split("```")[0]
+    
+    result = json.loads(result_text.strip())
+    if isinstance(result, dict):
+        result = result.get("problems", [result])
+    if not isinstance(result, list):
+        raise ValueError("LLM did not return a list of problems")
+    
+    problems = [p for p in result if isinstance(p, dict)][:count]
+    for problem in problems:
+        problem["ai_generated"] = True
+    
+    logger.info(f"✅ AI-generated {len(problems)} problems ({difficulty}, {problem_type})")
+    return problems
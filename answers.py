@@ -0,0 +1,69 @@
+"""
+Answer comparison for EVALUX code practice
+Shared by the API process and the sandbox workers, which import it to check
+each test case as soon as it has run. sandbox_worker.js and SandboxWorker.java
+carry their own copies; tests/answer_vectors.json holds the cases all three
+must agree on.
+"""
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only plain ASCII decimals count as numbers, the same grammar the JavaScript
+# and Java workers accept (float() alone would also take "1_000", "inf" or
+# non-ASCII digits)
+NUMBER = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\Z", re.ASCII)
+# ASCII whitespace only, so every worker strips the same characters
+STRIP_CHARS = " \t\n\r\f\v"
+
+
+def compare_answers(actual: str, expected: str) -> bool:
+    """
+    Smart answer comparison that handles different formats
+    """
+    try:
+        # Strip ALL whitespace and convert to strings
+        actual_clean = str(actual).strip(STRIP_CHARS).replace(" ", "").replace("\n", "").replace("\r", "")
+        expected_clean = str(expected).strip(STRIP_CHARS).replace(" ", "").replace("\n", "").replace("\r", "")
+        
+        # Log for debugging
+        logger.info(f"Comparing: actual='{actual_clean}' vs expected='{expected_clean}'")
+        
+        # Exact match (case-insensitive)
+        if actual_clean.lower() == expected_clean.lower():
+            logger.info("✅ Exact match!")
+            return True
+        
+        # Try numeric comparison with tolerance
+        if NUMBER.match(actual_clean) and NUMBER.match(expected_clean):
+            actual_num = float(actual_clean)
+            expected_num = float(expected_clean)
+            # Allow 0.01 difference for floating point
+            is_close = abs(actual_num - expected_num) < 0.01
+            if is_close:
+                logger.info(f"✅ Numeric match! {actual_num} ≈ {expected_num}")
+            return is_close
+        
+        # Try boolean comparison
+        true_vals = ['true', '1', 'yes']
+        false_vals = ['false', '0', 'no']
+        
+        if actual_clean.lower() in true_vals and expected_clean.lower() in true_vals:
+            logger.info("✅ Boolean True match!")
+            return True
+        if actual_clean.lower() in false_vals and expected_clean.lower() in false_vals:
+            logger.info("✅ Boolean False match!")
+            return True
+        
+        # Check if actual contains expected (for cases like "The answer is 12")
+        if expected_clean in actual_clean:
+            logger.info("✅ Contains match!")
+            return True
+        
+        logger.warning(f"❌ No match: '{actual_clean}' != '{expected_clean}'")
+        return False
+        
+    except Exception as e:
+        logger.error(f"Comparison error: {e}")
+        return False
@@ -0,0 +1,79 @@
+"""
+Async data access for EVALUX
+Runs blocking mysql.connector work on a bounded thread pool so async
+handlers never stall the event loop while waiting on the database.
+"""
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from database import get_db_connection, DB_POOL_SIZE, DB_POOL_MAX_OVERFLOW
+
+logger = logging.getLogger(__name__)
+
+# One DB thread per pooled connection: more threads would only queue on the pool
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW))
+
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="evalux-db")
+
+
+async def run_sync(fn: Callable, *args, **kwargs) -> Any:
+    """Run any blocking callable on the DB executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
+
+
+def _run_transaction(fn: Callable, dictionary: bool) -> Any:
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=dictionary)
+
+    try:
+        result = fn(cursor)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+async def run_in_transaction(fn: Callable, dictionary: bool = True) -> Any:
+    """
+    Run `fn(cursor)` on a pooled connection in a worker thread.
+    Commits when fn returns, rolls back if it raises.
+    """
+    return await run_sync(_run_transaction, fn, dictionary)
+
+
+async def fetch_one(query: str, params: Sequence = ()) -> Optional[Dict]:
+    def _fetch(cursor):
+        cursor.execute(query, params)
+        return cursor.fetchone()
+
+    return await run_in_transaction(_fetch)
+
+
+async def fetch_all(query: str, params: Sequence = ()) -> List[Dict]:
+    def _fetch(cursor):
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    return await run_in_transaction(_fetch)
+
+
+async def execute(query: str, params: Sequence = ()) -> int:
+    """Run a write statement and return the last inserted id"""
+    def _execute(cursor):
+        cursor.execute(query, params)
+        return cursor.lastrowid
+
+    return await run_in_transaction(_execute, dictionary=False)
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -5,21 +5,26 @@ from dotenv import load_dotenv
 load_dotenv()  # <<< ensure .env is loaded immediately
 
 import os
+import time
+import hashlib
 import logging
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 
 from passlib.context import CryptContext
-from passlib.hash import pbkdf2_sha256
 from jose import JWTError, jwt
 
+import revocations
+from cache import LRUCache
+
 logger = logging.getLogger(__name__)
 
 # password hashing
-# Prefer bcrypt_sha256 for new hashes, but allow pbkdf2_sha256 as a reliable fallback
-# and keep bcrypt in the list so existing legacy hashes still verify.
+# New hashes use pbkdf2_sha256 (no bcrypt backend quirks); legacy bcrypt_sha256
+# hashes still verify, and they (or pbkdf2 hashes with fewer rounds than the
+# current default) report needs_update() so logins can upgrade them.
 pwd_context = CryptContext(
-    schemes=["bcrypt_sha256", "pbkdf2_sha256"],
+    schemes=["pbkdf2_sha256", "bcrypt_sha256"],
     deprecated="auto",
 )
 
@@ -31,6 +36,15 @@ try:
 except ValueError:
     ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# Verified-token cache: token digest -> claims, so the HMAC check runs once
+# per token per worker process. Revocations are shared (see revocations.py).
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+_verified_tokens = LRUCache(maxsize=TOKEN_CACHE_SIZE)
+_token_stats = {"rejected_revoked": 0, "rejected_expired": 0}
+
+# Revocation horizon for a token without `exp` (create_access_token always sets one)
+_NO_EXP_REVOCATION_SECONDS = 10 * 365 * 24 * 3600
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
         return pwd_context.verify(plain_password, hashed_password)
@@ -40,7 +54,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 def get_password_hash(password: str) -> str:
-    return pbkdf2_sha256.hash(password)
+    return pwd_context.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -62,6 +76,61 @@ def decode_access_token(token: str) -> dict:
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     return payload
 
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def _remaining_lifetime(payload: dict) -> Optional[float]:
+    exp = payload.get("exp")
+    return None if exp is None else float(exp) - time.time()
+
+def verify_token(token: str) -> dict:
+    """
+    decode_access_token() with a cache of already verified tokens. Cached
+    claims are only served until their `exp`; revoked tokens are refused.
+    Raises jose.JWTError like decode_access_token().
+    """
+    digest = token_digest(token)
+
+    if revocations.is_revoked(digest):
+        _token_stats["rejected_revoked"] += 1
+        raise JWTError("Token has been revoked")
+
+    payload = _verified_tokens.get(digest)
+    if payload is not None:
+        remaining = _remaining_lifetime(payload)
+        if remaining is not None and remaining <= 0:
+            _verified_tokens.pop(digest)
+            _token_stats["rejected_expired"] += 1
+            raise JWTError("Signature has expired.")
+        return payload
+
+    payload = decode_access_token(token)
+    # Entries drop out of the LRU once the token itself expires
+    _verified_tokens.set(digest, payload, ttl=_remaining_lifetime(payload))
+    return payload
+
+async def revoke_token(token: str):
+    """Refuse `token` from now on, in every worker, and drop it from the cache"""
+    digest = token_digest(token)
+    _verified_tokens.pop(digest)
+
+    try:
+        remaining = _remaining_lifetime(decode_access_token(token))
+    except JWTError:
+        return  # already invalid or expired; nothing to deny
+
+    if remaining is None:
+        remaining = _NO_EXP_REVOCATION_SECONDS
+    if remaining > 0:
+        await revocations.revoke(digest, time.time() + remaining)
+
+def token_cache_stats() -> Dict:
+    return {
+        **_verified_tokens.stats(),
+        **_token_stats,
+        **revocations.stats(),
+    }
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -71,7 +140,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     token = credentials.credentials
     
     try:
-        payload = decode_access_token(token)
+        payload = verify_token(token)
         user_id = payload.get("user_id")
         email = payload.get("sub")
         
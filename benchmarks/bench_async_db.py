@@ -0,0 +1,90 @@
+"""
+Benchmark: concurrent request throughput with blocking vs offloaded DB calls
+
+Uses a local SQLite file as a stand-in for MySQL and adds a fixed per-query
+latency (DB_LATENCY_MS) to mimic the network round trip to the managed DB.
+
+    python benchmarks/bench_async_db.py [requests] [concurrency]
+"""
+import os
+import sys
+import time
+import asyncio
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import async_db
+
+DB_LATENCY_MS = float(os.getenv("DB_LATENCY_MS", "5"))
+
+
+def setup_db(path: str):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT, email TEXT)")
+    conn.executemany(
+        "INSERT INTO users (username, email) VALUES (?, ?)",
+        [(f"user{i}", f"user{i}@example.com") for i in range(10000)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def blocking_get_me(path: str, user_id: int):
+    """Equivalent of the /me query against the stand-in DB"""
+    conn = sqlite3.connect(path)
+    try:
+        time.sleep(DB_LATENCY_MS / 1000)
+        return conn.execute(
+            "SELECT id, username, email FROM users WHERE id = ?", (user_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+async def handler_blocking(path: str, user_id: int):
+    # Old pattern: blocking call inside an async handler
+    return blocking_get_me(path, user_id)
+
+
+async def handler_offloaded(path: str, user_id: int):
+    # New pattern: same call through the async data-access layer
+    return await async_db.run_sync(blocking_get_me, path, user_id)
+
+
+async def run(handler, path: str, total: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with sem:
+            await handler(path, i % 10000 + 1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        setup_db(path)
+
+        print(f"{total} requests, concurrency {concurrency}, "
+              f"{DB_LATENCY_MS}ms simulated DB latency, "
+              f"{async_db.DB_EXECUTOR_WORKERS} DB threads")
+
+        before = asyncio.run(run(handler_blocking, path, total, concurrency))
+        print(f"blocking in handler : {before:8.1f} req/s")
+
+        after = asyncio.run(run(handler_offloaded, path, total, concurrency))
+        print(f"async_db offload    : {after:8.1f} req/s  ({after / before:.1f}x)")
+
+    async_db.shutdown()
+
+
+if __name__ == "__main__":
+    main()
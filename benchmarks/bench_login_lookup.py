@@ -0,0 +1,97 @@
+"""
+Benchmark: /token user lookup, OR query vs indexed point lookup
+
+Uses a local SQLite file as a stand-in for MySQL with the users table at
+1M rows. "before" is the old schema (only email indexed) and the old
+`email = ? OR username = ?` query; "after" adds the LOWER(username) unique
+index from migrations/002 and looks up by email or by username only.
+
+    python benchmarks/bench_login_lookup.py [users] [lookups]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+
+OLD_QUERY = "SELECT * FROM users WHERE email = ? OR username = ?"
+EMAIL_QUERY = "SELECT id, email, password_hash, verified FROM users WHERE email = ?"
+USERNAME_QUERY = "SELECT id, email, password_hash, verified FROM users WHERE lower(username) = lower(?)"
+
+
+def setup_db(path: str, users: int):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            interests TEXT,
+            verified INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, interests, verified) VALUES (?, ?, ?, ?, 1)",
+        ((f"User{i}", f"user{i}@example.com", "$pbkdf2-sha256$29000$" + "x" * 64, '["Python"]')
+         for i in range(users))
+    )
+    conn.commit()
+    conn.close()
+
+
+def plan(conn: sqlite3.Connection, query: str, params) -> str:
+    return "; ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+
+
+def measure(conn: sqlite3.Connection, lookups) -> float:
+    """Mean milliseconds per lookup; every lookup must find its user"""
+    started = time.perf_counter()
+    for query, params in lookups:
+        assert conn.execute(query, params).fetchone() is not None
+    return (time.perf_counter() - started) * 1000 / len(lookups)
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    rng = random.Random(42)
+    ids = [rng.randrange(users) for _ in range(lookups)]
+    # The old query scans the table, so it gets fewer lookups
+    old_ids = ids[:max(1, lookups // 100)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+
+        started = time.perf_counter()
+        setup_db(path, users)
+        print(f"{users} users loaded in {time.perf_counter() - started:.1f}s")
+
+        conn = sqlite3.connect(path)
+
+        print(f"before: {plan(conn, OLD_QUERY, ('a', 'b'))}")
+        old_email = measure(conn, [(OLD_QUERY, (f"user{i}@example.com", f"user{i}@example.com")) for i in old_ids])
+        old_username = measure(conn, [(OLD_QUERY, (f"User{i}", f"User{i}")) for i in old_ids])
+        print(f"  email login    : {old_email:9.3f} ms/lookup")
+        print(f"  username login : {old_username:9.3f} ms/lookup")
+
+        started = time.perf_counter()
+        conn.execute("CREATE UNIQUE INDEX ux_users_username_lower ON users (lower(username))")
+        print(f"migration 002 (index build): {time.perf_counter() - started:.1f}s")
+
+        print(f"after : {plan(conn, EMAIL_QUERY, ('a',))} | {plan(conn, USERNAME_QUERY, ('a',))}")
+        new_email = measure(conn, [(EMAIL_QUERY, (f"user{i}@example.com",)) for i in ids])
+        new_username = measure(conn, [(USERNAME_QUERY, (f"user{i}",)) for i in ids])
+        print(f"  email login    : {new_email:9.3f} ms/lookup  ({old_email / new_email:,.0f}x)")
+        print(f"  username login : {new_username:9.3f} ms/lookup  ({old_username / new_username:,.0f}x)")
+
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
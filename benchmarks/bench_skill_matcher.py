@@ -0,0 +1,109 @@
+"""
+Benchmark: skill extraction time per CV at taxonomy scale
+
+Pads the shipped taxonomy with synthetic skills up to N entries (two aliases
+each) and compares the trie-compiled single-pass matcher against a flat
+alternation regex and a per-alias loop of word-boundary regexes (the old
+fallback's approach once made correct).
+
+    python benchmarks/bench_skill_matcher.py [skills] [cvs]
+"""
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import skill_taxonomy
+from skill_taxonomy import SkillMatcher, load_taxonomy
+
+SYLLABLES = ["ka", "lo", "mi", "tra", "zen", "vex", "qui", "dor", "sa", "nix",
+             "pol", "ry", "gra", "fen", "tox", "ul", "bri", "mo", "cas", "de"]
+
+CV_SENTENCES = [
+    "Senior software engineer with eight years of experience building web platforms.",
+    "Designed REST APIs in Python and FastAPI, backed by PostgreSQL and Redis.",
+    "Migrated a monolith to microservices on Kubernetes with Helm and Terraform.",
+    "Built React and TypeScript dashboards; mentored four junior developers.",
+    "Set up CI/CD with GitHub Actions and Docker, cutting release time by 60%.",
+    "Worked on digital marketing analytics with pandas, NumPy and Tableau.",
+    "Led an agile team of six using Scrum and Jira across two time zones.",
+    "Comfortable with Linux, Bash scripting, Nginx and AWS (EC2, S3, Lambda functions).",
+]
+
+
+def synthetic_entries(count: int, rng: random.Random):
+    seen = set()
+    entries = []
+    while len(entries) < count:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if name in seen:
+            continue
+        seen.add(name)
+        entries.append((name.capitalize(), [name, name + "js", name + " framework"]))
+    return entries
+
+
+def make_cv(rng: random.Random, extra_skills):
+    lines = [rng.choice(CV_SENTENCES) for _ in range(40)]
+    for skill in rng.sample(extra_skills, 10):
+        lines.insert(rng.randrange(len(lines)), f"Also used {skill} in production.")
+    return "\n".join(lines)
+
+
+def flat_alternation(aliases):
+    ordered = sorted(aliases, key=len, reverse=True)
+    return re.compile(
+        r"(?<![\w+#])(" + "|".join(re.escape(a) for a in ordered) + r")(?![\w+#])"
+    )
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    cv_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(42)
+
+    entries = load_taxonomy(skill_taxonomy.SKILL_TAXONOMY_PATH)
+    synthetic = synthetic_entries(max(0, size - len(entries)), rng)
+    entries += synthetic
+    cvs = [make_cv(rng, [canonical for canonical, _ in synthetic] or ["Python"]) for _ in range(cv_count)]
+    aliases = {a.lower() for _, names in entries for a in names}
+
+    print(f"{len(entries)} skills, {len(aliases)} aliases, {cv_count} CVs "
+          f"(~{sum(map(len, cvs)) // cv_count} chars each)\n")
+
+    started = time.perf_counter()
+    trie = SkillMatcher(entries)
+    trie_build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    flat = flat_alternation(aliases)
+    flat_build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    per_alias = [re.compile(r"(?<![\w+#])" + re.escape(a) + r"(?![\w+#])") for a in aliases]
+    loop_build = time.perf_counter() - started
+
+    def run(label, build, fn, sample):
+        started = time.perf_counter()
+        for cv in sample:
+            fn(cv)
+        per_cv = (time.perf_counter() - started) / len(sample) * 1000
+        print(f"{label:<22} build {build * 1000:8.1f} ms   {per_cv:8.3f} ms/CV")
+        return per_cv
+
+    trie_ms = run("trie regex (shipped)", trie_build, trie.find, cvs)
+    flat_ms = run("flat alternation", flat_build,
+                  lambda cv: flat.findall(cv.lower()), cvs)
+    loop_sample = cvs[:max(1, cv_count // 20)]
+    loop_ms = run("per-alias loop", loop_build,
+                  lambda cv: [p for p in per_alias if p.search(cv.lower())], loop_sample)
+
+    print(f"\ntrie vs flat alternation: {flat_ms / trie_ms:.1f}x, "
+          f"trie vs per-alias loop: {loop_ms / trie_ms:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Code runner caches for EVALUX
+- prepared: (code hash, signature) -> detected function name + sandbox
+  payload, so repeated runs of the same source skip the signature scan.
+  Untrusted source is never compiled in the API process: the sandbox worker
+  compiles it under its CPU and memory limits and keeps the code object,
+  keyed by the same hash
+- verdicts: (language, code hash, problem_id) -> run result, so an unchanged
+  resubmission returns without executing anything
+"""
+import os
+import re
+import hashlib
+import logging
+from typing import Any, Dict
+
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CODE_CACHE_SIZE = int(os.getenv("CODE_CACHE_SIZE", "1024"))
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "4096"))
+VERDICT_CACHE_TTL = float(os.getenv("VERDICT_CACHE_TTL", str(60 * 60)))
+# Largest submission forwarded to a sandbox worker
+CODE_MAX_BYTES = int(os.getenv("CODE_MAX_BYTES", str(64 * 1024)))
+
+NO_ARG_FUNCTION = re.compile(r'def\s+(\w+)\s*\(\s*\)')
+ANY_FUNCTION = re.compile(r'def\s+(\w+)\s*\(')
+
+prepared = LRUCache(maxsize=CODE_CACHE_SIZE)
+verdicts = LRUCache(maxsize=VERDICT_CACHE_SIZE, ttl=VERDICT_CACHE_TTL)
+
+
+def code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _prepare(code: str, takes_input: bool) -> Dict[str, Any]:
+    if len(code.encode("utf-8", "surrogatepass")) > CODE_MAX_BYTES:
+        return {"stage": "compile", "error": f"Code is too long (max {CODE_MAX_BYTES // 1024} KB)"}
+
+    if takes_input:
+        func_match = ANY_FUNCTION.search(code)
+        if not func_match:
+            return {"stage": "signature", "error": "Define a function that takes the inputs: def solution(...):"}
+    else:
+        func_match = NO_ARG_FUNCTION.search(code)
+        if not func_match:
+            return {"stage": "signature", "error": "Function must have NO parameters: def solution():"}
+
+    return {
+        "func_name": func_match.group(1),
+        "payload": {
+            "code": code,
+            "code_hash": code_hash(code),
+            "func_name": func_match.group(1),
+        },
+    }
+
+
+def prepare_python(code: str, takes_input: bool = False, cache: bool = True) -> Dict[str, Any]:
+    """
+    Check a Python submission's entry point once per distinct source.
+
+    `takes_input` is set when the problem's test cases pass arguments, so
+    the entry point may have parameters. Returns {"func_name", "payload"}
+    where payload is the sandbox request, or
+    {"stage": "signature" | "compile", "error"} when it cannot be run.
+    Syntax errors are reported by the sandbox run itself. `cache=False` is
+    for one-off sources (reference solutions) that would only evict user
+    submissions from `prepared`.
+    """
+    if not cache:
+        return _prepare(code, takes_input)
+
+    key = (code_hash(code), takes_input)
+    entry = prepared.get(key)
+    if entry is None:
+        entry = _prepare(code, takes_input)
+        prepared.set(key, entry)
+    return entry
+
+
+def verdict_key(language: str, code: str, problem_id: int, mode: str = "run"):
+    return (language, code_hash(code), problem_id, mode)
+
+
+def stats() -> Dict:
+    return {
+        "prepared": prepared.stats(),
+        "verdicts": verdicts.stats(),
+    }
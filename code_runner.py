@@ -0,0 +1,183 @@
+"""
+Code execution engine for EVALUX code practice
+Runs a submission against every test case of a problem in ONE sandbox
+invocation: the code is compiled once inside the sandbox (a code-object
+cache in the Python worker, vm.Script in the Node worker for JavaScript,
+javax.tools with a class cache in the JVM worker for Java), the function is
+defined once in a warm worker and then
+called per case, so N cases cost one round trip instead of N. "run" mode
+stops at the first failing case, "submit" mode runs them all. Each case
+reports its own timing.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+import sandbox
+import code_cache
+
+logger = logging.getLogger(__name__)
+
+RUN = "run"
+SUBMIT = "submit"
+MODES = (RUN, SUBMIT)
+
+
+def normalize_test_cases(test_cases: Any) -> List[Dict[str, Any]]:
+    """
+    Stored test cases as [{"input": [args...], "expected": str}]. Older
+    problems only have {"expected"} - those run with no arguments.
+    """
+    if isinstance(test_cases, dict):
+        test_cases = [test_cases]
+
+    cases = []
+    for case in test_cases or []:
+        if not isinstance(case, dict):
+            continue
+        args = case.get("input", [])
+        if args is None:
+            args = []
+        elif not isinstance(args, list):
+            args = [args]
+        cases.append({"input": args, "expected": str(case.get("expected", ""))})
+    return cases
+
+
+def _failure(error: str, cases: List[Dict], output: str = "", transient: bool = False) -> Dict[str, Any]:
+    result = {
+        "success": False,
+        "output": output,
+        "error": error,
+        "passed": False,
+        "expected": cases[0]["expected"] if cases else "",
+        "actual": output,
+        "cases": [],
+        "passed_count": 0,
+        "total": len(cases),
+        "ms": 0.0,
+    }
+    if transient:
+        result["transient"] = True
+    return result
+
+
+def _summarize(case_results: List[Dict], cases: List[Dict]) -> Dict[str, Any]:
+    passed_count = sum(1 for case in case_results if case["passed"])
+    # The case to show: the first failure, else the last one run
+    shown = next((case for case in case_results if not case["passed"]), case_results[-1])
+    error = next((case["error"] for case in case_results if case["error"]), None)
+
+    for index, case in enumerate(case_results):
+        case["index"] = index
+
+    return {
+        "success": error is None,
+        "output": shown["actual"],
+        "error": error,
+        "passed": passed_count == len(cases),
+        "expected": shown["expected"],
+        "actual": shown["actual"],
+        "cases": case_results,
+        "passed_count": passed_count,
+        "total": len(cases),
+        "ms": round(sum(case["ms"] for case in case_results), 3),
+    }
+
+
+async def _run_python(code: str, cases: List[Dict], mode: str) -> Dict[str, Any]:
+    takes_input = any(case["input"] for case in cases)
+
+    # Entry point + sandbox payload, cached per distinct source; the worker compiles
+    prepared = code_cache.prepare_python(code, takes_input)
+
+    if prepared.get("stage") == "signature":
+        return _failure(prepared["error"], cases)
+
+    if prepared.get("stage") == "compile":
+        return _failure(f"Code compilation error: {prepared['error']}", cases)
+
+    payload = {
+        **prepared["payload"],
+        "cases": cases,
+        "stop_on_failure": mode == RUN,
+    }
+
+    return await _run_on(sandbox.pool, payload, cases)
+
+
+async def _run_source(pool: Optional[sandbox.SandboxPool], runtime: str,
+                      code: str, cases: List[Dict], mode: str) -> Dict[str, Any]:
+    """Languages whose worker compiles the source itself (JavaScript, Java)"""
+    if pool is None:
+        return _failure(f"{runtime} runtime is not installed on this server", cases)
+
+    if len(code.encode("utf-8", "surrogatepass")) > code_cache.CODE_MAX_BYTES:
+        return _failure(f"Code is too long (max {code_cache.CODE_MAX_BYTES // 1024} KB)", cases)
+
+    payload = {
+        "code": code,
+        "cases": cases,
+        "stop_on_failure": mode == RUN,
+    }
+    return await _run_on(pool, payload, cases)
+
+
+async def _run_on(pool: sandbox.SandboxPool, payload: Dict, cases: List[Dict]) -> Dict[str, Any]:
+    # One sandboxed worker call for every case, with time and memory limits
+    try:
+        reply = await pool.run(payload)
+    except (sandbox.SandboxTimeout, sandbox.SandboxCrashed) as e:
+        return _failure(str(e), cases, transient=True)
+
+    stage = reply.get("stage")
+
+    if stage == "timeout":
+        return _failure(f"Time limit exceeded ({pool.cpu_seconds:g}s)", cases, transient=True)
+
+    if stage == "compile":
+        return _failure(f"Code compilation error: {reply.get('error')}", cases)
+
+    if stage == "lookup":
+        return _failure(reply.get("error"), cases)
+
+    if stage == "runtime":
+        return _failure(f"Runtime error: {reply.get('error')}", cases)
+
+    return _summarize(reply["cases"], cases)
+
+
+async def run_tests(code: str, language: str, test_cases: List[Dict], mode: str = RUN) -> Dict[str, Any]:
+    """
+    Run `code` against `test_cases` (see normalize_test_cases) and return the
+    overall verdict, the case to show the user and per-case results.
+
+    Raises sandbox.SandboxBusy when the runner queue is full.
+    """
+    if not test_cases:
+        return _failure("This problem has no test cases", test_cases)
+
+    try:
+        if language == "python":
+            result = await _run_python(code, test_cases, mode)
+
+        elif language == "javascript":
+            result = await _run_source(sandbox.js_pool, "JavaScript", code, test_cases, mode)
+
+        elif language == "java":
+            result = await _run_source(sandbox.java_pool, "Java", code, test_cases, mode)
+
+        else:
+            result = _failure(f"Unsupported language: {language}", test_cases)
+
+    except sandbox.SandboxBusy:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Execution error: {e}")
+        return _failure(str(e), test_cases)
+
+    if result["cases"]:
+        logger.info(
+            f"🔍 {language} {mode}: {result['passed_count']}/{result['total']} cases passed "
+            f"({len(result['cases'])} run, {result['ms']:.1f} ms)"
+        )
+    return result
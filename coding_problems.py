@@ -0,0 +1,498 @@
+"""
+Coding practice problems for EVALUX
+Validation of AI-generated problems (heuristic fixes of the expected answer,
+then their reference solution is executed in the sandbox's verification
+pool and its result becomes the expected answer), storage in
+`code_problems`, and a pool of ready problems per difficulty and problem type,
+kept in that table, claimed ahead of time by each worker and topped up by a
+background task, so /api/code/generate-problem waits on neither the LLM nor
+the database.
+"""
+import os
+import re
+import json
+import random
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from mysql.connector import errors as mysql_errors
+
+import async_db
+import llm_client
+import sandbox
+import code_cache
+from ai import generate_coding_problems
+
+logger = logging.getLogger(__name__)
+
+PROBLEM_POOL_ENABLED = os.getenv("PROBLEM_POOL_ENABLED", "true").lower() == "true"
+# Per bucket, shared by all workers (3 difficulties x 6 types = 36 problems)
+PROBLEM_POOL_TARGET = int(os.getenv("PROBLEM_POOL_TARGET", "2"))
+PROBLEM_POOL_LOW_WATER = int(os.getenv("PROBLEM_POOL_LOW_WATER", "1"))
+PROBLEM_POOL_BATCH = int(os.getenv("PROBLEM_POOL_BATCH", "2"))
+# Per bucket, held by each worker so serving a problem needs no database call
+PROBLEM_POOL_CLAIM = int(os.getenv("PROBLEM_POOL_CLAIM", "1"))
+# Seconds before retrying after a failed refill (e.g. Groq unreachable)
+PROBLEM_POOL_RETRY = float(os.getenv("PROBLEM_POOL_RETRY", "30"))
+# Batches are larger than interactive completions
+PROBLEM_POOL_DEADLINE = float(os.getenv("PROBLEM_POOL_DEADLINE", "60"))
+
+# Pool key -> difficulty description used in the prompt
+DIFFICULTIES = {
+    "easy": "easy beginner level",
+    "medium": "medium difficulty requiring loops or data structures",
+    "hard": "challenging problem with algorithms",
+}
+
+PROBLEM_TYPES = [
+    "mathematical calculation",
+    "string manipulation",
+    "list/array operations",
+    "pattern recognition",
+    "sorting or searching",
+    "logical puzzle",
+]
+
+REQUIRED_FIELDS = ("title", "description")
+
+# MySQL "Unknown column": code_problems predates migrations/003
+ER_BAD_FIELD_ERROR = 1054
+
+_verify_stats = {"verified": 0, "corrected": 0, "discarded": 0}
+
+
+def validate_and_fix_problem(problem_data: Dict[str, Any]) -> Dict[str, Any]:
+    title = problem_data.get("title", "")
+    description = problem_data.get("description", "")
+    expected = problem_data.get("expected_answer", "")
+    
+    # Check for average/mean calculations
+    if "average" in description.lower() or "mean" in description.lower():
+        # Extract list of numbers
+        numbers_match = re.findall(r'\[([\d\s.,]+)\]', description)
+        if numbers_match:
+            try:
+                # Parse the numbers
+                numbers_str = numbers_match[0].replace(' ', '')
+                numbers = [float(x.strip()) for x in numbers_str.split(',')]
+                
+                # Calculate correct average
+                correct_avg = sum(numbers) / len(numbers)
+                correct_answer = f"{correct_avg:.2f}"
+                
+                logger.info(f"📊 Validated average: {correct_answer} (AI said: {expected})")
+                
+                if abs(float(correct_answer) - float(expected)) > 0.01:
+                    logger.warning(f"⚠️ Fixed incorrect expected answer: {expected} → {correct_answer}")
+                    problem_data["expected_answer"] = correct_answer
+                
+            except Exception as e:
+                logger.warning(f"Could not validate average calculation: {e}")
+    
+    # Check for sum calculations
+    elif "sum" in description.lower() and "between" in description.lower():
+        # Extract range like "1 and 20" or "1 to 20"
+        range_match = re.search(r'(?:between|from)\s+(\d+)\s+(?:and|to)\s+(\d+)', description.lower())
+        if range_match:
+            try:
+                start = int(range_match.group(1))
+                end = int(range_match.group(2))
+                
+                # Check if it mentions "even" or "odd" or "prime"
+                if "even" in description.lower():
+                    correct_sum = sum(i for i in range(start, end + 1) if i % 2 == 0)
+                elif "odd" in description.lower():
+                    correct_sum = sum(i for i in range(start, end + 1) if i % 2 == 1)
+                elif "prime" in description.lower():
+                    def is_prime(n):
+                        if n < 2: return False
+                        for i in range(2, int(n**0.5) + 1):
+                            if n % i == 0: return False
+                        return True
+                    correct_sum = sum(i for i in range(start, end + 1) if is_prime(i))
+                else:
+                    correct_sum = sum(range(start, end + 1))
+                
+                correct_answer = str(correct_sum)
+                logger.info(f"📊 Validated sum: {correct_answer} (AI said: {expected})")
+                
+                if correct_answer != expected:
+                    logger.warning(f"⚠️ Fixed incorrect expected answer: {expected} → {correct_answer}")
+                    problem_data["expected_answer"] = correct_answer
+                    
+            except Exception as e:
+                logger.warning(f"Could not validate sum calculation: {e}")
+    
+    # Check for list operations (max, min, second largest, etc.)
+    elif any(word in description.lower() for word in ["largest", "smallest", "maximum", "minimum"]):
+        numbers_match = re.findall(r'\[([\d\s.,\-]+)\]', description)
+        if numbers_match:
+            try:
+                numbers_str = numbers_match[0].replace(' ', '')
+                numbers = [int(x.strip()) for x in numbers_str.split(',')]
+                
+                if "second largest" in description.lower():
+                    sorted_nums = sorted(set(numbers), reverse=True)
+                    correct_answer = str(sorted_nums[1]) if len(sorted_nums) > 1 else str(sorted_nums[0])
+                elif "largest" in description.lower() or "maximum" in description.lower():
+                    correct_answer = str(max(numbers))
+                elif "smallest" in description.lower() or "minimum" in description.lower():
+                    correct_answer = str(min(numbers))
+                else:
+                    return problem_data
+                
+                logger.info(f"📊 Validated list operation: {correct_answer} (AI said: {expected})")
+                
+                if correct_answer != expected:
+                    logger.warning(f"⚠️ Fixed incorrect expected answer: {expected} → {correct_answer}")
+                    problem_data["expected_answer"] = correct_answer
+                    
+            except Exception as e:
+                logger.warning(f"Could not validate list operation: {e}")
+    
+    return problem_data
+
+
+async def verify_problem(problem: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Run the problem's reference solution in the sandbox and use its return
+    value as the expected answer. Returns None (discard the problem) when
+    there is no runnable reference solution or it fails or times out.
+    """
+    code = problem.pop("reference_solution_python", None) or ""
+    # Each reference solution runs once: keep it out of the submissions cache
+    prepared = code_cache.prepare_python(code, cache=False)
+    if "payload" not in prepared:
+        _verify_stats["discarded"] += 1
+        logger.warning(f"🗑️ Discarded '{problem.get('title')}': no runnable reference solution ({prepared['error']})")
+        return None
+
+    try:
+        # Own pool, so verification never queues behind user submissions
+        reply = await sandbox.verify_pool.run(prepared["payload"])
+    except (sandbox.SandboxTimeout, sandbox.SandboxCrashed, sandbox.SandboxBusy) as e:
+        reply = {"stage": "sandbox", "error": str(e)}
+
+    if reply.get("stage") != "done" or reply.get("result") is None or reply.get("stderr"):
+        _verify_stats["discarded"] += 1
+        logger.warning(
+            f"🗑️ Discarded '{problem.get('title')}': reference run failed "
+            f"({reply.get('stage')}: {reply.get('error') or reply.get('stderr') or 'no return value'})"
+        )
+        return None
+
+    actual = reply["result"]
+    claimed = str(problem.get("expected_answer", ""))
+    if actual.strip() != claimed.strip():
+        _verify_stats["corrected"] += 1
+        logger.info(f"📊 Reference solution corrected expected answer: {claimed} → {actual}")
+
+    problem["expected_answer"] = actual
+    problem["verified"] = True
+    _verify_stats["verified"] += 1
+    return problem
+
+
+async def verify_problems(problems: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Verify a batch concurrently across the verification workers (one per
+    problem of a default-sized batch, see SANDBOX_VERIFY_WORKERS); drops
+    failures
+    """
+    results = await asyncio.gather(*(verify_problem(p) for p in problems))
+    return [p for p in results if p is not None]
+
+
+async def store_problem(problem: Dict[str, Any], difficulty: str = "Easy",
+                        problem_type: Optional[str] = None) -> int:
+    """
+    Insert a problem into code_problems and return its id. With a
+    `problem_type` the row is a ready pool problem (pool_ready) until served.
+    Plain problems are still stored on a database without migrations/003.
+    """
+    values = (
+        problem["title"],
+        problem["description"],
+        difficulty,
+        json.dumps([]),  # No examples needed for no-input
+        json.dumps([{"expected": problem["expected_answer"]}]),
+        problem.get("starter_code_python", ""),
+        problem.get("starter_code_javascript", ""),
+        problem.get("starter_code_java", ""),
+    )
+    try:
+        return await async_db.execute("""
+            INSERT INTO code_problems 
+            (title, description, difficulty, examples, test_cases, 
+             starter_code_python, starter_code_javascript, starter_code_java,
+             hint, problem_type, pool_ready, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+        """, values + (problem.get("hint", ""), problem_type, problem_type is not None))
+    except mysql_errors.ProgrammingError as e:
+        if e.errno != ER_BAD_FIELD_ERROR or problem_type is not None:
+            raise
+        logger.warning("⚠️ code_problems has no hint/problem_type/pool_ready columns: apply migrations/003")
+
+    return await async_db.execute("""
+        INSERT INTO code_problems 
+        (title, description, difficulty, examples, test_cases, 
+         starter_code_python, starter_code_javascript, starter_code_java, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
+    """, values)
+
+
+_POOL_COLUMNS = """
+    id, title, description, difficulty, problem_type, test_cases, hint,
+    starter_code_python, starter_code_javascript, starter_code_java
+"""
+
+
+def _from_row(row: Dict) -> Dict[str, Any]:
+    """A stored pool row in the shape generate_coding_problems() returns"""
+    try:
+        test_cases = json.loads(row.get("test_cases") or "[]")
+    except ValueError:
+        test_cases = []
+    if isinstance(test_cases, dict):
+        test_cases = [test_cases]
+
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "description": row["description"],
+        "difficulty": str(row.get("difficulty") or "easy").lower(),
+        "expected_answer": str(test_cases[0].get("expected", "")) if test_cases else "",
+        "hint": row.get("hint") or "",
+        "starter_code_python": row.get("starter_code_python") or "",
+        "starter_code_javascript": row.get("starter_code_javascript") or "",
+        "starter_code_java": row.get("starter_code_java") or "",
+        "ai_generated": True,
+        "verified": True,
+    }
+
+
+def _bucket_key(row: Dict) -> Tuple[str, str]:
+    return str(row.get("difficulty") or "easy").lower(), row.get("problem_type")
+
+
+class ProblemPool:
+    """
+    Ready-to-serve problems bucketed by (difficulty, problem type). The pool
+    lives in `code_problems` (rows with pool_ready set), so it is shared by
+    every worker process and survives restarts.
+
+    Each worker claims up to `claim` problems per bucket ahead of time, in one
+    transaction, and take() serves from those without touching the database.
+    A background task tops the claims back up after every serve and refills
+    any bucket whose shared rows drop below the low-water mark, one LLM batch
+    at a time, re-counting the shared rows before each batch so workers don't
+    top up the same bucket twice. Claims not served by stop() go back to the
+    shared pool; a worker that crashes loses at most `claim` per bucket.
+    """
+
+    def __init__(self, target: int = 2, low_water: int = 1, batch_size: int = 2, claim: int = 1):
+        self.target = target
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self.claim = claim
+
+        self._buckets: Dict[Tuple[str, str], Deque[Dict]] = self._empty_buckets()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._generate = False
+
+        self._stats = {
+            "served": 0, "misses": 0, "claims": 0, "claimed": 0, "released": 0,
+            "generated": 0, "rejected": 0, "batches": 0, "failures": 0,
+        }
+
+    @staticmethod
+    def _empty_buckets() -> Dict[Tuple[str, str], Deque[Dict]]:
+        return {
+            (difficulty, problem_type): deque()
+            for difficulty in DIFFICULTIES
+            for problem_type in PROBLEM_TYPES
+        }
+
+    async def _claim(self) -> Dict[Tuple[str, str], int]:
+        """
+        Claim shared rows for every local bucket below `claim` in one
+        transaction; returns the ready rows left in each shared bucket.
+        """
+        wanted = {key: self.claim - len(bucket) for key, bucket in self._buckets.items()}
+
+        def _claim_rows(cursor):
+            # SKIP LOCKED: workers claiming at the same time take different rows
+            cursor.execute(f"""
+                SELECT {_POOL_COLUMNS}
+                FROM code_problems
+                WHERE pool_ready = TRUE
+                ORDER BY id
+                FOR UPDATE SKIP LOCKED
+            """)
+            claimed, left = [], {}
+            for row in cursor.fetchall():
+                key = _bucket_key(row)
+                if wanted.get(key, 0) > 0:
+                    wanted[key] -= 1
+                    claimed.append(row)
+                else:
+                    left[key] = left.get(key, 0) + 1
+
+            if claimed:
+                placeholders = ", ".join(["%s"] * len(claimed))
+                cursor.execute(
+                    f"UPDATE code_problems SET pool_ready = FALSE WHERE id IN ({placeholders})",
+                    [row["id"] for row in claimed]
+                )
+            return claimed, left
+
+        claimed, left = await async_db.run_in_transaction(_claim_rows)
+        for row in claimed:
+            self._buckets[_bucket_key(row)].append(_from_row(row))
+
+        self._stats["claims"] += 1
+        self._stats["claimed"] += len(claimed)
+        return left
+
+    async def _release(self):
+        """Hand unserved claims back to the shared pool"""
+        ids = [problem["id"] for bucket in self._buckets.values() for problem in bucket]
+        self._buckets = self._empty_buckets()
+        if not ids:
+            return
+
+        placeholders = ", ".join(["%s"] * len(ids))
+        try:
+            await async_db.execute(
+                f"UPDATE code_problems SET pool_ready = TRUE WHERE id IN ({placeholders})", ids
+            )
+            self._stats["released"] += len(ids)
+        except Exception as e:
+            logger.error(f"❌ Could not return {len(ids)} claimed problems to the pool: {e}")
+
+    async def take(self, difficulty: Optional[str] = None) -> Optional[Dict]:
+        """Serve a claimed problem (any type, optionally of one difficulty) or None"""
+        if not PROBLEM_POOL_ENABLED:
+            return None
+
+        keys = [
+            key for key, bucket in self._buckets.items()
+            if bucket and (difficulty is None or key[0] == difficulty)
+        ]
+        # Either way the background task claims or generates more
+        self._wake()
+        if not keys:
+            self._stats["misses"] += 1
+            return None
+
+        problem = self._buckets[random.choice(keys)].popleft()
+        self._stats["served"] += 1
+        return problem
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _refill(self, key: Tuple[str, str]):
+        difficulty, problem_type = key
+
+        while True:
+            # Other workers fill the same table: re-count before every batch
+            left = await self._claim()
+            missing = self.target - left.get(key, 0)
+            if missing <= 0:
+                return
+
+            self._stats["batches"] += 1
+            problems = await generate_coding_problems(
+                DIFFICULTIES[difficulty],
+                problem_type,
+                count=min(self.batch_size, missing),
+                deadline=PROBLEM_POOL_DEADLINE
+            )
+
+            complete = [p for p in problems if all(p.get(field) for field in REQUIRED_FIELDS)]
+            self._stats["rejected"] += len(problems) - len(complete)
+
+            # Cheap structural checks first, then the reference-solution run
+            verified = await verify_problems([validate_and_fix_problem(p) for p in complete])
+            self._stats["rejected"] += len(complete) - len(verified)
+
+            for problem in verified:
+                await store_problem(problem, difficulty.capitalize(), problem_type)
+
+            self._stats["generated"] += len(verified)
+            if not verified:
+                raise ValueError("batch contained no usable problems")
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            failed = False
+            try:
+                # Rows left over from earlier runs (or other workers) count
+                left = await self._claim()
+                low = [key for key in self._buckets if left.get(key, 0) < self.low_water] if self._generate else []
+            except Exception as e:
+                failed, low = True, []
+                self._stats["failures"] += 1
+                logger.error(f"❌ Problem pool claim failed: {e}")
+
+            for key in low:
+                try:
+                    await self._refill(key)
+                except Exception as e:
+                    failed = True
+                    self._stats["failures"] += 1
+                    logger.error(f"❌ Problem pool refill failed for {key}: {e}")
+
+            if failed:
+                await asyncio.sleep(PROBLEM_POOL_RETRY)
+                self._wakeup.set()
+            elif low:
+                logger.info(f"✅ Problem pool refilled: {sum(map(len, self._buckets.values()))} claimed here")
+
+    def start(self):
+        if self._task is not None or not PROBLEM_POOL_ENABLED:
+            return
+        self._generate = bool(llm_client.GROQ_AVAILABLE and llm_client.GROQ_API_KEY)
+        if not self._generate:
+            logger.info("Problem pool refill disabled: Groq is not configured (stored problems are still served)")
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        await self._release()
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            **_verify_stats,
+            "ready": sum(len(bucket) for bucket in self._buckets.values()),
+            "empty_buckets": sum(1 for bucket in self._buckets.values() if not bucket),
+            "target_per_bucket": self.target,
+            "low_water": self.low_water,
+            "claim_per_bucket": self.claim,
+        }
+
+
+pool = ProblemPool(
+    target=PROBLEM_POOL_TARGET,
+    low_water=PROBLEM_POOL_LOW_WATER,
+    batch_size=PROBLEM_POOL_BATCH,
+    claim=PROBLEM_POOL_CLAIM,
+)
@@ -0,0 +1,78 @@
+"""
+CV analysis cache for EVALUX
+Re-uploads of an identical file (same SHA-256) return the stored analysis
+without re-extracting the document or calling the LLM. The digest is computed
+while the upload streams in (uploads.SpooledUpload.sha256). Lookups go through an
+in-process LRU first, then the user's previous cv_analyses rows.
+"""
+import os
+import json
+import logging
+from typing import Dict, Optional
+
+import async_db
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CV_CACHE_SIZE = int(os.getenv("CV_CACHE_SIZE", "512"))
+CV_CACHE_TTL = float(os.getenv("CV_CACHE_TTL", str(24 * 60 * 60)))
+
+_memory = LRUCache(maxsize=CV_CACHE_SIZE, ttl=CV_CACHE_TTL)
+
+_stats = {"hits": 0, "memory_hits": 0, "db_hits": 0, "misses": 0}
+
+
+async def lookup(user_id: int, digest: str) -> Optional[Dict]:
+    """
+    Return {"cv_id", "parsed_text", "analysis"} for a previous upload of the
+    same bytes by this user, or None.
+    """
+    key = (user_id, digest)
+
+    cached = _memory.get(key)
+    if cached is not None:
+        _stats["hits"] += 1
+        _stats["memory_hits"] += 1
+        return cached
+
+    row = await async_db.fetch_one("""
+        SELECT id, parsed_text, analysis_json FROM cv_analyses
+        WHERE user_id = %s AND content_hash = %s
+        ORDER BY created_at DESC
+        LIMIT 1
+    """, (user_id, digest))
+
+    if not row:
+        _stats["misses"] += 1
+        return None
+
+    try:
+        analysis = json.loads(row["analysis_json"])
+    except (TypeError, ValueError):
+        _stats["misses"] += 1
+        return None
+
+    entry = {"cv_id": row["id"], "parsed_text": row["parsed_text"], "analysis": analysis}
+    _memory.set(key, entry)
+
+    _stats["hits"] += 1
+    _stats["db_hits"] += 1
+    return entry
+
+
+def remember(user_id: int, digest: str, cv_id: int, parsed_text: str, analysis: Dict):
+    _memory.set((user_id, digest), {
+        "cv_id": cv_id,
+        "parsed_text": parsed_text,
+        "analysis": analysis,
+    })
+
+
+def stats() -> Dict:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_ratio": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+        "memory_entries": len(_memory),
+    }
@@ -1,10 +1,25 @@
 import os
+import time
+import queue
+import logging
+import threading
 import mysql.connector
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_db_connection():
+logger = logging.getLogger(__name__)
+
+# Pool configuration (per worker process)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', 300))
+DB_POOL_RECYCLE = float(os.getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+
+def _connect():
     return mysql.connector.connect(
         host=os.getenv('DB_HOST'),
         user=os.getenv('DB_USER'),
@@ -13,3 +28,215 @@ def get_db_connection():
         port=int(os.getenv('DB_PORT', 3306)),
         ssl_ca=None  # Add path to CA if needed
     )
+
+
+class PooledConnection:
+    """
+    Thin proxy around a MySQL connection borrowed from the pool.
+    Calling close() hands the connection back instead of closing it,
+    so existing `conn.close()` calls in handlers keep working unchanged.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        raw = self._raw
+        if raw is None:
+            # Another request may already own the connection
+            raise RuntimeError("Connection used after close() returned it to the pool")
+        return getattr(raw, name)
+
+    def close(self):
+        if self._raw is None:
+            return
+        raw, self._raw = self._raw, None
+        self._pool._release(raw, self._created_at)
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool with overflow, idle/age recycling and optional pre-ping.
+
+    - `size` connections are kept open between requests
+    - up to `max_overflow` extra connections are opened under load and
+      closed as soon as they are returned
+    - idle connections older than `max_idle` seconds, or any connection older
+      than `recycle` seconds, are replaced on checkout
+    """
+
+    def __init__(self, connect, size=5, max_overflow=10, timeout=10.0,
+                 max_idle=300.0, recycle=1800.0, pre_ping=True):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        # LIFO keeps the hottest connections in use and lets the rest go idle
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        # Signalled whenever a connection is returned or a slot is freed
+        self._available = threading.Condition(self._lock)
+        self._open = 0
+
+        self._stats = {
+            "checkouts": 0,
+            "connects": 0,
+            "recycled": 0,
+            "ping_failures": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def connection(self):
+        """Borrow a connection; call close() on it to return it"""
+        started = time.monotonic()
+        raw, created_at = self._checkout(started)
+        waited = time.monotonic() - started
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+
+        return PooledConnection(self, raw, created_at)
+
+    def _checkout(self, started):
+        while True:
+            # Reuse an idle connection when one is available
+            try:
+                raw, created_at, returned_at = self._idle.get_nowait()
+            except queue.Empty:
+                raw = None
+
+            if raw is not None:
+                if self._is_usable(raw, created_at, returned_at):
+                    return raw, created_at
+                self._discard(raw)
+                continue
+
+            # Otherwise open a new one if we are under size + overflow
+            with self._available:
+                can_open = self._open < self.size + self.max_overflow
+                if can_open:
+                    self._open += 1
+                elif self._idle.empty():
+                    # Pool exhausted - wait for a connection to be returned
+                    # or for a broken one to free its slot
+                    remaining = self.timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise TimeoutError(
+                            f"Database pool exhausted ({self.size}+{self.max_overflow} connections in use)"
+                        )
+                    self._available.wait(remaining)
+
+            if can_open:
+                try:
+                    raw = self._connect()
+                except Exception:
+                    self._free_slot()
+                    raise
+                with self._lock:
+                    self._stats["connects"] += 1
+                return raw, time.monotonic()
+
+    def _is_usable(self, raw, created_at, returned_at):
+        now = time.monotonic()
+
+        if self.recycle and now - created_at > self.recycle:
+            with self._lock:
+                self._stats["recycled"] += 1
+            return False
+
+        if self.max_idle and now - returned_at > self.max_idle:
+            with self._lock:
+                self._stats["recycled"] += 1
+            return False
+
+        if self.pre_ping:
+            try:
+                raw.ping(reconnect=False)
+            except Exception as e:
+                logger.warning(f"Pooled connection failed pre-ping: {e}")
+                with self._lock:
+                    self._stats["ping_failures"] += 1
+                return False
+
+        return True
+
+    def _release(self, raw, created_at):
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+
+        with self._available:
+            keep = self._idle.qsize() < self.size
+            if keep:
+                self._idle.put((raw, created_at, time.monotonic()))
+                self._available.notify()
+
+        if not keep:
+            self._discard(raw)
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        self._free_slot()
+
+    def _free_slot(self):
+        with self._available:
+            self._open -= 1
+            self._available.notify()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            open_count = self._open
+        checkouts = stats["checkouts"]
+        idle = self._idle.qsize()
+        return {
+            "size": self.size,
+            "max_overflow": self.max_overflow,
+            "open": open_count,
+            "idle": idle,
+            "in_use": open_count - idle,
+            "checkouts": checkouts,
+            "connects": stats["connects"],
+            "recycled": stats["recycled"],
+            "ping_failures": stats["ping_failures"],
+            "timeouts": stats["timeouts"],
+            "wait_time_avg_ms": round(stats["wait_time_total"] / checkouts * 1000, 3) if checkouts else 0.0,
+            "wait_time_max_ms": round(stats["wait_time_max"] * 1000, 3),
+        }
+
+
+pool = ConnectionPool(
+    _connect,
+    size=DB_POOL_SIZE,
+    max_overflow=DB_POOL_MAX_OVERFLOW,
+    timeout=DB_POOL_TIMEOUT,
+    max_idle=DB_POOL_MAX_IDLE,
+    recycle=DB_POOL_RECYCLE,
+    pre_ping=DB_POOL_PRE_PING,
+)
+
+
+def get_db_connection():
+    return pool.connection()
+
+
+def get_pool_stats() -> dict:
+    return pool.stats()
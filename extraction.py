@@ -0,0 +1,298 @@
+"""
+Document text extraction for EVALUX
+Extractors are registered per MIME type and run in a bounded pool of worker
+processes with size, page and time limits instead of inside the request's
+event loop. A document that times out costs only its own worker, which is
+killed and replaced; other extractions carry on.
+Every extractor's output is normalized the same way, and looks_like_text()
+rejects garbage before it reaches the LLM.
+"""
+import os
+import re
+import time
+import asyncio
+import logging
+import unicodedata
+import multiprocessing
+from io import StringIO
+from typing import Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+CV_MAX_PAGES = int(os.getenv("CV_MAX_PAGES", "10"))
+CV_EXTRACT_TIMEOUT = float(os.getenv("CV_EXTRACT_TIMEOUT", "15"))
+CV_EXTRACT_WORKERS = int(os.getenv("CV_EXTRACT_WORKERS", "2"))
+# "layout" runs pdfminer's full LAParams layout analysis, "fast" skips it
+CV_EXTRACT_MODE = os.getenv("CV_EXTRACT_MODE", "layout").lower()
+
+PDF_MIME = "application/pdf"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TEXT_MIME = "text/plain"
+
+
+class ExtractionError(Exception):
+    """Document could not be read"""
+
+
+# MIME type -> extractor(path, max_pages, layout) returning (raw_text, pages)
+EXTRACTORS: Dict[str, Callable[[str, int, bool], Tuple[str, int]]] = {}
+
+
+def register_extractor(mime_type: str):
+    """Register a module-level extractor; it must be importable by pool workers"""
+    def decorator(fn):
+        EXTRACTORS[mime_type] = fn
+        return fn
+    return decorator
+
+
+@register_extractor(PDF_MIME)
+def _extract_pdf(path: str, max_pages: int, layout: bool) -> Tuple[str, int]:
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    output = StringIO()
+    resources = PDFResourceManager()
+    device = TextConverter(resources, output, laparams=LAParams() if layout else None)
+    interpreter = PDFPageInterpreter(resources, device)
+
+    pages = 0
+    try:
+        with open(path, "rb") as fp:
+            for page in PDFPage.get_pages(fp, maxpages=max_pages):
+                interpreter.process_page(page)
+                pages += 1
+    finally:
+        device.close()
+
+    return output.getvalue(), pages
+
+
+@register_extractor(DOCX_MIME)
+def _extract_docx(path: str, max_pages: int, layout: bool) -> Tuple[str, int]:
+    import docx
+
+    document = docx.Document(path)
+    lines = [paragraph.text for paragraph in document.paragraphs]
+
+    # Skills sections are often laid out as tables
+    for table in document.tables:
+        for row in table.rows:
+            lines.append(" | ".join(cell.text for cell in row.cells))
+
+    return "\n".join(lines), 0
+
+
+@register_extractor(TEXT_MIME)
+def _extract_plain_text(path: str, max_pages: int, layout: bool) -> Tuple[str, int]:
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8", errors="ignore"), 0
+
+
+def normalize_text(text: str) -> str:
+    """NFKC-normalize, drop control characters and collapse whitespace"""
+    text = unicodedata.normalize("NFKC", text)
+    text = "".join(ch for ch in text if ch in "\n\t" or unicodedata.category(ch)[0] != "C")
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" ?\n ?", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+_WORD = re.compile(r"[^\W\d_]{2,}")
+
+
+def looks_like_text(text: str, min_chars: int = 50) -> bool:
+    """
+    Cheap check that extracted text is readable prose rather than binary
+    noise or a broken font encoding.
+    """
+    visible = [ch for ch in text if not ch.isspace()]
+    if len(visible) < min_chars:
+        return False
+
+    if sum(ch.isalpha() for ch in visible) / len(visible) < 0.5:
+        return False
+
+    if text.count("�") / len(visible) > 0.02:
+        return False
+
+    tokens = text.split()
+    words = sum(1 for token in tokens if _WORD.search(token))
+    return words / len(tokens) >= 0.5
+
+
+def _run_extractor(mime_type: str, path: str, max_pages: int, layout: bool) -> Tuple[str, int, float]:
+    """Runs in a pool process; returns (normalized_text, pages, seconds)"""
+    started = time.perf_counter()
+    raw, pages = EXTRACTORS[mime_type](path, max_pages, layout)
+    return normalize_text(raw), pages, time.perf_counter() - started
+
+
+def _serve(conn):
+    """Pool process main loop: one (mime_type, path, max_pages, layout) job at a time"""
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(("ok", _run_extractor(*job)))
+        except Exception as e:
+            conn.send(("error", str(e) or type(e).__name__))
+
+
+class _Worker:
+    """One extraction process; killing it affects only the document it is on"""
+
+    def __init__(self):
+        # spawn: never fork the threaded API process
+        context = multiprocessing.get_context("spawn")
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    async def run(self, *job) -> Tuple[str, int, float]:
+        self.conn.send(job)
+        # recv blocks a helper thread, not the loop; it fails with EOFError if
+        # the process dies or is killed
+        status, value = await asyncio.to_thread(self.conn.recv)
+        if status != "ok":
+            raise ExtractionError(value)
+        return value
+
+    def kill(self):
+        # The pipe is left to the GC: a helper thread may still be inside recv()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+
+
+_idle = None
+_workers = set()
+_replacements = set()
+
+_stats = {
+    "documents": 0,
+    "pages": 0,
+    "pdf_seconds": 0.0,
+    "timeouts": 0,
+    "failures": 0,
+    "restarts": 0,
+}
+_by_type: Dict[str, int] = {}
+
+
+def _get_idle() -> asyncio.Queue:
+    """Queue of idle workers; processes are spawned the first time it is used"""
+    global _idle
+    if _idle is None:
+        _idle = asyncio.Queue()
+        for _ in range(CV_EXTRACT_WORKERS):
+            worker = _Worker()
+            _workers.add(worker)
+            _idle.put_nowait(worker)
+    return _idle
+
+
+async def _replace(worker: _Worker, idle: asyncio.Queue):
+    """Kill a worker that can't be reused and put a fresh one in the idle queue"""
+    # join() and spawning block, so neither runs on the event loop
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, worker.kill)
+    _workers.discard(worker)
+
+    # Keep retrying so a transient spawn failure doesn't shrink the pool
+    while True:
+        try:
+            fresh = await loop.run_in_executor(None, _Worker)
+            break
+        except Exception as e:
+            logger.error(f"❌ Extraction worker respawn failed: {e}")
+            await asyncio.sleep(1)
+
+    _workers.add(fresh)
+    _stats["restarts"] += 1
+    idle.put_nowait(fresh)
+
+
+def _schedule_replace(worker: _Worker, idle: asyncio.Queue):
+    task = asyncio.create_task(_replace(worker, idle))
+    _replacements.add(task)
+    task.add_done_callback(_replacements.discard)
+
+
+async def extract_text(path: str, mime_type: str) -> str:
+    """Extract normalized text from a document on disk in the process pool"""
+    if mime_type not in EXTRACTORS:
+        raise ExtractionError(f"No extractor registered for {mime_type}")
+
+    layout = CV_EXTRACT_MODE != "fast"
+    idle = _get_idle()
+
+    # Only time the document once a worker is free for it
+    worker = await idle.get()
+    reusable = False
+    try:
+        text, pages, seconds = await asyncio.wait_for(
+            worker.run(mime_type, path, CV_MAX_PAGES, layout), CV_EXTRACT_TIMEOUT
+        )
+        reusable = True
+    except asyncio.TimeoutError:
+        _stats["timeouts"] += 1
+        raise ExtractionError(f"Extraction timed out after {CV_EXTRACT_TIMEOUT:g}s")
+    except (EOFError, OSError) as e:
+        _stats["failures"] += 1
+        raise ExtractionError(f"Extraction worker died: {e or type(e).__name__}") from e
+    except ExtractionError:
+        # The worker answered with the extractor's error and is still fine
+        _stats["failures"] += 1
+        reusable = True
+        raise
+    finally:
+        if reusable:
+            idle.put_nowait(worker)
+        else:
+            # Timed out, died, or the caller was cancelled mid-job: its reply
+            # may still arrive, so the next caller must not get this worker
+            _schedule_replace(worker, idle)
+
+    _stats["documents"] += 1
+    _by_type[mime_type] = _by_type.get(mime_type, 0) + 1
+
+    if mime_type == PDF_MIME:
+        _stats["pages"] += pages
+        _stats["pdf_seconds"] += seconds
+        per_page_ms = seconds / pages * 1000 if pages else 0.0
+        logger.info(
+            f"✅ PDF extracted: {len(text)} chars, {pages} pages in {seconds * 1000:.0f} ms "
+            f"({per_page_ms:.0f} ms/page, mode={CV_EXTRACT_MODE})"
+        )
+    else:
+        logger.info(f"✅ Extracted {len(text)} chars from {mime_type} in {seconds * 1000:.0f} ms")
+
+    return text
+
+
+def shutdown():
+    global _idle
+    for task in list(_replacements):
+        task.cancel()
+    for worker in list(_workers):
+        worker.kill()
+    _workers.clear()
+    _idle = None
+
+
+def stats() -> Dict:
+    pages = _stats["pages"]
+    return {
+        **{k: v for k, v in _stats.items() if k != "pdf_seconds"},
+        "by_type": dict(_by_type),
+        "mode": CV_EXTRACT_MODE,
+        "max_pages": CV_MAX_PAGES,
+        "ms_per_page": round(_stats["pdf_seconds"] / pages * 1000, 1) if pages else 0.0,
+    }
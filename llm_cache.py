@@ -0,0 +1,172 @@
+"""
+LLM response cache for EVALUX
+Completions with the same model, prompt, temperature and max_tokens are
+answered from an in-process LRU and, optionally, an on-disk SQLite tier
+shared by every worker on the host, instead of calling Groq again. Calls
+above LLM_CACHE_MAX_TEMPERATURE are meant to vary, so they bypass the cache
+unless the caller opts in.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import async_db
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(60 * 60)))
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.5"))
+# SQLite file for the on-disk tier; empty keeps the cache in memory only
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+
+
+def prompt_hash(messages: List[Dict]) -> str:
+    payload = json.dumps(messages, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+    return f"{model}:{prompt_hash(messages)}:{temperature:g}:{max_tokens}"
+
+
+class DiskTier:
+    """Completions in a SQLite file (WAL), shared across worker processes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                tokens INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_llm_cache_expires ON llm_cache (expires_at);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, int]]:
+        row = self._conn().execute(
+            "SELECT content, tokens FROM llm_cache WHERE key = ? AND expires_at >= ?",
+            (key, time.time())
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, key: str, content: str, tokens: int, ttl: float):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, content, tokens, expires_at) VALUES (?, ?, ?, ?)",
+            (key, content, tokens, now + ttl)
+        )
+        # Opportunistic cleanup every few hundred writes
+        self._writes += 1
+        if self._writes % 200 == 0:
+            conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600,
+                 max_temperature: float = 0.5, path: str = "", enabled: bool = True):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+        self._memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._disk = DiskTier(path) if enabled and path else None
+
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stored": 0,
+            "saved_tokens": 0,
+        }
+
+    def should_cache(self, temperature: float, opt_in: Optional[bool] = None) -> bool:
+        """
+        opt_in=None caches only low-temperature calls; True forces caching,
+        False skips it.
+        """
+        if not self.enabled or opt_in is False:
+            return False
+        if opt_in or temperature <= self.max_temperature:
+            return True
+        self._stats["bypassed"] += 1
+        return False
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        tier = "memory_hits"
+
+        if entry is None and self._disk is not None:
+            try:
+                entry = await async_db.run_sync(self._disk.get, key)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM disk cache read failed: {e}")
+                entry = None
+            if entry is not None:
+                self._memory.set(key, entry)
+                tier = "disk_hits"
+
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+
+        content, tokens = entry
+        self._stats["hits"] += 1
+        self._stats[tier] += 1
+        self._stats["saved_tokens"] += tokens
+        return content
+
+    async def set(self, key: str, content: str, tokens: int):
+        self._memory.set(key, (content, tokens))
+        self._stats["stored"] += 1
+
+        if self._disk is not None:
+            try:
+                await async_db.run_sync(self._disk.set, key, content, tokens, self.ttl)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM disk cache write failed: {e}")
+
+    def clear(self):
+        self._memory.clear()
+
+    def stats(self) -> Dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_ratio": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_tier": bool(self._disk),
+            "max_temperature": self.max_temperature,
+        }
+
+
+cache = ResponseCache(
+    maxsize=LLM_CACHE_SIZE,
+    ttl=LLM_CACHE_TTL,
+    max_temperature=LLM_CACHE_MAX_TEMPERATURE,
+    path=LLM_CACHE_PATH,
+    enabled=LLM_CACHE_ENABLED,
+)
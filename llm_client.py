@@ -0,0 +1,277 @@
+"""
+Shared LLM client for EVALUX
+One process-wide async Groq client backed by a persistent HTTP connection
+pool, so completions reuse keep-alive TCP/TLS connections instead of opening
+a new one on every call. Completions go through a per-process concurrency
+limit; callers that cannot get a slot and an answer before their deadline get
+LLMUnavailable and fall back to the non-AI paths.
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import os
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Dict, List, Optional
+
+import llm_cache
+
+logger = logging.getLogger(__name__)
+
+# Groq Configuration
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+
+# HTTP pool / timeout configuration
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+
+# Concurrency limit / deadlines
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "20"))
+LLM_INTERACTIVE_DEADLINE = float(os.getenv("LLM_INTERACTIVE_DEADLINE", "8"))
+
+try:
+    import httpx
+    from groq import AsyncGroq
+    GROQ_AVAILABLE = True
+except ImportError:
+    GROQ_AVAILABLE = False
+    logger.warning("Groq SDK not installed")
+
+
+class LLMUnavailable(Exception):
+    """Raised when a completion cannot be served before its deadline"""
+
+
+_client = None
+_lock = threading.Lock()
+_slots = asyncio.Semaphore(LLM_MAX_IN_FLIGHT)
+
+_stats = {
+    "requests": 0,
+    "new_connections": 0,
+    "tls_handshakes": 0,
+}
+
+_gateway = {
+    "in_flight": 0,
+    "waiting": 0,
+    "completed": 0,
+    "deadline_fallbacks": 0,
+    "errors": 0,
+}
+
+
+async def _trace(event_name: str, info: Dict):
+    # httpcore reports every fresh connection; anything else was a reuse
+    if event_name == "connection.connect_tcp.complete":
+        with _lock:
+            _stats["new_connections"] += 1
+    elif event_name == "connection.start_tls.complete":
+        with _lock:
+            _stats["tls_handshakes"] += 1
+
+
+async def _on_request(request):
+    with _lock:
+        _stats["requests"] += 1
+    request.extensions["trace"] = _trace
+
+
+def get_client():
+    """Return the shared AsyncGroq client, creating it on first use"""
+    global _client
+
+    if _client is None:
+        with _lock:
+            if _client is None:
+                http_client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+                    limits=httpx.Limits(
+                        max_connections=LLM_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+                    ),
+                    event_hooks={"request": [_on_request]},
+                )
+                _client = AsyncGroq(
+                    api_key=GROQ_API_KEY,
+                    http_client=http_client,
+                    max_retries=LLM_MAX_RETRIES,
+                )
+                logger.info("✅ Shared Groq client created")
+
+    return _client
+
+
+async def chat_completion(
+    messages: List[Dict],
+    temperature: float,
+    max_tokens: int,
+    model: Optional[str] = None,
+    deadline: Optional[float] = None,
+    cache: Optional[bool] = None,
+) -> str:
+    """
+    Run one chat completion and return the message text.
+
+    At most LLM_MAX_IN_FLIGHT completions run at once per process; extra
+    callers queue for a slot. `deadline` (seconds) bounds queueing plus the
+    request itself - past it, LLMUnavailable is raised.
+
+    Identical low-temperature calls are served from llm_cache; `cache=True`
+    opts a high-temperature call in, `cache=False` always goes to Groq.
+    """
+    if not (GROQ_AVAILABLE and GROQ_API_KEY):
+        raise LLMUnavailable("Groq is not configured")
+
+    model = model or GROQ_MODEL
+    cache_key = None
+    if llm_cache.cache.should_cache(temperature, cache):
+        cache_key = llm_cache.make_key(model, messages, temperature, max_tokens)
+        cached = await llm_cache.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    async def _complete():
+        _gateway["waiting"] += 1
+        try:
+            await _slots.acquire()
+        finally:
+            _gateway["waiting"] -= 1
+
+        _gateway["in_flight"] += 1
+        try:
+            return await get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        finally:
+            _gateway["in_flight"] -= 1
+            _slots.release()
+
+    try:
+        response = await asyncio.wait_for(_complete(), deadline or LLM_DEADLINE)
+    except asyncio.TimeoutError:
+        _gateway["deadline_fallbacks"] += 1
+        logger.warning(f"⏱️ LLM deadline ({deadline or LLM_DEADLINE:g}s) passed, using fallback")
+        raise LLMUnavailable("LLM deadline exceeded")
+    except Exception:
+        _gateway["errors"] += 1
+        raise
+
+    _gateway["completed"] += 1
+    choice = response.choices[0]
+    content = choice.message.content
+
+    # A truncated answer (finish_reason "length") would be served broken forever
+    if cache_key and content and choice.finish_reason == "stop":
+        usage = getattr(response, "usage", None)
+        tokens = getattr(usage, "total_tokens", None) or len(content) // 4
+        await llm_cache.cache.set(cache_key, content, tokens)
+
+    return content
+
+
+async def stream_chat_completion(
+    messages: List[Dict],
+    temperature: float,
+    max_tokens: int,
+    model: Optional[str] = None,
+    deadline: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream one chat completion, yielding text deltas as they arrive.
+
+    Shares the concurrency limit with chat_completion(). `deadline` bounds
+    queueing plus time to first token; once tokens flow, only the HTTP
+    timeout applies. Raises LLMUnavailable if nothing arrives in time.
+    """
+    if not (GROQ_AVAILABLE and GROQ_API_KEY):
+        raise LLMUnavailable("Groq is not configured")
+
+    deadline = deadline or LLM_DEADLINE
+    loop = asyncio.get_running_loop()
+    expires = loop.time() + deadline
+
+    async def _open():
+        _gateway["waiting"] += 1
+        try:
+            await _slots.acquire()
+        finally:
+            _gateway["waiting"] -= 1
+        try:
+            stream = await get_client().chat.completions.create(
+                model=model or GROQ_MODEL,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            chunks = stream.__aiter__()
+            first = await chunks.__anext__()
+            return stream, chunks, first
+        except BaseException:
+            _slots.release()
+            raise
+
+    try:
+        stream, chunks, first = await asyncio.wait_for(_open(), max(expires - loop.time(), 0))
+    except asyncio.TimeoutError:
+        _gateway["deadline_fallbacks"] += 1
+        logger.warning(f"⏱️ LLM stream deadline ({deadline:g}s) passed, using fallback")
+        raise LLMUnavailable("LLM deadline exceeded")
+    except StopAsyncIteration:
+        raise LLMUnavailable("LLM returned an empty stream")
+    except Exception:
+        _gateway["errors"] += 1
+        raise
+
+    _gateway["in_flight"] += 1
+    try:
+        chunk = first
+        while True:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                break
+        _gateway["completed"] += 1
+    finally:
+        _gateway["in_flight"] -= 1
+        _slots.release()
+        await stream.close()
+
+
+async def close():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def stats() -> Dict:
+    with _lock:
+        requests = _stats["requests"]
+        new_connections = _stats["new_connections"]
+        tls_handshakes = _stats["tls_handshakes"]
+
+    reused = max(requests - new_connections, 0)
+    return {
+        **_gateway,
+        "max_in_flight": LLM_MAX_IN_FLIGHT,
+        "requests": requests,
+        "new_connections": new_connections,
+        "tls_handshakes": tls_handshakes,
+        "reused_connections": reused,
+        "reuse_ratio": round(reused / requests, 3) if requests else 0.0,
+    }
@@ -0,0 +1,138 @@
+"""
+Interview transcript writer for EVALUX
+Buffers interview turns in memory and writes them to `interview_messages`
+with multi-row INSERTs, flushed when the buffer reaches MESSAGE_FLUSH_SIZE
+turns or its oldest turn is MESSAGE_FLUSH_INTERVAL seconds old.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from mysql.connector import errors as mysql_errors
+
+import async_db
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_FLUSH_SIZE = int(os.getenv("MESSAGE_FLUSH_SIZE", "50"))
+MESSAGE_FLUSH_INTERVAL = float(os.getenv("MESSAGE_FLUSH_INTERVAL", "2"))
+# Cap on turns kept for retry while the database is unreachable
+MESSAGE_BUFFER_LIMIT = int(os.getenv("MESSAGE_BUFFER_LIMIT", "5000"))
+
+# interview_messages.role is ENUM('user','ai')
+ROLE_MAP = {"user": "user", "assistant": "ai", "ai": "ai"}
+
+
+class MessageBuffer:
+    def __init__(self, flush_size: int = 50, flush_interval: float = 2.0,
+                 limit: int = 5000):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.limit = limit
+
+        self._rows: List[Tuple] = []
+        self._oldest: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending = set()
+
+        self._stats = {"buffered": 0, "flushes": 0, "rows_written": 0, "failures": 0, "dropped": 0}
+
+    def add(self, session_id: str, role: str, content: str, created_at: Optional[datetime] = None):
+        """Queue one turn; triggers a flush in the background once the batch is full"""
+        self._rows.append((session_id, ROLE_MAP.get(role, "ai"), content, created_at or datetime.now()))
+        self._stats["buffered"] += 1
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+        if len(self._rows) >= self.flush_size:
+            task = asyncio.create_task(self._flush_quietly())
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def flush(self):
+        """Write every buffered turn in one multi-row INSERT"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if not self._rows:
+                return
+
+            rows, self._rows = self._rows, []
+            self._oldest = None
+
+            try:
+                await self._insert(rows)
+                self._stats["flushes"] += 1
+                self._stats["rows_written"] += len(rows)
+            except mysql_errors.IntegrityError as e:
+                # A retry would fail the same way; salvage the rows that are valid
+                logger.error(f"❌ Transcript batch rejected, writing row by row: {e}")
+                self._stats["flushes"] += 1
+                await self._insert_individually(rows)
+            except Exception as e:
+                self._stats["failures"] += 1
+                logger.error(f"❌ Transcript flush failed ({len(rows)} turns): {e}")
+
+                # Keep the turns for the next attempt, oldest first, within the cap
+                self._rows = rows + self._rows
+                overflow = len(self._rows) - self.limit
+                if overflow > 0:
+                    self._rows = self._rows[overflow:]
+                    self._stats["dropped"] += overflow
+                self._oldest = time.monotonic()
+                raise
+
+    async def _insert(self, rows: List[Tuple]):
+        placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+        params = [value for row in rows for value in row]
+        await async_db.execute(
+            f"INSERT INTO interview_messages (session_id, role, content, created_at) VALUES {placeholders}",
+            params
+        )
+
+    async def _insert_individually(self, rows: List[Tuple]):
+        for row in rows:
+            try:
+                await self._insert([row])
+                self._stats["rows_written"] += 1
+            except Exception as e:
+                self._stats["dropped"] += 1
+                logger.warning(f"Dropped transcript turn for {row[0]}: {e}")
+
+    async def _flush_quietly(self):
+        # Failures are logged and retried by flush() itself
+        try:
+            await self.flush()
+        except Exception:
+            pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval / 2)
+            if self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval:
+                await self._flush_quietly()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self._flush_quietly()
+
+    def stats(self):
+        return {**self._stats, "pending": len(self._rows)}
+
+
+buffer = MessageBuffer(
+    flush_size=MESSAGE_FLUSH_SIZE,
+    flush_interval=MESSAGE_FLUSH_INTERVAL,
+    limit=MESSAGE_BUFFER_LIMIT,
+)
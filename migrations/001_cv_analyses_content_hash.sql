@@ -0,0 +1,5 @@
+-- Content-hash lookup for the CV analysis cache (cv_cache.py)
+-- Existing rows keep content_hash NULL and simply never match.
+ALTER TABLE cv_analyses
+    ADD COLUMN content_hash CHAR(64) NULL AFTER file_path,
+    ADD INDEX ix_cv_analyses_user_hash (user_id, content_hash);
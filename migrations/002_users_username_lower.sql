@@ -0,0 +1,6 @@
+-- Case-insensitive unique usernames, and an index for username logins (/token)
+-- Functional index: needs MySQL 8.0.13+. Queries must use LOWER(username).
+-- Fails if two accounts already share a username ignoring case; find them with
+--   SELECT LOWER(username), COUNT(*) FROM users GROUP BY LOWER(username) HAVING COUNT(*) > 1;
+ALTER TABLE users
+    ADD UNIQUE INDEX ux_users_username_lower ((LOWER(username)));
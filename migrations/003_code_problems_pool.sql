@@ -0,0 +1,13 @@
+-- Shared, restart-safe problem pool (coding_problems.ProblemPool)
+-- pool_ready rows are generated problems not claimed yet; every API worker
+-- claims a few per bucket ahead of time with
+--   SELECT ... WHERE pool_ready = TRUE FOR UPDATE SKIP LOCKED
+--   UPDATE code_problems SET pool_ready = FALSE WHERE id IN (...)
+-- and sets pool_ready back on the ones it has not served at shutdown.
+-- store_problem() always writes these columns for pool problems.
+-- Existing rows are not pooled (pool_ready = FALSE).
+ALTER TABLE code_problems
+    ADD COLUMN hint TEXT NULL,
+    ADD COLUMN problem_type VARCHAR(64) NULL,
+    ADD COLUMN pool_ready BOOLEAN NOT NULL DEFAULT FALSE,
+    ADD INDEX ix_code_problems_pool_ready (pool_ready, difficulty);
@@ -0,0 +1,8 @@
+-- Shared access-token revocation list (revocations.py)
+-- expires_at is the token's JWT exp (unix time); rows past it are deleted
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    token_digest CHAR(64) PRIMARY KEY,
+    expires_at BIGINT NOT NULL,
+    revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_revoked_tokens_expires (expires_at)
+) ENGINE=InnoDB;
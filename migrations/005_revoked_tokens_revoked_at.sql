@@ -0,0 +1,3 @@
+-- Workers poll revoked_tokens for rows newer than the last revoked_at they saw
+-- (revocations.py), so the incremental query needs an index on it
+ALTER TABLE revoked_tokens ADD INDEX ix_revoked_tokens_revoked_at (revoked_at);
@@ -0,0 +1,120 @@
+"""
+Password hashing pool for EVALUX
+Hashing and verifying passwords is deliberately slow, so /register and /token
+run it on a small dedicated thread pool instead of the event loop (hashlib's
+PBKDF2 and bcrypt release the GIL). At most PASSWORD_WORKERS hashes run at
+once and PASSWORD_MAX_QUEUE more wait; beyond that PasswordPoolBusy is raised
+so a login storm is shed with a 503 instead of piling up. Hashes made with
+outdated parameters are upgraded in the background after a successful login.
+"""
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional
+
+import async_db
+from auth import pwd_context, verify_password as _verify, get_password_hash as _hash
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_MAX_QUEUE = int(os.getenv("PASSWORD_MAX_QUEUE", "64"))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="evalux-pwd")
+
+_in_flight = 0
+_rehash_tasks = set()
+
+_stats = {
+    "hashes": 0,
+    "verifications": 0,
+    "rejected": 0,
+    "rehashed": 0,
+    "rehash_failures": 0,
+    "seconds": 0.0,
+}
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+async def _run(fn: Callable, *args):
+    global _in_flight
+    if _in_flight >= PASSWORD_WORKERS + PASSWORD_MAX_QUEUE:
+        _stats["rejected"] += 1
+        raise PasswordPoolBusy("Too many logins in progress, please retry shortly")
+
+    _in_flight += 1
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, partial(fn, *args))
+    finally:
+        _in_flight -= 1
+        _stats["seconds"] += time.perf_counter() - started
+
+
+async def hash_password(password: str) -> str:
+    """auth.get_password_hash on the hashing pool"""
+    _stats["hashes"] += 1
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, hashed: Optional[str]) -> bool:
+    """auth.verify_password on the hashing pool (False for a missing hash)"""
+    if not hashed:
+        return False
+    _stats["verifications"] += 1
+    return await _run(_verify, password, hashed)
+
+
+def needs_rehash(hashed: str) -> bool:
+    try:
+        return pwd_context.needs_update(hashed)
+    except Exception:
+        return False
+
+
+async def _rehash(user_id: int, password: str, old_hash: str):
+    try:
+        new_hash = await hash_password(password)
+        # Only replace the hash we verified against: a concurrent password
+        # change wins over the upgrade
+        await async_db.execute(
+            "UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s",
+            (new_hash, user_id, old_hash)
+        )
+        _stats["rehashed"] += 1
+        logger.info(f"🔐 Upgraded password hash for user {user_id}")
+    except PasswordPoolBusy:
+        pass  # next login tries again
+    except Exception as e:
+        _stats["rehash_failures"] += 1
+        logger.warning(f"⚠️ Password rehash failed for user {user_id}: {e}")
+
+
+def schedule_rehash(user_id: int, password: str, old_hash: str):
+    """Upgrade an outdated hash in the background; call after a successful verify"""
+    if not needs_rehash(old_hash):
+        return
+    task = asyncio.create_task(_rehash(user_id, password, old_hash))
+    _rehash_tasks.add(task)
+    task.add_done_callback(_rehash_tasks.discard)
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def stats() -> Dict:
+    return {
+        **_stats,
+        "seconds": round(_stats["seconds"], 3),
+        "in_flight": _in_flight,
+        "workers": PASSWORD_WORKERS,
+        "max_queue": PASSWORD_MAX_QUEUE,
+    }
@@ -0,0 +1,134 @@
+"""
+Access-token revocation list for EVALUX
+/api/logout records the token's digest and expiry in `revoked_tokens`, which
+every worker process (on every host) reads. Each worker mirrors the
+unexpired rows in memory, so auth.verify_token checks a dict instead of the
+database; the mirror is only ever pruned of expired entries, never evicted.
+A background task polls for rows revoked since the newest one it has seen
+(a watermark on the indexed revoked_at column, with some overlap for commits
+that land out of order), every TOKEN_REVOCATION_SYNC seconds while logouts
+keep coming and backing off to TOKEN_REVOCATION_SYNC_MAX when they don't:
+the worker that handles a logout refuses the token at once, the others
+within the current interval.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import async_db
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REVOCATION_SYNC = float(os.getenv("TOKEN_REVOCATION_SYNC", "2"))
+TOKEN_REVOCATION_SYNC_MAX = float(os.getenv("TOKEN_REVOCATION_SYNC_MAX", "30"))
+# Rows revoked this long before the watermark are read again, in case their
+# transaction committed after a newer row was already seen
+TOKEN_REVOCATION_OVERLAP = float(os.getenv("TOKEN_REVOCATION_OVERLAP", "10"))
+
+# token digest -> expiry (unix time)
+_revoked: Dict[str, float] = {}
+# Newest revoked_at seen, in the database's clock; None until the first load
+_watermark: Optional[datetime] = None
+_interval = TOKEN_REVOCATION_SYNC
+_task: Optional[asyncio.Task] = None
+
+_stats = {"revoked": 0, "syncs": 0, "sync_failures": 0, "synced_rows": 0}
+
+
+def is_revoked(digest: str) -> bool:
+    expires_at = _revoked.get(digest)
+    return expires_at is not None and expires_at > time.time()
+
+
+async def revoke(digest: str, expires_at: float):
+    """Refuse the token with this digest until `expires_at`, in every worker"""
+    _revoked[digest] = expires_at
+
+    await async_db.execute(
+        "INSERT IGNORE INTO revoked_tokens (token_digest, expires_at) VALUES (%s, %s)",
+        (digest, int(expires_at) + 1)
+    )
+    # Expired revocations are useless; keep the table small
+    await async_db.execute("DELETE FROM revoked_tokens WHERE expires_at < %s", (int(time.time()),))
+    _stats["revoked"] += 1
+
+
+async def sync() -> int:
+    """
+    Add rows revoked since the watermark to the mirror (all unexpired rows on
+    the first call) and prune expired entries; returns how many were new
+    """
+    global _watermark
+    now = time.time()
+
+    if _watermark is None:
+        rows = await async_db.fetch_all(
+            "SELECT token_digest, expires_at, revoked_at FROM revoked_tokens WHERE expires_at >= %s",
+            (int(now),)
+        )
+    else:
+        rows = await async_db.fetch_all(
+            "SELECT token_digest, expires_at, revoked_at FROM revoked_tokens "
+            "WHERE revoked_at >= %s AND expires_at >= %s",
+            (_watermark - timedelta(seconds=TOKEN_REVOCATION_OVERLAP), int(now))
+        )
+
+    new = 0
+    for row in rows:
+        if row["token_digest"] not in _revoked:
+            new += 1
+        _revoked[row["token_digest"]] = float(row["expires_at"])
+        if row["revoked_at"] is not None and (_watermark is None or row["revoked_at"] > _watermark):
+            _watermark = row["revoked_at"]
+
+    for digest in [digest for digest, expires_at in _revoked.items() if expires_at <= now]:
+        del _revoked[digest]
+
+    _stats["syncs"] += 1
+    _stats["synced_rows"] += new
+    return new
+
+
+async def _run():
+    global _interval
+    while True:
+        try:
+            new = await sync()
+        except Exception as e:
+            # Keep the mirror; unexpired entries stay refused meanwhile
+            new = 0
+            _stats["sync_failures"] += 1
+            logger.error(f"❌ Token revocation sync failed: {e}")
+
+        # Poll fast while logouts are coming in, back off while they aren't
+        _interval = TOKEN_REVOCATION_SYNC if new else min(_interval * 2, TOKEN_REVOCATION_SYNC_MAX)
+        await asyncio.sleep(_interval)
+
+
+def start():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_run())
+
+
+async def stop():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def stats() -> Dict:
+    return {
+        **_stats,
+        "denylist_size": len(_revoked),
+        "sync_interval": _interval,
+        "sync_interval_max": TOKEN_REVOCATION_SYNC_MAX,
+    }
@@ -0,0 +1,404 @@
+"""
+Sandboxed code execution pool for EVALUX
+Keeps a set of warm subprocess workers (see sandbox_worker.py, plus
+sandbox_worker.js for JavaScript and SandboxWorker.java for Java) with CPU,
+wall-clock and memory limits and dispatches submissions to them
+asynchronously. Workers that time out or die are replaced in the background.
+"""
+import os
+import sys
+import math
+import base64
+import shutil
+import json
+import time
+import asyncio
+import logging
+import signal
+import tempfile
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SANDBOX_WORKERS = int(os.getenv("SANDBOX_WORKERS", "4"))
+SANDBOX_MAX_QUEUE = int(os.getenv("SANDBOX_MAX_QUEUE", "32"))
+SANDBOX_TIMEOUT = float(os.getenv("SANDBOX_TIMEOUT", "5"))
+SANDBOX_CPU_SECONDS = float(os.getenv("SANDBOX_CPU_SECONDS", "3"))
+SANDBOX_MEMORY_MB = int(os.getenv("SANDBOX_MEMORY_MB", "256"))
+SANDBOX_CODE_CACHE_SIZE = int(os.getenv("SANDBOX_CODE_CACHE_SIZE", "256"))
+# Reference solutions of generated problems run on their own small pool, by
+# default one worker per problem in a PROBLEM_POOL_BATCH so a batch verifies
+# concurrently
+SANDBOX_VERIFY_WORKERS = int(os.getenv("SANDBOX_VERIFY_WORKERS") or os.getenv("PROBLEM_POOL_BATCH", "2"))
+JS_SANDBOX_WORKERS = int(os.getenv("JS_SANDBOX_WORKERS", "2"))
+NODE_BINARY = os.getenv("NODE_BINARY") or shutil.which("node")
+JAVA_SANDBOX_WORKERS = int(os.getenv("JAVA_SANDBOX_WORKERS", "2"))
+JAVA_CLASS_CACHE_SIZE = int(os.getenv("JAVA_CLASS_CACHE_SIZE", "256"))
+JAVA_BINARY = os.getenv("JAVA_BINARY") or shutil.which("java")
+
+SIGXCPU = getattr(signal, "SIGXCPU", 24)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+JS_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.js")
+JAVA_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SandboxWorker.java")
+
+
+def python_command(cpu_seconds: float, memory_mb: int) -> List[str]:
+    # The worker applies its own rlimits (CPU per run, address space) and
+    # compiles submissions itself, under those limits
+    return [sys.executable, "-I", WORKER_SCRIPT, str(cpu_seconds), str(memory_mb),
+            str(SANDBOX_CODE_CACHE_SIZE)]
+
+
+def node_command(cpu_seconds: float, memory_mb: int) -> List[str]:
+    # V8 reserves far more address space than it uses, so the heap is capped
+    # with --max-old-space-size instead of RLIMIT_AS; the worker enforces the
+    # time budget with vm timeouts
+    return [
+        NODE_BINARY,
+        f"--max-old-space-size={memory_mb}",
+        "--disallow-code-generation-from-strings",
+        JS_WORKER_SCRIPT,
+        str(cpu_seconds),
+    ]
+
+
+def java_command(cpu_seconds: float, memory_mb: int) -> List[str]:
+    # Source-file launcher (JDK 11+): the worker compiles itself at start-up,
+    # then compiles submissions in memory with javax.tools
+    return [
+        JAVA_BINARY,
+        f"-Xmx{memory_mb}m",
+        "-XX:+UseSerialGC",
+        "-XX:+ExitOnOutOfMemoryError",
+        JAVA_WORKER_SCRIPT,
+        str(cpu_seconds),
+        str(JAVA_CLASS_CACHE_SIZE),
+    ]
+
+
+def encode_tokens(payload: Any) -> str:
+    """
+    Encode a request for SandboxWorker.java as one line of space-separated
+    tokens in prefix order, so the worker decodes it with a few lines of
+    code instead of a JSON parser: n, t, f, i<int>, d<float>,
+    s<base64 UTF-8>, l<count> followed by the items, m<count> followed by
+    the key/value pairs.
+    """
+    tokens: List[str] = []
+    _encode_token(payload, tokens)
+    return " ".join(tokens)
+
+
+def _encode_token(value: Any, tokens: List[str]):
+    if value is None:
+        tokens.append("n")
+    elif isinstance(value, bool):
+        tokens.append("t" if value else "f")
+    elif isinstance(value, int):
+        tokens.append(f"i{value}")
+    elif isinstance(value, float):
+        if math.isfinite(value):
+            tokens.append(f"d{value!r}")
+        else:
+            # Spelled the way Double.parseDouble reads them
+            tokens.append("dNaN" if math.isnan(value) else ("dInfinity" if value > 0 else "d-Infinity"))
+    elif isinstance(value, str):
+        tokens.append("s" + base64.b64encode(value.encode("utf-8", "surrogatepass")).decode("ascii"))
+    elif isinstance(value, dict):
+        tokens.append(f"m{len(value)}")
+        for key, item in value.items():
+            # Non-string keys become what json.dumps would make of them
+            _encode_token(key if isinstance(key, str) else json.dumps(key), tokens)
+            _encode_token(item, tokens)
+    elif isinstance(value, (list, tuple)):
+        tokens.append(f"l{len(value)}")
+        for item in value:
+            _encode_token(item, tokens)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} for the sandbox")
+
+
+class SandboxBusy(Exception):
+    """Raised when the run queue is full"""
+
+
+class SandboxTimeout(Exception):
+    """Raised when a run exceeds its wall-clock or CPU limit"""
+
+
+class SandboxCrashed(Exception):
+    """Raised when a worker dies mid-run (e.g. memory limit)"""
+
+
+class _Worker:
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.runs = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def request(self, line: str, timeout: float) -> Dict:
+        self.process.stdin.write((line + "\n").encode())
+        await self.process.stdin.drain()
+
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        if not line:
+            raise SandboxCrashed("Worker exited during run")
+        self.runs += 1
+        return json.loads(line)
+
+    def kill(self):
+        if self.alive:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+        # Lets the transport close once the process is reaped
+        self.process.stdin.close()
+
+
+class SandboxPool:
+    """
+    Pool of `size` pre-forked workers. At most `size` submissions run at once;
+    up to `max_queue` more wait for a free worker, beyond that run() raises
+    SandboxBusy so callers can shed load instead of piling up. Requests are
+    written one per line by `encode` (JSON unless the worker reads another
+    format); replies are always JSON lines.
+    """
+
+    def __init__(self, size: int = 4, max_queue: int = 32, timeout: float = 5.0,
+                 cpu_seconds: float = 3.0, memory_mb: int = 256,
+                 command: Callable[[float, int], List[str]] = python_command,
+                 name: str = "python", start_timeout: float = 10.0,
+                 encode: Callable[[Any], str] = json.dumps):
+        self.name = name
+        self.command = command
+        self.encode = encode
+        self.start_timeout = start_timeout
+        self.size = size
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_Worker] = []
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._started = False
+        # Scratch cwd for the workers; created by start(), removed by close()
+        self._workdir: Optional[str] = None
+        self._respawns = set()
+
+        self._waiting = 0
+        self._busy = 0
+        self._latencies = deque(maxlen=512)
+        self._stats = {
+            "runs": 0,
+            "timeouts": 0,
+            "crashes": 0,
+            "rejected": 0,
+            "restarts": 0,
+        }
+
+    async def start(self):
+        """Pre-fork all workers (idempotent)"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+
+        async with self._start_lock:
+            if self._started:
+                return
+            if self._workdir is None:
+                self._workdir = tempfile.mkdtemp(prefix="evalux-sandbox-")
+            self._idle = asyncio.Queue()
+            workers = await asyncio.gather(*(self._spawn() for _ in range(self.size)))
+            for worker in workers:
+                self._idle.put_nowait(worker)
+            self._started = True
+            logger.info(f"✅ Sandbox pool started: {self.size} {self.name} workers")
+
+    async def close(self):
+        respawns = list(self._respawns)
+        for task in respawns:
+            task.cancel()
+        await asyncio.gather(*respawns, return_exceptions=True)
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.kill()
+        # Reap them so no subprocess transport outlives the event loop
+        for worker in workers:
+            try:
+                await worker.process.communicate()
+            except Exception:
+                pass
+        if self._workdir is not None:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+            self._workdir = None
+        self._started = False
+
+    async def _spawn(self) -> _Worker:
+        process = await asyncio.create_subprocess_exec(
+            *self.command(self.cpu_seconds, self.memory_mb),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            cwd=self._workdir,
+            # Never leak API keys / DB credentials into the sandbox
+            env={"PATH": os.environ.get("PATH", "")},
+            limit=1024 * 1024,
+        )
+        worker = _Worker(process)
+
+        try:
+            ready = await asyncio.wait_for(process.stdout.readline(), self.start_timeout)
+            if not ready:
+                raise RuntimeError("Sandbox worker failed to start")
+        except BaseException:
+            # Exited, timed out or cancelled by close(): kill and reap it so
+            # no process or zombie is left behind
+            worker.kill()
+            await process.wait()
+            raise
+
+        self._workers.append(worker)
+        return worker
+
+    async def _replace(self, worker: _Worker):
+        worker.kill()
+        try:
+            await worker.process.wait()
+        except Exception:
+            pass
+        # Only forget it once reaped, so close() still reaps it if we are cancelled
+        if worker in self._workers:
+            self._workers.remove(worker)
+
+        # Keep retrying so a transient spawn failure doesn't shrink the pool
+        while True:
+            try:
+                fresh = await self._spawn()
+                break
+            except Exception as e:
+                logger.error(f"❌ Sandbox worker respawn failed: {e}")
+                await asyncio.sleep(1)
+
+        self._stats["restarts"] += 1
+        self._idle.put_nowait(fresh)
+
+    async def run(self, payload: Dict) -> Dict:
+        """Run one submission on a free worker and return the worker's reply"""
+        if not self._started:
+            await self.start()
+
+        # Before taking a worker: a payload that can't be encoded is our bug, not the worker's
+        line = self.encode(payload)
+
+        if self._waiting >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise SandboxBusy("Code runner is busy, please try again")
+
+        self._waiting += 1
+        try:
+            worker = await self._idle.get()
+        finally:
+            self._waiting -= 1
+
+        self._busy += 1
+        started = time.perf_counter()
+        healthy = False
+
+        try:
+            reply = await worker.request(line, self.timeout)
+            if reply.get("stage") == "timeout":
+                self._stats["timeouts"] += 1
+            # Workers that cannot recover on their own ask to be replaced
+            healthy = not reply.get("restart")
+            return reply
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise SandboxTimeout(f"Time limit exceeded ({self.timeout:g}s)")
+        except (SandboxCrashed, ConnectionError, ValueError):
+            # Dead worker: SIGXCPU means the CPU limit was hit
+            try:
+                await asyncio.wait_for(worker.process.wait(), 1)
+            except asyncio.TimeoutError:
+                pass
+            if worker.process.returncode == -SIGXCPU:
+                self._stats["timeouts"] += 1
+                raise SandboxTimeout(f"CPU time limit exceeded ({self.cpu_seconds:g}s)")
+            self._stats["crashes"] += 1
+            raise SandboxCrashed("Execution aborted (memory limit or crash)")
+        finally:
+            self._busy -= 1
+            self._stats["runs"] += 1
+            self._latencies.append(time.perf_counter() - started)
+
+            if healthy and worker.alive:
+                self._idle.put_nowait(worker)
+            else:
+                task = asyncio.create_task(self._replace(worker))
+                self._respawns.add(task)
+                task.add_done_callback(self._respawns.discard)
+
+    def stats(self) -> Dict:
+        latencies = sorted(self._latencies)
+        count = len(latencies)
+        return {
+            "runtime": self.name,
+            "workers": self.size,
+            "idle": self._idle.qsize() if self._idle else 0,
+            "busy": self._busy,
+            "queue_depth": self._waiting,
+            "max_queue": self.max_queue,
+            **self._stats,
+            "latency_avg_ms": round(sum(latencies) / count * 1000, 2) if count else 0.0,
+            "latency_p95_ms": round(latencies[min(count - 1, int(count * 0.95))] * 1000, 2) if count else 0.0,
+            "latency_max_ms": round(latencies[-1] * 1000, 2) if count else 0.0,
+        }
+
+
+pool = SandboxPool(
+    size=SANDBOX_WORKERS,
+    max_queue=SANDBOX_MAX_QUEUE,
+    timeout=SANDBOX_TIMEOUT,
+    cpu_seconds=SANDBOX_CPU_SECONDS,
+    memory_mb=SANDBOX_MEMORY_MB,
+)
+
+# Problem verification (coding_problems.verify_problem); started on first use
+verify_pool = SandboxPool(
+    size=SANDBOX_VERIFY_WORKERS,
+    max_queue=SANDBOX_MAX_QUEUE,
+    timeout=SANDBOX_TIMEOUT,
+    cpu_seconds=SANDBOX_CPU_SECONDS,
+    memory_mb=SANDBOX_MEMORY_MB,
+    name="verify",
+)
+
+# None when Node.js is not installed; JavaScript runs are then refused
+js_pool = SandboxPool(
+    size=JS_SANDBOX_WORKERS,
+    max_queue=SANDBOX_MAX_QUEUE,
+    timeout=SANDBOX_TIMEOUT,
+    cpu_seconds=SANDBOX_CPU_SECONDS,
+    memory_mb=SANDBOX_MEMORY_MB,
+    command=node_command,
+    name="javascript",
+) if NODE_BINARY else None
+
+# None when no JDK is installed; Java runs are then refused
+java_pool = SandboxPool(
+    size=JAVA_SANDBOX_WORKERS,
+    max_queue=SANDBOX_MAX_QUEUE,
+    timeout=SANDBOX_TIMEOUT,
+    cpu_seconds=SANDBOX_CPU_SECONDS,
+    memory_mb=SANDBOX_MEMORY_MB,
+    command=java_command,
+    name="java",
+    start_timeout=60,
+    encode=encode_tokens,
+) if JAVA_BINARY else None
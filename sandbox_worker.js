@@ -0,0 +1,189 @@
+/*
+ * JavaScript sandbox worker for EVALUX code practice
+ * Long-lived Node process started by sandbox.SandboxPool (same line protocol
+ * as sandbox_worker.py). Each request gets a fresh vm context with no
+ * require/process/timers; the submitted code is compiled once, then the
+ * function is called for every test case under a per-request time budget.
+ * Heap size is capped by the pool with --max-old-space-size.
+ *
+ * Usage: node sandbox_worker.js <cpu_seconds>
+ */
+'use strict';
+
+const vm = require('vm');
+const readline = require('readline');
+
+const MAX_OUTPUT_CHARS = 10000;
+const FUNCTION_DECLARATION = /function\s+([A-Za-z_$][\w$]*)\s*\(|(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)/;
+
+const cpuSeconds = Number(process.argv[2] || 5);
+
+// Keep in step with answers.py (compare_answers); tests/answer_vectors.json
+// holds the cases both must agree on
+function compareAnswers(actual, expected) {
+    // ASCII whitespace only: String.trim() also strips U+FEFF and Unicode spaces
+    const clean = (value) => String(value).replace(/^[ \t\n\r\f\v]+|[ \t\n\r\f\v]+$/g, '').replace(/[ \n\r]/g, '');
+    const actualClean = clean(actual);
+    const expectedClean = clean(expected);
+
+    if (actualClean.toLowerCase() === expectedClean.toLowerCase()) {
+        return true;
+    }
+
+    const numeric = /^[+-]?(\d+\.?\d*|\.\d+)(e[+-]?\d+)?$/i;
+    if (numeric.test(actualClean) && numeric.test(expectedClean)) {
+        return Math.abs(Number(actualClean) - Number(expectedClean)) < 0.01;
+    }
+
+    const trueValues = ['true', '1', 'yes'];
+    const falseValues = ['false', '0', 'no'];
+    if (trueValues.includes(actualClean.toLowerCase()) && trueValues.includes(expectedClean.toLowerCase())) {
+        return true;
+    }
+    if (falseValues.includes(actualClean.toLowerCase()) && falseValues.includes(expectedClean.toLowerCase())) {
+        return true;
+    }
+
+    return actualClean.includes(expectedClean);
+}
+
+function errorMessage(error) {
+    if (error && typeof error.message === 'string') {
+        return error.message || error.name || 'Error';
+    }
+    return String(error);
+}
+
+function formatResult(value) {
+    if (value === undefined || value === null) {
+        return null;
+    }
+    if (typeof value === 'string') {
+        return value;
+    }
+    if (typeof value === 'object') {
+        try {
+            return JSON.stringify(value);
+        } catch (e) {
+            return String(value);
+        }
+    }
+    return String(value);
+}
+
+function makeContext(output) {
+    const log = (...args) => {
+        output.text += args.map((arg) => (typeof arg === 'string' ? arg : formatResult(arg))).join(' ') + '\n';
+    };
+    const context = vm.createContext(
+        { console: { log, info: log, warn: log, error: log } },
+        { codeGeneration: { strings: false, wasm: false }, microtaskMode: 'afterEvaluate' }
+    );
+    return context;
+}
+
+function runCases(request) {
+    const deadline = Date.now() + cpuSeconds * 1000;
+    const remaining = () => Math.max(1, Math.floor(deadline - Date.now()));
+    const output = { text: '' };
+    const context = makeContext(output);
+
+    let script;
+    try {
+        script = new vm.Script(request.code, { filename: 'solution.js' });
+    } catch (e) {
+        return { stage: 'compile', error: errorMessage(e) };
+    }
+
+    try {
+        script.runInContext(context, { timeout: remaining() });
+    } catch (e) {
+        if (e && e.code === 'ERR_SCRIPT_EXECUTION_TIMEOUT') {
+            return { stage: 'timeout', error: 'Time limit exceeded' };
+        }
+        return { stage: 'compile', error: errorMessage(e) };
+    }
+
+    // Prefer solution(); otherwise the first function the code declares
+    let funcName = 'solution';
+    if (vm.runInContext('typeof solution', context) !== 'function') {
+        const match = FUNCTION_DECLARATION.exec(request.code);
+        funcName = match ? (match[1] || match[2]) : null;
+        if (!funcName || vm.runInContext(`typeof ${funcName}`, context) !== 'function') {
+            return { stage: 'lookup', error: 'No function found - define function solution() { ... }' };
+        }
+    }
+
+    const call = new vm.Script(`${funcName}(...__evaluxArgs)`, { filename: 'call.js' });
+    const results = [];
+
+    for (const testCase of request.cases) {
+        let args = testCase.input || [];
+        if (!Array.isArray(args)) {
+            args = [args];
+        }
+        const expected = testCase.expected === undefined ? '' : String(testCase.expected);
+
+        output.text = '';
+        context.__evaluxArgs = vm.runInContext('JSON.parse', context)(JSON.stringify(args));
+
+        let result = null;
+        let error = null;
+        const started = process.hrtime.bigint();
+        try {
+            result = formatResult(call.runInContext(context, { timeout: remaining() }));
+        } catch (e) {
+            if (e && e.code === 'ERR_SCRIPT_EXECUTION_TIMEOUT') {
+                return { stage: 'timeout', error: 'Time limit exceeded' };
+            }
+            error = `Runtime error: ${errorMessage(e)}`;
+        }
+        const elapsedMs = Number(process.hrtime.bigint() - started) / 1e6;
+
+        const printed = output.text.slice(0, MAX_OUTPUT_CHARS).trim();
+        // The answer is the RETURN VALUE; printed text only if nothing was returned
+        const actual = error === null && result !== null ? result.slice(0, MAX_OUTPUT_CHARS) : printed;
+        const passed = error === null && compareAnswers(actual, expected);
+
+        results.push({
+            passed,
+            expected,
+            actual,
+            error,
+            ms: Math.round(elapsedMs * 1000) / 1000,
+        });
+
+        if (request.stop_on_failure && !passed) {
+            break;
+        }
+    }
+
+    return { stage: 'done', cases: results };
+}
+
+function main() {
+    const reply = (message) => process.stdout.write(JSON.stringify(message) + '\n');
+    const lines = readline.createInterface({ input: process.stdin });
+
+    lines.on('line', (line) => {
+        let request;
+        try {
+            request = JSON.parse(line);
+        } catch (e) {
+            return;
+        }
+
+        let response;
+        try {
+            response = runCases(request);
+        } catch (e) {
+            response = { stage: 'runtime', error: errorMessage(e) };
+        }
+        reply(response);
+    });
+    lines.on('close', () => process.exit(0));
+
+    reply({ ready: true });
+}
+
+main();
@@ -0,0 +1,252 @@
+"""
+Sandbox worker for EVALUX code practice
+Long-lived subprocess started by sandbox.SandboxPool. Reads one JSON request
+per line on stdin, runs the submitted function and writes one JSON reply per
+line on a private copy of stdout. A request with "cases" defines the function
+once and calls it for every test case, checking each answer in here.
+
+Submissions arrive as source and are compiled here, under the worker's CPU
+and memory limits, never in the API process. Code objects are kept in a
+small LRU keyed by the source hash the API sends along.
+
+Usage: python sandbox_worker.py <cpu_seconds> <memory_mb> [code_cache_size]
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import hashlib
+from collections import OrderedDict
+from contextlib import redirect_stdout, redirect_stderr
+
+# -I leaves the script directory off sys.path; answers.py lives next to us
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from answers import compare_answers
+
+try:
+    import resource
+except ImportError:  # Windows dev machines - no rlimits available
+    resource = None
+
+MAX_OUTPUT_CHARS = 10000
+
+SAFE_BUILTINS = {
+    'print': print,
+    'len': len,
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'list': list,
+    'dict': dict,
+    'tuple': tuple,
+    'set': set,
+    'range': range,
+    'sum': sum,
+    'max': max,
+    'min': min,
+    'abs': abs,
+    'round': round,
+    'sorted': sorted,
+    'reversed': reversed,
+    'enumerate': enumerate,
+    'zip': zip,
+    'map': map,
+    'filter': filter,
+    'True': True,
+    'False': False,
+    'None': None,
+}
+
+
+def apply_memory_limit(memory_mb: int):
+    if resource is None or memory_mb <= 0:
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def apply_cpu_limit(cpu_seconds: float):
+    """Allow `cpu_seconds` more CPU time for this run; SIGXCPU kills us past it"""
+    if resource is None or cpu_seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(math.ceil(used + cpu_seconds))
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+class CodeCache:
+    """Compiled code objects by source hash, least recently used evicted first"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def compile(self, source: str, key: str = None):
+        """Code object for `source`; raises SyntaxError etc. like compile()"""
+        key = key or hashlib.sha256(source.encode("utf-8", "surrogatepass")).hexdigest()
+        code = self._entries.get(key)
+        if code is not None:
+            self._entries.move_to_end(key)
+            return code
+
+        code = compile(source, "<string>", "exec")
+        if self.maxsize > 0:
+            self._entries[key] = code
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return code
+
+
+def run_submission(code, func_name: str) -> dict:
+    """`code` is a code object from CodeCache"""
+    safe_globals = {"__builtins__": dict(SAFE_BUILTINS)}
+
+    # Execute the user's code to define the function
+    try:
+        exec(code, safe_globals)
+    except Exception as e:
+        return {"stage": "compile", "error": str(e) or type(e).__name__}
+
+    # Check if function was defined
+    if func_name not in safe_globals:
+        return {"stage": "lookup", "error": f"Function '{func_name}' not found in code"}
+
+    stdout_capture = io.StringIO()
+    stderr_capture = io.StringIO()
+
+    try:
+        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
+            result = safe_globals[func_name]()
+        return {
+            "stage": "done",
+            "result": None if result is None else str(result)[:MAX_OUTPUT_CHARS],
+            "result_type": type(result).__name__,
+            "printed": stdout_capture.getvalue()[:MAX_OUTPUT_CHARS],
+            "stderr": stderr_capture.getvalue()[:MAX_OUTPUT_CHARS],
+        }
+    except Exception as e:
+        return {
+            "stage": "runtime",
+            "error": str(e) or type(e).__name__,
+            "printed": stdout_capture.getvalue()[:MAX_OUTPUT_CHARS],
+        }
+
+
+def run_cases(code, func_name: str, cases: list, stop_on_failure: bool) -> dict:
+    """
+    Define the function once, then call it with each case's "input" (a list
+    of positional arguments) and compare against "expected". With
+    `stop_on_failure` the first failing case ends the run.
+    """
+    safe_globals = {"__builtins__": dict(SAFE_BUILTINS)}
+
+    try:
+        exec(code, safe_globals)
+    except Exception as e:
+        return {"stage": "compile", "error": str(e) or type(e).__name__}
+
+    if func_name not in safe_globals:
+        return {"stage": "lookup", "error": f"Function '{func_name}' not found in code"}
+
+    func = safe_globals[func_name]
+    results = []
+
+    for case in cases:
+        args = case.get("input") or []
+        if not isinstance(args, list):
+            args = [args]
+        expected = case.get("expected", "")
+
+        stdout_capture = io.StringIO()
+        stderr_capture = io.StringIO()
+        error = None
+        result = None
+
+        started = time.perf_counter()
+        try:
+            with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
+                result = func(*args)
+        except Exception as e:
+            error = f"Runtime error: {str(e) or type(e).__name__}"
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        printed = stdout_capture.getvalue()[:MAX_OUTPUT_CHARS].strip()
+        stderr = stderr_capture.getvalue()[:MAX_OUTPUT_CHARS].strip()
+
+        # The answer is the RETURN VALUE; printed text only if nothing was returned
+        if error is None and result is not None:
+            actual = str(result)[:MAX_OUTPUT_CHARS]
+        else:
+            actual = printed
+        if error is None and stderr:
+            error = stderr
+
+        passed = error is None and compare_answers(actual, expected)
+        results.append({
+            "passed": passed,
+            "expected": expected,
+            "actual": actual,
+            "error": error,
+            "ms": round(elapsed_ms, 3),
+        })
+
+        if stop_on_failure and not passed:
+            break
+
+    return {"stage": "done", "cases": results}
+
+
+def handle(request: dict, code_cache: CodeCache) -> dict:
+    try:
+        code = code_cache.compile(request["code"], request.get("code_hash"))
+    except (SyntaxError, ValueError, RecursionError, OverflowError, MemoryError) as e:
+        return {"stage": "compile", "error": str(e) or type(e).__name__}
+
+    if "cases" in request:
+        return run_cases(code, request["func_name"], request["cases"],
+                         request.get("stop_on_failure", False))
+    return run_submission(code, request["func_name"])
+
+
+def main():
+    cpu_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    memory_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    code_cache = CodeCache(int(sys.argv[3]) if len(sys.argv) > 3 else 256)
+
+    # Keep a private handle for replies so nothing the submission writes to
+    # fd 1/2 can corrupt the protocol stream
+    replies = os.fdopen(os.dup(1), "w", buffering=1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+
+    apply_memory_limit(memory_mb)
+
+    replies.write(json.dumps({"ready": True}) + "\n")
+
+    for line in sys.stdin:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            continue
+
+        # One CPU budget per request (compile included), however many cases it carries
+        apply_cpu_limit(cpu_seconds)
+        try:
+            reply = handle(request, code_cache)
+        except MemoryError:
+            reply = {"stage": "runtime", "error": "Memory limit exceeded"}
+
+        replies.write(json.dumps(reply) + "\n")
+
+
+if __name__ == "__main__":
+    main()
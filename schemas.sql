@@ -6,7 +6,8 @@ CREATE TABLE IF NOT EXISTS users (
     password_hash VARCHAR(255) NOT NULL,
     interests JSON,
     verified BOOLEAN NOT NULL DEFAULT FALSE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE INDEX ux_users_username_lower ((LOWER(username)))
 ) ENGINE=InnoDB;
 
 -- CV Uploads table
@@ -23,10 +24,12 @@ CREATE TABLE IF NOT EXISTS cv_analyses (
     id BIGINT AUTO_INCREMENT PRIMARY KEY,
     user_id BIGINT UNSIGNED NOT NULL,
     file_path VARCHAR(255) NOT NULL,
+    content_hash CHAR(64) NULL,
     parsed_text LONGTEXT,
     analysis_json JSON,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES users(id)
+    FOREIGN KEY (user_id) REFERENCES users(id),
+    INDEX ix_cv_analyses_user_hash (user_id, content_hash)
 ) ENGINE=InnoDB;
 
 -- Interview sessions table
@@ -37,6 +40,8 @@ CREATE TABLE IF NOT EXISTS interview_sessions (
     started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     ended_at TIMESTAMP NULL,
     metadata JSON NULL,
+    score DECIMAL(4,1) NULL,
+    feedback JSON NULL,
     FOREIGN KEY (user_id) REFERENCES users(id)
 ) ENGINE=InnoDB;
 
@@ -51,3 +56,12 @@ CREATE TABLE IF NOT EXISTS interview_messages (
     INDEX (session_id),
     INDEX (created_at)
 ) ENGINE=InnoDB;
+
+-- Revoked access tokens (logout); expires_at is the JWT exp in unix time
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    token_digest CHAR(64) PRIMARY KEY,
+    expires_at BIGINT NOT NULL,
+    revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_revoked_tokens_expires (expires_at),
+    INDEX ix_revoked_tokens_revoked_at (revoked_at)
+) ENGINE=InnoDB;
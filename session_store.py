@@ -0,0 +1,237 @@
+"""
+Interview session store for EVALUX
+Keeps live interview sessions (metadata + message history) behind one async
+interface with two backends:
+
+- memory: per-process dict, fine for a single uvicorn worker / local dev
+- sqlite: embedded SQLite file in WAL mode, shared by every worker process on
+  the host and surviving restarts
+
+Every turn is written through as it happens and sessions expire after
+SESSION_TTL seconds without activity.
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+import async_db
+
+logger = logging.getLogger(__name__)
+
+SESSION_STORE = os.getenv("SESSION_STORE", "sqlite").lower()
+SESSION_DB_PATH = os.getenv(
+    "SESSION_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions.sqlite3")
+)
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(2 * 60 * 60)))
+
+
+class SessionStore(ABC):
+    """Interface shared by all session backends"""
+
+    @abstractmethod
+    async def create(self, session_id: str, data: Dict) -> None:
+        """Store a new session; `data` may include an initial `history` list"""
+        ...
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[Dict]:
+        """Return a copy of the session (with `history`) or None if missing/expired"""
+        ...
+
+    @abstractmethod
+    async def append_message(self, session_id: str, message: Dict) -> None:
+        """Write one turn through to the store and refresh the TTL"""
+        ...
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        ...
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, ttl: int = SESSION_TTL):
+        self.ttl = ttl
+        self._sessions: Dict[str, Dict] = {}
+
+    def _purge(self):
+        now = time.time()
+        expired = [sid for sid, s in self._sessions.items() if s["expires_at"] < now]
+        for sid in expired:
+            del self._sessions[sid]
+
+    async def create(self, session_id: str, data: Dict) -> None:
+        self._purge()
+        data = dict(data)
+        history = list(data.pop("history", []))
+        self._sessions[session_id] = {
+            "data": data,
+            "history": history,
+            "expires_at": time.time() + self.ttl,
+        }
+
+    async def get(self, session_id: str) -> Optional[Dict]:
+        entry = self._sessions.get(session_id)
+        if not entry:
+            return None
+        if entry["expires_at"] < time.time():
+            del self._sessions[session_id]
+            return None
+        return {**entry["data"], "history": list(entry["history"])}
+
+    async def append_message(self, session_id: str, message: Dict) -> None:
+        entry = self._sessions.get(session_id)
+        if not entry:
+            raise KeyError(session_id)
+        entry["history"].append(message)
+        entry["expires_at"] = time.time() + self.ttl
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    def __init__(self, path: str = SESSION_DB_PATH, ttl: int = SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires_at);
+
+            CREATE TABLE IF NOT EXISTS session_messages (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                message TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_session_messages_session
+                ON session_messages (session_id, seq);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets several worker processes share the file
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+
+        # The file and tables are created on first use, not at import
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._create_schema(conn)
+                    self._schema_ready = True
+        return conn
+
+    def _create(self, session_id: str, data: Dict):
+        data = dict(data)
+        history = data.pop("history", [])
+        now = time.time()
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Opportunistic cleanup of expired sessions
+            conn.execute("""
+                DELETE FROM session_messages WHERE session_id IN
+                (SELECT id FROM sessions WHERE expires_at < ?)
+            """, (now,))
+            conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(data), now + self.ttl)
+            )
+            conn.executemany(
+                "INSERT INTO session_messages (session_id, message) VALUES (?, ?)",
+                [(session_id, json.dumps(m)) for m in history]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _get(self, session_id: str) -> Optional[Dict]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT data, expires_at FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        if not row or row[1] < time.time():
+            return None
+
+        messages = conn.execute(
+            "SELECT message FROM session_messages WHERE session_id = ? ORDER BY seq",
+            (session_id,)
+        ).fetchall()
+
+        session = json.loads(row[0])
+        session["history"] = [json.loads(m[0]) for m in messages]
+        return session
+
+    def _append(self, session_id: str, message: Dict):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            updated = conn.execute(
+                "UPDATE sessions SET expires_at = ? WHERE id = ? AND expires_at >= ?",
+                (time.time() + self.ttl, session_id, time.time())
+            ).rowcount
+            if not updated:
+                raise KeyError(session_id)
+            conn.execute(
+                "INSERT INTO session_messages (session_id, message) VALUES (?, ?)",
+                (session_id, json.dumps(message))
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _delete(self, session_id: str):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def create(self, session_id: str, data: Dict) -> None:
+        await async_db.run_sync(self._create, session_id, data)
+
+    async def get(self, session_id: str) -> Optional[Dict]:
+        return await async_db.run_sync(self._get, session_id)
+
+    async def append_message(self, session_id: str, message: Dict) -> None:
+        await async_db.run_sync(self._append, session_id, message)
+
+    async def delete(self, session_id: str) -> None:
+        await async_db.run_sync(self._delete, session_id)
+
+
+def create_store() -> SessionStore:
+    if SESSION_STORE == "memory":
+        logger.info("Interview sessions: in-memory store")
+        return MemorySessionStore()
+    logger.info(f"Interview sessions: SQLite store at {SESSION_DB_PATH}")
+    return SQLiteSessionStore()
+
+
+store = create_store()
@@ -0,0 +1,248 @@
+"""
+Skill taxonomy for EVALUX
+Loads canonical skill names and their aliases from a plain-text taxonomy file.
+SkillMatcher compiles every alias into one trie-shaped regular expression, so
+a CV is scanned for thousands of skills in a single pass, on whole tokens
+("java" does not match "javascript"). SkillIndex maps free-form skill strings
+("ReactJS", "react.js") to canonical skills, so CV analyses, interview prompts
+and interest counts all use the same names.
+"""
+import os
+import re
+import sys
+import time
+import logging
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills.txt")
+)
+
+# A skill must not be glued to other token characters on either side
+# ("c" vs "c++" / "c#", "java" vs "javascript")
+_LEFT_BOUNDARY = r"(?<![\w+#])"
+_RIGHT_BOUNDARY = r"(?![\w+#])"
+
+
+def load_taxonomy(path: str) -> List[Tuple[str, List[str]]]:
+    """
+    Parse a taxonomy file into [(canonical, aliases)].
+
+    One skill per line: `Canonical | alias | alias`. Lines starting with `#`
+    are comments. A leading `!` on the canonical name means only the aliases
+    are matched (for names that are also common words, e.g. `!Go | golang`).
+    A leading `&` on an alias marks it as shared: it may appear on several
+    lines and a match counts for each of them (`&c/c++` on both C and C++).
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            names = [name.strip() for name in line.split("|")]
+            canonical = names[0]
+            aliases = [name for name in names[1:] if name]
+
+            if canonical.startswith("!"):
+                canonical = canonical[1:].strip()
+            else:
+                aliases.insert(0, canonical)
+
+            entries.append((sys.intern(canonical), aliases))
+    return entries
+
+
+def _normalize_alias(alias: str) -> str:
+    return " ".join(alias.lstrip("&").lower().split())
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex alternation that shares common prefixes between words"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: Dict) -> str:
+    branches = []
+    for ch in sorted(key for key in node if key):
+        token = r"\s+" if ch == " " else re.escape(ch)
+        branches.append(token + _node_pattern(node[ch]))
+
+    if not branches:
+        return ""
+
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # A word ends here; the longer continuation is tried first
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+
+class SkillMatcher:
+    """Single-pass matcher for every alias in a taxonomy"""
+
+    def __init__(self, entries: List[Tuple[str, List[str]]]):
+        # alias -> canonical skills it counts for (several only for `&` aliases)
+        self._canonical: Dict[str, Tuple[str, ...]] = {}
+        self.skills = 0
+
+        for canonical, aliases in entries:
+            self.skills += 1
+            for alias in aliases:
+                key = _normalize_alias(alias)
+                owners = self._canonical.get(key)
+                if owners is None:
+                    self._canonical[key] = (canonical,)
+                elif alias.startswith("&"):
+                    if canonical not in owners:
+                        self._canonical[key] = owners + (canonical,)
+                elif canonical not in owners:
+                    logger.warning(f"Skill alias '{alias}' of {canonical} already maps to {owners[0]}")
+
+        self._pattern = None
+        if self._canonical:
+            self._pattern = re.compile(
+                _LEFT_BOUNDARY + "(" + _trie_pattern(self._canonical) + ")" + _RIGHT_BOUNDARY
+            )
+
+    def __len__(self) -> int:
+        return self.skills
+
+    @property
+    def alias_count(self) -> int:
+        return len(self._canonical)
+
+    def find(self, text: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Canonical skills mentioned in `text`, most frequently mentioned first
+        (ties keep the order of first mention).
+        """
+        if self._pattern is None:
+            return []
+
+        counts: Dict[str, int] = {}
+        for match in self._pattern.finditer(text.lower()):
+            for canonical in self._canonical[_normalize_alias(match.group(1))]:
+                counts[canonical] = counts.get(canonical, 0) + 1
+
+        ranked = sorted(counts, key=lambda skill: -counts[skill])
+        return ranked[:limit] if limit else ranked
+
+
+_PUNCTUATION = re.compile(r"[\s._-]+")
+
+
+def _index_key(name: str) -> str:
+    # "React.js", "react js", "ReactJS" -> "reactjs"; keeps "+" and "#" (C++, C#)
+    return _PUNCTUATION.sub("", name.lower())
+
+
+class SkillIndex:
+    """
+    Alias -> canonical skill lookup. Keys live in one sorted list searched
+    with bisect, with canonical IDs in a parallel array, so the index costs
+    a few bytes per alias on top of the (interned) strings themselves.
+    """
+
+    def __init__(self, entries: List[Tuple[str, List[str]]]):
+        self.names: List[str] = []
+        pairs: Dict[str, int] = {}
+
+        for canonical_id, (canonical, aliases) in enumerate(entries):
+            self.names.append(canonical)
+            for alias in [canonical] + aliases:
+                key = _index_key(alias.lstrip("&"))
+                if key:
+                    pairs.setdefault(key, canonical_id)
+
+        self._keys: List[str] = [sys.intern(key) for key in sorted(pairs)]
+        self._ids = array("I", (pairs[key] for key in self._keys))
+
+        self.lookups = 0
+        self.unknown = 0
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def canonical_id(self, name: str) -> Optional[int]:
+        key = _index_key(name)
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._ids[i]
+        return None
+
+    def canonical(self, name: str) -> str:
+        """Canonical name for `name`; unknown skills are kept, tidied up"""
+        self.lookups += 1
+        canonical_id = self.canonical_id(name)
+        if canonical_id is None:
+            self.unknown += 1
+            return " ".join(name.split())
+        return self.names[canonical_id]
+
+    def canonicalize(self, names: Iterable, limit: Optional[int] = None) -> List[str]:
+        """Canonical names in first-seen order, without duplicates or blanks"""
+        result: List[str] = []
+        seen = set()
+        for name in names or []:
+            if not isinstance(name, str) or not name.strip():
+                continue
+            canonical = self.canonical(name)
+            if canonical.lower() not in seen:
+                seen.add(canonical.lower())
+                result.append(canonical)
+                if limit and len(result) >= limit:
+                    break
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            "skills": len(self.names),
+            "aliases": len(self._keys),
+            "lookups": self.lookups,
+            "unknown": self.unknown,
+        }
+
+
+def _load(path: str) -> Tuple[SkillMatcher, SkillIndex]:
+    started = time.perf_counter()
+    try:
+        entries = load_taxonomy(path)
+    except OSError as e:
+        logger.error(f"❌ Skill taxonomy not loaded from {path}: {e}")
+        entries = []
+
+    skill_matcher = SkillMatcher(entries)
+    skill_index = SkillIndex(entries)
+    logger.info(
+        f"✅ Skill taxonomy loaded: {len(skill_matcher)} skills, {skill_matcher.alias_count} aliases "
+        f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    return skill_matcher, skill_index
+
+
+matcher, index = _load(SKILL_TAXONOMY_PATH)
+
+
+def extract_skills(text: str, limit: Optional[int] = None) -> List[str]:
+    return matcher.find(text, limit)
+
+
+def canonicalize(names: Iterable, limit: Optional[int] = None) -> List[str]:
+    return index.canonicalize(names, limit)
+
+
+def stats() -> Dict:
+    return index.stats()
@@ -0,0 +1,18 @@
+import os
+import sys
+import json
+
+import pytest
+
+# Tests never touch the SQLite session file, the Groq API or the MySQL server
+os.environ.setdefault("SESSION_STORE", "memory")
+os.environ.setdefault("GROQ_API_KEY", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def answer_vectors():
+    """(actual, expected) -> passed cases every compare_answers copy must agree on"""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "answer_vectors.json"), encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,13 @@
+"""
+answers.compare_answers against the shared vectors in answer_vectors.json,
+which the JavaScript and Java workers' copies are also run against.
+"""
+from answers import compare_answers
+
+
+def test_answer_vectors(answer_vectors):
+    mismatches = [
+        vector for vector in answer_vectors
+        if compare_answers(vector["actual"], vector["expected"]) != vector["passed"]
+    ]
+    assert mismatches == []
@@ -0,0 +1,238 @@
+"""
+auth.verify_token's verified-token cache and the shared revocation list
+(revocations.py). The database is replaced by an in-memory revoked_tokens.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from jose import JWTError
+
+import auth
+import async_db
+import revocations
+from cache import LRUCache
+
+
+class FakeTable(dict):
+    """revoked_tokens rows as {digest: expires_at}, with revoked_at from a fake DB clock"""
+
+    def __init__(self):
+        super().__init__()
+        self.clock = datetime(2026, 1, 1, 12, 0, 0)
+        self.revoked_at = {}
+        self.queries = []
+
+    def __setitem__(self, digest, expires_at):
+        super().__setitem__(digest, expires_at)
+        self.revoked_at.setdefault(digest, self.clock)
+
+    def insert(self, digest, expires_at, revoked_at=None):
+        self.revoked_at[digest] = revoked_at or self.clock
+        self[digest] = expires_at
+
+
+@pytest.fixture
+def table(monkeypatch):
+    """Fresh caches and mirror; an in-memory revoked_tokens"""
+    rows = FakeTable()
+
+    async def execute(query, params=()):
+        if query.startswith("INSERT"):
+            if params[0] not in rows:
+                rows[params[0]] = params[1]
+        elif query.startswith("DELETE"):
+            for digest in [d for d, expires_at in rows.items() if expires_at < params[0]]:
+                del rows[digest]
+        return 0
+
+    async def fetch_all(query, params=()):
+        rows.queries.append((query, params))
+        if "revoked_at >=" in query:
+            since, now = params
+        else:
+            since, (now,) = None, params
+        return [
+            {"token_digest": d, "expires_at": e, "revoked_at": rows.revoked_at[d]}
+            for d, e in rows.items()
+            if e >= now and (since is None or rows.revoked_at[d] >= since)
+        ]
+
+    monkeypatch.setattr(async_db, "execute", execute)
+    monkeypatch.setattr(async_db, "fetch_all", fetch_all)
+    monkeypatch.setattr(revocations, "_revoked", {})
+    monkeypatch.setattr(revocations, "_watermark", None)
+    monkeypatch.setattr(revocations, "_interval", revocations.TOKEN_REVOCATION_SYNC)
+    monkeypatch.setattr(auth, "_verified_tokens", LRUCache(maxsize=auth.TOKEN_CACHE_SIZE))
+    return rows
+
+
+def another_worker(monkeypatch):
+    """Switch to a fresh worker process's view: same table, empty mirror"""
+    monkeypatch.setattr(revocations, "_revoked", {})
+    monkeypatch.setattr(revocations, "_watermark", None)
+
+
+def token(user_id: int = 1, minutes: int = 30) -> str:
+    return auth.create_access_token({"sub": f"user{user_id}@example.com", "user_id": user_id},
+                                    expires_delta=timedelta(minutes=minutes))
+
+
+def test_signature_is_checked_once(table, monkeypatch):
+    decoded = []
+    original = auth.decode_access_token
+
+    def decode(value):
+        decoded.append(value)
+        return original(value)
+
+    monkeypatch.setattr(auth, "decode_access_token", decode)
+    value = token()
+
+    first = auth.verify_token(value)
+    second = auth.verify_token(value)
+    assert first == second
+    assert first["user_id"] == 1
+    assert len(decoded) == 1
+
+
+def test_cached_claims_stop_at_exp(table, monkeypatch):
+    value = token()
+    auth.verify_token(value)
+
+    later = time.time() + 31 * 60
+    monkeypatch.setattr(auth.time, "time", lambda: later)
+    with pytest.raises(JWTError):
+        auth.verify_token(value)
+    assert auth.token_cache_stats()["rejected_expired"] == 1
+
+
+def test_forged_token_is_refused(table):
+    value = token()
+    with pytest.raises(JWTError):
+        auth.verify_token(value[:-2] + ("A" if value[-2] != "A" else "B") + value[-1])
+
+
+def test_revoked_token_is_refused_at_once(table):
+    value = token()
+    auth.verify_token(value)
+
+    asyncio.run(auth.revoke_token(value))
+
+    with pytest.raises(JWTError, match="revoked"):
+        auth.verify_token(value)
+    assert auth.token_digest(value) in table
+
+
+def test_revocations_are_never_evicted_early(table, monkeypatch):
+    # A token cache far smaller than the number of logouts
+    monkeypatch.setattr(auth, "_verified_tokens", LRUCache(maxsize=2))
+    tokens = [token(user_id) for user_id in range(1, 21)]
+
+    async def logout_all():
+        for value in tokens:
+            auth.verify_token(value)
+            await auth.revoke_token(value)
+
+    asyncio.run(logout_all())
+
+    for value in tokens:
+        with pytest.raises(JWTError):
+            auth.verify_token(value)
+
+
+def test_other_workers_see_revocations_after_sync(table, monkeypatch):
+    value = token()
+    asyncio.run(auth.revoke_token(value))
+
+    another_worker(monkeypatch)
+    assert auth.verify_token(value)["user_id"] == 1
+
+    asyncio.run(revocations.sync())
+    with pytest.raises(JWTError, match="revoked"):
+        auth.verify_token(value)
+
+
+def test_revocation_lasts_until_token_expiry(table):
+    value = token(minutes=30)
+    asyncio.run(auth.revoke_token(value))
+
+    expires_at = table[auth.token_digest(value)]
+    assert time.time() + 29 * 60 < expires_at <= time.time() + 31 * 60
+
+    digest = auth.token_digest(value)
+    assert revocations.is_revoked(digest)
+    revocations._revoked[digest] = time.time() - 1
+    assert not revocations.is_revoked(digest)
+
+
+def test_expired_rows_are_not_loaded(table):
+    table["stale"] = int(time.time()) - 60
+    table["live"] = int(time.time()) + 60
+
+    asyncio.run(revocations.sync())
+    assert revocations.is_revoked("live")
+    assert not revocations.is_revoked("stale")
+    assert "stale" not in revocations._revoked
+
+
+def test_sync_polls_from_the_watermark(table, monkeypatch):
+    now = int(time.time())
+    table.insert("first", now + 600)
+    asyncio.run(revocations.sync())
+
+    table.clock += timedelta(minutes=5)
+    table.insert("second", now + 600)
+    assert asyncio.run(revocations.sync()) == 1
+    assert revocations.is_revoked("second")
+
+    query, params = table.queries[-1]
+    assert "revoked_at >=" in query
+    assert params[0] == datetime(2026, 1, 1, 12, 0, 0) - timedelta(seconds=revocations.TOKEN_REVOCATION_OVERLAP)
+
+    # Nothing newer: the rows already mirrored are not counted again
+    assert asyncio.run(revocations.sync()) == 0
+
+
+def test_late_commit_within_overlap_is_picked_up(table):
+    now = int(time.time())
+    table.insert("seen", now + 600)
+    asyncio.run(revocations.sync())
+
+    # Revoked just before the watermark, committed after it was read
+    table.insert("late", now + 600, revoked_at=table.clock - timedelta(seconds=revocations.TOKEN_REVOCATION_OVERLAP / 2))
+    assert asyncio.run(revocations.sync()) == 1
+    assert revocations.is_revoked("late")
+
+
+def test_sync_prunes_expired_entries(table, monkeypatch):
+    table.insert("soon", int(time.time()) + 60)
+    asyncio.run(revocations.sync())
+    assert "soon" in revocations._revoked
+
+    later = time.time() + 120
+    monkeypatch.setattr(revocations.time, "time", lambda: later)
+    asyncio.run(revocations.sync())
+    assert "soon" not in revocations._revoked
+
+
+def test_polling_backs_off_and_resets_on_new_rows(table, monkeypatch):
+    intervals = []
+
+    async def sleep(seconds):
+        intervals.append(seconds)
+        if len(intervals) == 6:
+            table.clock += timedelta(minutes=1)
+            table.insert("logout", int(time.time()) + 600)
+        if len(intervals) == 8:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(revocations.asyncio, "sleep", sleep)
+    monkeypatch.setattr(revocations, "TOKEN_REVOCATION_SYNC", 2)
+    monkeypatch.setattr(revocations, "TOKEN_REVOCATION_SYNC_MAX", 16)
+    monkeypatch.setattr(revocations, "_interval", 2)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(revocations._run())
+    assert intervals == [4, 8, 16, 16, 16, 16, 2, 4]
@@ -0,0 +1,69 @@
+"""
+cache.LRUCache: eviction order, TTL expiry and the hit/miss counters.
+"""
+import pytest
+
+import cache
+from cache import LRUCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def test_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+    assert lru.evictions == 1
+
+
+def test_entries_expire(clock):
+    lru = LRUCache(maxsize=10, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2, ttl=300)
+
+    clock.now += 61
+    assert lru.get("a", "gone") == "gone"
+    assert lru.get("b") == 2
+    assert len(lru) == 1
+
+    clock.now += 300
+    assert lru.get("b") is None
+
+
+def test_no_ttl_never_expires(clock):
+    lru = LRUCache(maxsize=10)
+    lru.set("a", 1)
+    clock.now += 10 ** 9
+    assert lru.get("a") == 1
+
+
+def test_pop_and_stats():
+    lru = LRUCache(maxsize=10)
+    lru.set("a", 1)
+    assert lru.pop("a") == 1
+    assert lru.pop("a", "missing") == "missing"
+
+    lru.set("b", 2)
+    lru.get("b")
+    lru.get("c")
+    stats = lru.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
@@ -0,0 +1,203 @@
+"""
+coding_problems.ProblemPool against an in-memory code_problems table: claims
+are taken in one transaction off the request path, take() never touches the
+database, and unserved claims go back at stop(). Also store_problem on a
+database without migrations/003.
+"""
+import asyncio
+import json
+import os
+
+import pytest
+from mysql.connector import errors as mysql_errors
+
+import async_db
+import code_cache
+import coding_problems
+import sandbox
+from coding_problems import ProblemPool
+
+
+class FakeCursor:
+    """Just enough of a dictionary cursor for the pool's claim transaction"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._result = []
+
+    def execute(self, query, params=()):
+        query = " ".join(query.split())
+        if query.startswith("SELECT"):
+            assert "FOR UPDATE SKIP LOCKED" in query
+            self._result = [dict(row) for row in self.rows if row["pool_ready"]]
+        elif query.startswith("UPDATE code_problems SET pool_ready = FALSE WHERE id IN"):
+            for row in self.rows:
+                if row["id"] in params:
+                    row["pool_ready"] = False
+        else:
+            raise AssertionError(query)
+
+    def fetchall(self):
+        return self._result
+
+
+@pytest.fixture
+def table(monkeypatch):
+    rows = []
+    calls = []
+
+    async def run_in_transaction(fn, dictionary=True):
+        calls.append("transaction")
+        return fn(FakeCursor(rows))
+
+    async def execute(query, params=()):
+        calls.append(" ".join(query.split()))
+        for row in rows:
+            if row["id"] in params:
+                row["pool_ready"] = True
+
+    monkeypatch.setattr(async_db, "run_in_transaction", run_in_transaction)
+    monkeypatch.setattr(async_db, "execute", execute)
+    monkeypatch.setattr(coding_problems, "PROBLEM_POOL_ENABLED", True)
+
+    def add(difficulty, problem_type, count=1):
+        for _ in range(count):
+            rows.append({
+                "id": len(rows) + 1, "title": f"Problem {len(rows) + 1}", "description": "Return 42",
+                "difficulty": difficulty.capitalize(), "problem_type": problem_type,
+                "test_cases": json.dumps([{"expected": "42"}]), "hint": "",
+                "starter_code_python": "", "starter_code_javascript": "", "starter_code_java": "",
+                "pool_ready": True,
+            })
+
+    return rows, calls, add
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_claims_per_bucket_in_one_transaction(table):
+    rows, calls, add = table
+    add("easy", "string manipulation", 3)
+    add("hard", "logical puzzle", 1)
+
+    pool = ProblemPool(claim=2)
+    left = run(pool._claim())
+
+    assert calls == ["transaction"]
+    assert left == {("easy", "string manipulation"): 1}
+    assert [row["pool_ready"] for row in rows] == [False, False, True, False]
+    assert pool.stats()["ready"] == 3
+
+    # Already holding enough: nothing more is claimed
+    assert run(pool._claim()) == {("easy", "string manipulation"): 1}
+    assert pool.stats()["claimed"] == 3
+
+
+def test_take_serves_claims_without_the_database(table):
+    rows, calls, add = table
+    add("easy", "string manipulation")
+    add("hard", "logical puzzle")
+
+    pool = ProblemPool(claim=1)
+    run(pool._claim())
+    calls.clear()
+
+    problem = run(pool.take("hard"))
+    assert problem["id"] == 2
+    assert problem["expected_answer"] == "42"
+    assert problem["difficulty"] == "hard"
+
+    assert run(pool.take("hard")) is None
+    assert run(pool.take())["id"] == 1
+    assert run(pool.take()) is None
+    assert calls == []
+
+    stats = pool.stats()
+    assert (stats["served"], stats["misses"]) == (2, 2)
+
+
+def test_take_wakes_the_background_task(table):
+    pool = ProblemPool()
+    pool._wakeup = asyncio.Event()
+    assert run(pool.take()) is None
+    assert pool._wakeup.is_set()
+
+
+def test_stop_releases_unserved_claims(table):
+    rows, calls, add = table
+    add("easy", "string manipulation")
+    add("medium", "sorting or searching")
+
+    pool = ProblemPool(claim=1)
+    run(pool._claim())
+    run(pool.take("easy"))
+    run(pool.stop())
+
+    assert [row["pool_ready"] for row in rows] == [False, True]
+    assert pool.stats()["ready"] == 0
+    assert pool.stats()["released"] == 1
+
+
+def test_store_problem_without_pool_columns(monkeypatch):
+    queries = []
+
+    async def execute(query, params=()):
+        queries.append(query)
+        if "pool_ready" in query:
+            raise mysql_errors.ProgrammingError(msg="Unknown column 'hint'", errno=1054)
+        return 7
+
+    monkeypatch.setattr(async_db, "execute", execute)
+    problem = {"title": "T", "description": "D", "expected_answer": "42"}
+
+    assert run(coding_problems.store_problem(problem)) == 7
+    assert len(queries) == 2
+
+    # A pool problem is useless without the columns, so the error surfaces
+    with pytest.raises(mysql_errors.ProgrammingError):
+        run(coding_problems.store_problem(problem, "Easy", "logical puzzle"))
+
+
+@pytest.mark.skipif("SANDBOX_VERIFY_WORKERS" in os.environ, reason="verify pool size set explicitly")
+def test_verify_workers_cover_a_batch():
+    assert sandbox.verify_pool.size == coding_problems.PROBLEM_POOL_BATCH
+
+
+def test_verify_batch_runs_concurrently(monkeypatch):
+    running = []
+    peak = []
+
+    async def slow_run(payload):
+        running.append(payload["code_hash"])
+        peak.append(len(running))
+        await asyncio.sleep(0.1)
+        running.remove(payload["code_hash"])
+        return {"stage": "done", "result": "42"}
+
+    monkeypatch.setattr(sandbox.verify_pool, "run", slow_run)
+    problems = [
+        {"title": f"P{i}", "expected_answer": "41", "reference_solution_python": f"def solution():\n    return {i}\n"}
+        for i in range(coding_problems.PROBLEM_POOL_BATCH)
+    ]
+
+    verified = run(coding_problems.verify_problems(problems))
+    assert [p["expected_answer"] for p in verified] == ["42"] * len(problems)
+    assert max(peak) == len(problems)
+
+
+def test_verify_skips_the_submission_cache(monkeypatch):
+    async def fail(payload):
+        raise sandbox.SandboxCrashed("down")
+
+    monkeypatch.setattr(sandbox.verify_pool, "run", fail)
+    before = len(code_cache.prepared)
+
+    problem = {"title": "P", "expected_answer": "42", "reference_solution_python": "def solution():\n    return 42\n"}
+    assert run(coding_problems.verify_problem(problem)) is None
+    assert len(code_cache.prepared) == before
+
+
+def test_verify_discards_problem_without_solution():
+    assert run(coding_problems.verify_problem({"title": "P", "expected_answer": "1"})) is None
@@ -0,0 +1,105 @@
+"""
+database.ConnectionPool with fake connections: waiting for a free slot and
+refusing a connection once it has been returned.
+"""
+import threading
+import time
+
+import pytest
+
+from database import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.in_transaction = False
+        self.closed = False
+        self.broken = False
+
+    def ping(self, reconnect=False):
+        if self.broken:
+            raise OSError("gone away")
+
+    def rollback(self):
+        if self.broken:
+            raise OSError("gone away")
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+    def cursor(self, **kwargs):
+        return "cursor"
+
+
+def make_pool(**kwargs):
+    opened = []
+
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    options = dict(size=1, max_overflow=0, timeout=2.0, max_idle=0, recycle=0, pre_ping=True)
+    options.update(kwargs)
+    return ConnectionPool(connect, **options), opened
+
+
+def test_connection_is_reused():
+    pool, opened = make_pool()
+    pool.connection().close()
+    pool.connection().close()
+    assert len(opened) == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_exhausted_pool_times_out():
+    pool, _ = make_pool(timeout=0.2)
+    held = pool.connection()
+    with pytest.raises(TimeoutError):
+        pool.connection()
+    assert pool.stats()["timeouts"] == 1
+    held.close()
+
+
+def test_returned_connection_wakes_waiter():
+    pool, _ = make_pool()
+    held = pool.connection()
+    threading.Timer(0.1, held.close).start()
+
+    started = time.monotonic()
+    pool.connection().close()
+    assert time.monotonic() - started < 1.0
+
+
+def test_discarded_connection_wakes_waiter():
+    pool, opened = make_pool()
+    held = pool.connection()
+
+    def break_and_return():
+        # A rollback that fails discards the connection instead of pooling it
+        opened[0].broken = True
+        opened[0].in_transaction = True
+        held.close()
+
+    threading.Timer(0.1, break_and_return).start()
+
+    started = time.monotonic()
+    fresh = pool.connection()
+    assert time.monotonic() - started < 1.0
+    assert opened[0].closed
+    assert len(opened) == 2
+    fresh.close()
+
+
+def test_use_after_close_fails():
+    pool, _ = make_pool()
+    conn = pool.connection()
+    assert conn.cursor() == "cursor"
+    conn.close()
+    conn.close()  # idempotent
+
+    with pytest.raises(RuntimeError, match="after close"):
+        conn.cursor()
+    # The next borrower gets the connection to itself
+    assert pool.stats()["idle"] == 1
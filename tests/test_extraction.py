@@ -0,0 +1,76 @@
+"""
+extraction.extract_text's worker processes: a stuck document costs only its
+own worker, and a cancelled caller never hands its worker to the next one.
+A FIFO with no writer stands in for a document that never finishes.
+"""
+import asyncio
+import os
+
+import pytest
+
+import extraction
+
+TEXT = "Experienced engineer working with Python and distributed systems. " * 3
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    monkeypatch.setattr(extraction, "CV_EXTRACT_WORKERS", 1)
+    yield
+    extraction.shutdown()
+
+
+@pytest.fixture
+def cv(tmp_path):
+    path = tmp_path / "cv.txt"
+    path.write_text(TEXT)
+    return str(path)
+
+
+@pytest.fixture
+def stuck(tmp_path):
+    path = tmp_path / "stuck.txt"
+    os.mkfifo(path)
+    return str(path)
+
+
+def test_extracts_plain_text(workers, cv):
+    text = asyncio.run(extraction.extract_text(cv, extraction.TEXT_MIME))
+    assert text == TEXT.strip()
+
+
+def test_unknown_type_is_refused(workers, cv):
+    with pytest.raises(extraction.ExtractionError):
+        asyncio.run(extraction.extract_text(cv, "application/x-unknown"))
+
+
+def test_timeout_replaces_only_that_worker(workers, cv, stuck, monkeypatch):
+    monkeypatch.setattr(extraction, "CV_EXTRACT_TIMEOUT", 0.5)
+
+    async def go():
+        with pytest.raises(extraction.ExtractionError, match="timed out"):
+            await extraction.extract_text(stuck, extraction.TEXT_MIME)
+        return await extraction.extract_text(cv, extraction.TEXT_MIME)
+
+    restarts = extraction.stats()["restarts"]
+    assert asyncio.run(go()) == TEXT.strip()
+    assert extraction.stats()["restarts"] == restarts + 1
+
+
+def test_cancelled_caller_does_not_recycle_a_busy_worker(workers, cv, stuck, monkeypatch):
+    monkeypatch.setattr(extraction, "CV_EXTRACT_TIMEOUT", 5)
+
+    async def go():
+        first = asyncio.create_task(extraction.extract_text(stuck, extraction.TEXT_MIME))
+        await asyncio.sleep(1.0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        # The only worker is still stuck on the FIFO; reusing it would make
+        # this call time out (or read the cancelled job's reply)
+        return await extraction.extract_text(cv, extraction.TEXT_MIME)
+
+    restarts = extraction.stats()["restarts"]
+    assert asyncio.run(go()) == TEXT.strip()
+    assert extraction.stats()["restarts"] == restarts + 1
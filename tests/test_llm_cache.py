@@ -0,0 +1,139 @@
+"""
+llm_cache.ResponseCache: what goes into the key, which calls bypass the
+cache, TTL expiry in both tiers and the SQLite tier shared between workers.
+"""
+import asyncio
+
+import pytest
+
+import async_db
+import cache
+import llm_cache
+from llm_cache import ResponseCache, make_key
+
+MESSAGES = [{"role": "system", "content": "Be brief"}, {"role": "user", "content": "Hi"}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def inline_sync(monkeypatch):
+    # Run the disk tier's blocking calls inline
+    async def run_sync(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    monkeypatch.setattr(async_db, "run_sync", run_sync)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    monkeypatch.setattr(llm_cache, "time", clock)
+    return clock
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_key_covers_every_parameter():
+    base = make_key("llama", MESSAGES, 0.2, 256)
+    assert make_key("llama", [dict(m) for m in MESSAGES], 0.2, 256) == base
+
+    others = {
+        make_key("mixtral", MESSAGES, 0.2, 256),
+        make_key("llama", MESSAGES[:1], 0.2, 256),
+        make_key("llama", MESSAGES, 0.3, 256),
+        make_key("llama", MESSAGES, 0.2, 512),
+    }
+    assert base not in others
+    assert len(others) == 4
+
+
+def test_key_ignores_dict_order():
+    reordered = [{"content": m["content"], "role": m["role"]} for m in MESSAGES]
+    assert make_key("llama", reordered, 0.2, 256) == make_key("llama", MESSAGES, 0.2, 256)
+
+
+def test_temperatures_do_not_collide():
+    responses = ResponseCache(maxsize=10)
+    run(responses.set(make_key("llama", MESSAGES, 0.0, 256), "cold", 10))
+    run(responses.set(make_key("llama", MESSAGES, 0.2, 256), "warm", 10))
+
+    assert run(responses.get(make_key("llama", MESSAGES, 0.0, 256))) == "cold"
+    assert run(responses.get(make_key("llama", MESSAGES, 0.2, 256))) == "warm"
+    assert run(responses.get(make_key("llama", MESSAGES, 0.1, 256))) is None
+
+
+def test_should_cache():
+    responses = ResponseCache(max_temperature=0.5)
+    assert responses.should_cache(0.5)
+    assert not responses.should_cache(0.9)
+    assert responses.should_cache(0.9, opt_in=True)
+    assert not responses.should_cache(0.0, opt_in=False)
+    assert responses.stats()["bypassed"] == 1
+
+    assert not ResponseCache(enabled=False).should_cache(0.0, opt_in=True)
+
+
+def test_hits_and_saved_tokens():
+    responses = ResponseCache(maxsize=10)
+    key = make_key("llama", MESSAGES, 0.0, 256)
+    assert run(responses.get(key)) is None
+    run(responses.set(key, "Hello", 42))
+    assert run(responses.get(key)) == "Hello"
+
+    stats = responses.stats()
+    assert (stats["hits"], stats["misses"], stats["saved_tokens"]) == (1, 1, 42)
+    assert stats["memory_hits"] == 1
+
+
+def test_memory_entries_expire(clock):
+    responses = ResponseCache(maxsize=10, ttl=60)
+    key = make_key("llama", MESSAGES, 0.0, 256)
+    run(responses.set(key, "Hello", 5))
+
+    clock.now += 59
+    assert run(responses.get(key)) == "Hello"
+    clock.now += 2
+    assert run(responses.get(key)) is None
+
+
+def test_disk_tier_shared_between_workers(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    first = ResponseCache(maxsize=10, path=path)
+    second = ResponseCache(maxsize=10, path=path)
+    key = make_key("llama", MESSAGES, 0.0, 256)
+
+    run(first.set(key, "Hello", 42))
+    assert run(second.get(key)) == "Hello"
+    assert second.stats()["disk_hits"] == 1
+
+    # Promoted to the second worker's memory tier
+    assert run(second.get(key)) == "Hello"
+    assert second.stats()["memory_hits"] == 1
+
+
+def test_disk_entries_expire(tmp_path, clock):
+    path = str(tmp_path / "llm.sqlite3")
+    writer = ResponseCache(maxsize=10, ttl=60, path=path)
+    key = make_key("llama", MESSAGES, 0.0, 256)
+    run(writer.set(key, "Hello", 42))
+
+    clock.now += 61
+    assert run(ResponseCache(maxsize=10, ttl=60, path=path).get(key)) is None
+
+
+def test_disk_tier_off_without_path_or_when_disabled(tmp_path):
+    assert ResponseCache(path="").stats()["disk_tier"] is False
+    assert ResponseCache(path=str(tmp_path / "llm.sqlite3"), enabled=False).stats()["disk_tier"] is False
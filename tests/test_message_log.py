@@ -0,0 +1,140 @@
+"""
+message_log.MessageBuffer: batched multi-row INSERTs flushed on size, on
+interval and on shutdown, without losing turns when a flush fails.
+"""
+import asyncio
+
+import pytest
+from mysql.connector import errors as mysql_errors
+
+import async_db
+from message_log import MessageBuffer
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """
+    Records every INSERT as a list of (session_id, role, content) rows.
+    Each call first pops `fail`: an exception to raise, or None to succeed.
+    """
+    state = {"batches": [], "fail": []}
+
+    async def execute(query, params=()):
+        if state["fail"]:
+            error = state["fail"].pop(0)
+            if error is not None:
+                raise error
+        assert query.startswith("INSERT INTO interview_messages")
+        rows = [tuple(params[i:i + 3]) for i in range(0, len(params), 4)]
+        state["batches"].append(rows)
+        return 0
+
+    monkeypatch.setattr(async_db, "execute", execute)
+    return state
+
+
+def written(db):
+    return [row for batch in db["batches"] for row in batch]
+
+
+def test_flush_on_size(db):
+    async def go():
+        buffer = MessageBuffer(flush_size=3, flush_interval=60)
+        for i in range(3):
+            buffer.add("s1", "user" if i % 2 == 0 else "assistant", f"turn {i}")
+        await asyncio.gather(*buffer._pending)
+        return buffer
+
+    buffer = asyncio.run(go())
+    # One multi-row INSERT, roles mapped onto the ENUM
+    assert db["batches"] == [[("s1", "user", "turn 0"), ("s1", "ai", "turn 1"), ("s1", "user", "turn 2")]]
+    assert buffer.stats()["pending"] == 0
+
+
+def test_no_flush_below_size(db):
+    async def go():
+        buffer = MessageBuffer(flush_size=3, flush_interval=60)
+        buffer.add("s1", "user", "only one")
+        await asyncio.sleep(0.05)
+        return buffer
+
+    buffer = asyncio.run(go())
+    assert db["batches"] == []
+    assert buffer.stats()["pending"] == 1
+
+
+def test_flush_on_interval(db):
+    async def go():
+        buffer = MessageBuffer(flush_size=100, flush_interval=0.1)
+        buffer.start()
+        buffer.add("s1", "user", "hello")
+        await asyncio.sleep(0.4)
+        await buffer.stop()
+
+    asyncio.run(go())
+    assert db["batches"] == [[("s1", "user", "hello")]]
+
+
+def test_stop_flushes_remaining_turns(db):
+    async def go():
+        buffer = MessageBuffer(flush_size=100, flush_interval=60)
+        buffer.start()
+        buffer.add("s1", "user", "a")
+        buffer.add("s2", "assistant", "b")
+        await buffer.stop()
+
+    asyncio.run(go())
+    assert written(db) == [("s1", "user", "a"), ("s2", "ai", "b")]
+
+
+def test_failed_flush_keeps_turns_in_order(db):
+    db["fail"].append(mysql_errors.OperationalError("server has gone away"))
+
+    async def go():
+        buffer = MessageBuffer(flush_size=100, flush_interval=60)
+        buffer.add("s1", "user", "first")
+        with pytest.raises(mysql_errors.OperationalError):
+            await buffer.flush()
+        buffer.add("s1", "assistant", "second")
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(go())
+    assert written(db) == [("s1", "user", "first"), ("s1", "ai", "second")]
+    assert buffer.stats()["failures"] == 1
+    assert buffer.stats()["dropped"] == 0
+
+
+def test_retry_buffer_is_capped(db):
+    db["fail"].append(mysql_errors.OperationalError("down"))
+
+    async def go():
+        buffer = MessageBuffer(flush_size=100, flush_interval=60, limit=2)
+        for content in ("a", "b", "c"):
+            buffer.add("s1", "user", content)
+        with pytest.raises(mysql_errors.OperationalError):
+            await buffer.flush()
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(go())
+    # Oldest turns go first when the cap is hit
+    assert written(db) == [("s1", "user", "b"), ("s1", "user", "c")]
+    assert buffer.stats()["dropped"] == 1
+
+
+def test_rejected_batch_is_written_row_by_row(db):
+    # Batch rejected, then row 1 succeeds and row 2 is rejected
+    db["fail"] += [mysql_errors.IntegrityError("unknown session"), None, mysql_errors.IntegrityError("unknown session")]
+
+    async def go():
+        buffer = MessageBuffer(flush_size=100, flush_interval=60)
+        buffer.add("s1", "user", "kept")
+        buffer.add("gone", "user", "bad")
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(go())
+    assert written(db) == [("s1", "user", "kept")]
+    assert buffer.stats()["dropped"] == 1
+    assert buffer.stats()["failures"] == 0
@@ -0,0 +1,163 @@
+"""
+passwords.py: hashing on the dedicated pool, shedding load when its queue is
+full, and upgrading legacy hashes after a login.
+"""
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.hash import bcrypt_sha256
+
+import async_db
+import passwords
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A private executor, so tests never shut down the app's"""
+    executor = passwords.ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(passwords, "_executor", executor)
+    monkeypatch.setattr(passwords, "PASSWORD_WORKERS", 2)
+    monkeypatch.setattr(passwords, "PASSWORD_MAX_QUEUE", 1)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_hash_and_verify(pool):
+    async def go():
+        hashed = await passwords.hash_password("correct horse")
+        return (hashed,
+                await passwords.verify_password("correct horse", hashed),
+                await passwords.verify_password("wrong horse", hashed),
+                await passwords.verify_password("correct horse", None))
+
+    hashed, right, wrong, missing = asyncio.run(go())
+    assert hashed.startswith("$pbkdf2-sha256$")
+    assert right
+    assert not wrong
+    assert not missing
+    assert not passwords.needs_rehash(hashed)
+
+
+def test_hashing_runs_off_the_event_loop(pool):
+    async def go():
+        loop_thread = threading.get_ident()
+        worker_thread = await passwords._run(threading.get_ident)
+        return loop_thread, worker_thread
+
+    loop_thread, worker_thread = asyncio.run(go())
+    assert loop_thread != worker_thread
+
+
+def test_full_queue_is_rejected(pool):
+    release = threading.Event()
+
+    async def go():
+        # 2 running + 1 queued fill the pool; the rest are shed at once
+        calls = [asyncio.create_task(passwords._run(release.wait, 5)) for _ in range(3)]
+        await asyncio.sleep(0.1)
+        with pytest.raises(passwords.PasswordPoolBusy):
+            await passwords.verify_password("pw", "$pbkdf2-sha256$x")
+        release.set()
+        await asyncio.gather(*calls)
+
+    rejected = passwords.stats()["rejected"]
+    asyncio.run(go())
+    assert passwords.stats()["rejected"] == rejected + 1
+    assert passwords.stats()["in_flight"] == 0
+
+
+def test_legacy_hash_is_upgraded_after_login(pool, monkeypatch):
+    legacy = bcrypt_sha256.hash("pw")
+    writes = []
+
+    async def execute(query, params=()):
+        writes.append(params)
+        return 0
+
+    monkeypatch.setattr(async_db, "execute", execute)
+
+    async def go():
+        assert await passwords.verify_password("pw", legacy)
+        passwords.schedule_rehash(7, "pw", legacy)
+        await asyncio.gather(*passwords._rehash_tasks)
+
+    asyncio.run(go())
+    (new_hash, user_id, old_hash), = writes
+    assert user_id == 7
+    # Only the hash that was verified is replaced
+    assert old_hash == legacy
+    assert new_hash.startswith("$pbkdf2-sha256$")
+    assert passwords.pwd_context.verify("pw", new_hash)
+
+
+def test_current_hash_is_not_rewritten(pool, monkeypatch):
+    writes = []
+
+    async def execute(query, params=()):
+        writes.append(params)
+        return 0
+
+    monkeypatch.setattr(async_db, "execute", execute)
+
+    async def go():
+        hashed = await passwords.hash_password("pw")
+        passwords.schedule_rehash(7, "pw", hashed)
+        await asyncio.gather(*passwords._rehash_tasks)
+
+    asyncio.run(go())
+    assert writes == []
+
+
+def test_busy_pool_answers_503_on_login(pool, monkeypatch):
+    import main
+
+    async def fetch_one(query, params=()):
+        return {"id": 7, "email": "a@example.com", "password_hash": "$pbkdf2-sha256$x", "verified": 1}
+
+    monkeypatch.setattr(async_db, "fetch_one", fetch_one)
+    monkeypatch.setattr(passwords, "PASSWORD_WORKERS", 0)
+    monkeypatch.setattr(passwords, "PASSWORD_MAX_QUEUE", 0)
+
+    response = TestClient(main.app).post("/token", data={"username": "a@example.com", "password": "pw"})
+    assert response.status_code == 503
+
+
+def test_username_with_at_sign_falls_back_to_username_lookup(pool, monkeypatch):
+    import main
+
+    hashed = asyncio.run(passwords.hash_password("pw"))
+    queries = []
+
+    async def fetch_one(query, params=()):
+        queries.append(query)
+        if "LOWER(username)" in query and params == ("old@handle",):
+            return {"id": 7, "email": "a@example.com", "password_hash": hashed, "verified": 1}
+        return None
+
+    monkeypatch.setattr(async_db, "fetch_one", fetch_one)
+
+    response = TestClient(main.app).post("/token", data={"username": "old@handle", "password": "pw"})
+    assert response.status_code == 200
+    assert "access_token" in response.json()
+    # The email index is tried first
+    assert "email = %s" in queries[0]
+    assert "LOWER(username)" in queries[1]
+
+
+def test_email_login_takes_one_lookup(pool, monkeypatch):
+    import main
+
+    hashed = asyncio.run(passwords.hash_password("pw"))
+    queries = []
+
+    async def fetch_one(query, params=()):
+        queries.append(query)
+        return {"id": 7, "email": "a@example.com", "password_hash": hashed, "verified": 1}
+
+    monkeypatch.setattr(async_db, "fetch_one", fetch_one)
+
+    response = TestClient(main.app).post("/token", data={"username": "a@example.com", "password": "pw"})
+    assert response.status_code == 200
+    assert len(queries) == 1
@@ -0,0 +1,233 @@
+"""
+sandbox.SandboxPool with the Python worker: rlimits, replacing dead workers
+and shedding load with 503.
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+import sandbox
+
+
+def python_pool(**kwargs) -> sandbox.SandboxPool:
+    options = dict(size=1, max_queue=4, timeout=20, cpu_seconds=1, memory_mb=256)
+    options.update(kwargs)
+    return sandbox.SandboxPool(**options)
+
+
+def submission(code: str) -> dict:
+    return {"code": code, "func_name": "solution"}
+
+
+async def settle(pool: sandbox.SandboxPool):
+    """Wait for background worker replacements to finish"""
+    while pool._respawns:
+        await asyncio.sleep(0.05)
+
+
+def test_runs_submission():
+    async def go():
+        pool = python_pool()
+        try:
+            return await pool.run(submission("def solution():\n    return 6 * 7"))
+        finally:
+            await pool.close()
+
+    reply = asyncio.run(go())
+    assert reply["stage"] == "done"
+    assert reply["result"] == "42"
+
+
+def test_cpu_limit_kills_busy_loop():
+    async def go():
+        pool = python_pool(cpu_seconds=1, timeout=20)
+        try:
+            with pytest.raises(sandbox.SandboxTimeout, match="CPU time limit"):
+                await pool.run(submission("def solution():\n    while True:\n        pass"))
+            await settle(pool)
+            after = await pool.run(submission("def solution():\n    return 1"))
+            return after, pool.stats()
+        finally:
+            await pool.close()
+
+    after, stats = asyncio.run(go())
+    assert after["stage"] == "done"
+    assert stats["timeouts"] == 1
+    assert stats["restarts"] == 1
+
+
+def test_memory_limit_stops_allocation():
+    async def go():
+        pool = python_pool(memory_mb=128)
+        try:
+            # ~800 MB of list slots, far past the address-space limit
+            reply = await pool.run(submission("def solution():\n    return len([0] * (100 * 1024 * 1024))"))
+            after = await pool.run(submission("def solution():\n    return 1"))
+            return reply, after
+        finally:
+            await pool.close()
+
+    reply, after = asyncio.run(go())
+    assert reply["stage"] == "runtime"
+    assert "MemoryError" in reply["error"] or "Memory" in reply["error"]
+    # MemoryError is recoverable; the same worker keeps serving
+    assert after["stage"] == "done"
+
+
+def test_crashed_worker_is_replaced():
+    async def go():
+        pool = python_pool(cpu_seconds=30)
+        try:
+            await pool.start()
+            (worker,) = pool._workers
+            run = asyncio.create_task(pool.run(submission("def solution():\n    while True:\n        pass")))
+            await asyncio.sleep(0.5)
+            worker.process.kill()
+
+            with pytest.raises(sandbox.SandboxCrashed):
+                await run
+            await settle(pool)
+
+            (fresh,) = pool._workers
+            after = await pool.run(submission("def solution():\n    return 1"))
+            return worker, fresh, after, pool.stats()
+        finally:
+            await pool.close()
+
+    worker, fresh, after, stats = asyncio.run(go())
+    assert fresh is not worker
+    assert after["stage"] == "done"
+    assert stats["crashes"] == 1
+    assert stats["restarts"] == 1
+
+
+def test_full_queue_rejects_with_busy():
+    async def go():
+        pool = python_pool(size=1, max_queue=1, cpu_seconds=30, timeout=30)
+        try:
+            await pool.start()
+            slow = asyncio.create_task(pool.run(submission("def solution():\n    while True:\n        pass")))
+            await asyncio.sleep(0.2)
+            queued = asyncio.create_task(pool.run(submission("def solution():\n    return 1")))
+            await asyncio.sleep(0.2)
+
+            with pytest.raises(sandbox.SandboxBusy):
+                await pool.run(submission("def solution():\n    return 2"))
+            rejected = pool.stats()["rejected"]
+
+            slow.cancel()
+            queued.cancel()
+            await asyncio.gather(slow, queued, return_exceptions=True)
+            return rejected
+        finally:
+            await pool.close()
+
+    assert asyncio.run(go()) == 1
+
+
+def test_busy_sandbox_answers_503(monkeypatch):
+    import main
+    import async_db
+    from auth import get_current_user
+
+    async def fetch_one(query, params=()):
+        return {"test_cases": json.dumps([{"expected": "1"}])}
+
+    monkeypatch.setattr(async_db, "fetch_one", fetch_one)
+    # A started pool with no room in its queue rejects every run
+    monkeypatch.setattr(sandbox.pool, "_started", True)
+    monkeypatch.setattr(sandbox.pool, "max_queue", 0)
+    monkeypatch.setitem(main.app.dependency_overrides, get_current_user, lambda: {"user_id": 1})
+
+    response = TestClient(main.app).post("/api/code/run", json={
+        "code": "def solution():\n    return 'busy test'",
+        "language": "python",
+        "problem_id": 1,
+    })
+    assert response.status_code == 503
+    assert "busy" in response.json()["detail"]
+
+
+def test_worker_that_exits_during_startup_is_reaped(monkeypatch):
+    spawned = []
+    create = asyncio.create_subprocess_exec
+
+    async def record(*args, **kwargs):
+        process = await create(*args, **kwargs)
+        spawned.append(process)
+        return process
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", record)
+
+    async def go():
+        pool = python_pool(command=lambda cpu, mem: [sys.executable, "-c", "pass"])
+        try:
+            with pytest.raises(RuntimeError, match="failed to start"):
+                await pool.start()
+        finally:
+            await pool.close()
+
+    asyncio.run(go())
+    (process,) = spawned
+    assert process.returncode is not None
+
+
+def test_close_removes_workdir():
+    async def go():
+        pool = python_pool()
+        await pool.run(submission("def solution():\n    return 1"))
+        workdir = pool._workdir
+        assert os.path.isdir(workdir)
+        await pool.close()
+        return workdir
+
+    assert not os.path.exists(asyncio.run(go()))
+
+
+def test_encode_tokens():
+    line = sandbox.encode_tokens({
+        "code": "a b\nc",
+        "cases": [{"input": [1, 2.5, None, True, "é"], "expected": ""}],
+        "stop_on_failure": False,
+    })
+    assert "\n" not in line
+    assert line.split(" ") == [
+        "m3",
+        "sY29kZQ==", "sYSBiCmM=",
+        "sY2FzZXM=", "l1", "m2",
+        "saW5wdXQ=", "l5", "i1", "d2.5", "n", "t", "sw6k=",
+        "sZXhwZWN0ZWQ=", "s",
+        "sc3RvcF9vbl9mYWlsdXJl", "f",
+    ]
+    assert sandbox.encode_tokens([float("inf"), float("-inf"), float("nan"), 10 ** 30]) == \
+        "l4 dInfinity d-Infinity dNaN i" + str(10 ** 30)
+    assert sandbox.encode_tokens({1: "x"}) == "m1 sMQ== seA=="
+
+    with pytest.raises(TypeError):
+        sandbox.encode_tokens({"code": object()})
+
+
+def test_unencodable_payload_keeps_the_worker():
+    def encode(payload):
+        if "bad" in payload:
+            raise TypeError("cannot encode")
+        return json.dumps(payload)
+
+    async def go():
+        pool = python_pool(encode=encode)
+        try:
+            await pool.start()
+            with pytest.raises(TypeError):
+                await pool.run({"bad": True})
+            reply = await pool.run(submission("def solution():\n    return 1"))
+            return reply, pool.stats()
+        finally:
+            await pool.close()
+
+    reply, stats = asyncio.run(go())
+    assert reply["stage"] == "done"
+    assert stats["restarts"] == 0
@@ -0,0 +1,134 @@
+"""
+SandboxWorker.java: request decoding, class policy, time budget and the
+restart reply. Skipped without a JDK unless SANDBOX_TESTS_REQUIRE_JAVA is set
+(as in CI), which turns a missing JDK into a failure.
+"""
+import asyncio
+import os
+
+import pytest
+
+import sandbox
+
+REQUIRE_JAVA = os.getenv("SANDBOX_TESTS_REQUIRE_JAVA", "").lower() in ("1", "true", "yes")
+
+pytestmark = pytest.mark.skipif(sandbox.java_pool is None and not REQUIRE_JAVA, reason="no JDK installed")
+
+
+@pytest.fixture(autouse=True)
+def jdk():
+    if sandbox.java_pool is None:
+        pytest.fail("SANDBOX_TESTS_REQUIRE_JAVA is set but no JDK was found")
+
+
+def java_pool(cpu_seconds: float = 1.0) -> sandbox.SandboxPool:
+    return sandbox.SandboxPool(
+        size=1, timeout=30, cpu_seconds=cpu_seconds, memory_mb=256,
+        command=sandbox.java_command, name="java-test", start_timeout=120,
+        encode=sandbox.encode_tokens,
+    )
+
+
+def run_java(*submissions, cpu_seconds=1.0):
+    """Run each submission on one single-worker pool; returns (replies, stats)"""
+    async def go():
+        pool = java_pool(cpu_seconds)
+        try:
+            replies = []
+            for code in submissions:
+                replies.append(await pool.run({"code": code, "cases": [{"input": [], "expected": "1"}]}))
+                # Let a requested replacement finish before the next run
+                while pool._respawns:
+                    await asyncio.sleep(0.05)
+            return replies, pool.stats()
+        finally:
+            await pool.close()
+
+    return asyncio.run(go())
+
+
+def solution(body: str) -> str:
+    return "public class Solution {\n    public static Object solution() {\n" + body + "\n    }\n}\n"
+
+
+def test_request_values_decode_to_parameters():
+    code = (
+        "import java.util.Arrays;\nimport java.util.List;\nimport java.util.Map;\n\n"
+        "public class Solution {\n"
+        "    public static Object solution(int[] xs, String s, double d, boolean b,\n"
+        "                                  Map<String, Integer> m, List<String> names, Long big) {\n"
+        "        return Arrays.toString(xs) + \"|\" + s + \"|\" + d + \"|\" + b + \"|\" + m + \"|\" + names + \"|\" + big;\n"
+        "    }\n}\n"
+    )
+    args = [[1, 2, 3], "a b\nc é \"q\" \\", 2.5, True, {"k": 7}, ["x", ""], 2 ** 40]
+
+    async def go():
+        pool = java_pool()
+        try:
+            return await pool.run({"code": code, "cases": [{"input": args, "expected": ""}]})
+        finally:
+            await pool.close()
+
+    reply = asyncio.run(go())
+    assert reply["stage"] == "done"
+    assert reply["cases"][0]["actual"] == f"[1, 2, 3]|{args[1]}|2.5|true|{{k=7}}|[x, ]|{2 ** 40}"
+
+
+def test_allowed_code_runs():
+    (reply,), _ = run_java(solution("return java.util.List.of(1).size();"))
+    assert reply["stage"] == "done"
+    assert reply["cases"][0]["passed"]
+
+
+@pytest.mark.parametrize("body, denied", [
+    ('return Runtime.getRuntime().availableProcessors();', "java.lang.Runtime"),
+    ("new Thread(() -> { }).start(); return 1;", "java.lang.Thread"),
+    ("return Solution.class.getDeclaredMethods().length;", "java.lang.Class.getDeclaredMethods"),
+    ("return java.lang.reflect.Array.getLength(new int[1]);", "java.lang.reflect.Array"),
+    ('try { new java.io.PrintStream("out.txt").println(1); } catch (java.io.IOException e) { }\nreturn 1;',
+     "java.io.PrintStream.<init>"),
+])
+def test_denied_classes_are_refused(body, denied):
+    (reply,), _ = run_java(solution(body))
+    assert reply["stage"] == "compile"
+    # Either the class itself or the member reference is reported, whichever
+    # comes first in the constant pool
+    assert reply["error"].startswith(f"Use of {denied}")
+    assert reply["error"].endswith(" is not allowed")
+
+
+def test_infinite_loop_times_out_and_worker_is_replaced():
+    replies, stats = run_java(
+        solution("while (true) { }"),
+        solution("return 1;"),
+    )
+    timeout, after = replies
+    assert timeout["stage"] == "timeout"
+    assert timeout["restart"] is True
+    assert stats["restarts"] == 1
+    # The replacement worker serves the next run
+    assert after["stage"] == "done"
+    assert after["cases"][0]["passed"]
+
+
+def test_answer_vectors(answer_vectors):
+    """compareAnswers agrees with answers.compare_answers on every shared vector"""
+    async def go():
+        pool = java_pool(cpu_seconds=10)
+        try:
+            return await pool.run({
+                "code": "public class Solution {\n"
+                        "    public static Object solution(String answer) {\n        return answer;\n    }\n}\n",
+                "cases": [{"input": [v["actual"]], "expected": v["expected"]} for v in answer_vectors],
+            })
+        finally:
+            await pool.close()
+
+    reply = asyncio.run(go())
+    assert reply["stage"] == "done"
+    assert [case["actual"] for case in reply["cases"]] == [v["actual"] for v in answer_vectors]
+    mismatches = [
+        vector for vector, case in zip(answer_vectors, reply["cases"])
+        if case["passed"] != vector["passed"]
+    ]
+    assert mismatches == []
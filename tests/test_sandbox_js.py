@@ -0,0 +1,125 @@
+"""
+sandbox_worker.js: escapes from the vm context, code generation from strings
+and runaway loops. Skipped without Node.js unless SANDBOX_TESTS_REQUIRE_NODE
+is set (as in CI), which turns a missing Node.js into a failure.
+"""
+import asyncio
+import os
+
+import pytest
+
+import sandbox
+
+REQUIRE_NODE = os.getenv("SANDBOX_TESTS_REQUIRE_NODE", "").lower() in ("1", "true", "yes")
+
+pytestmark = pytest.mark.skipif(sandbox.js_pool is None and not REQUIRE_NODE, reason="Node.js not installed")
+
+
+@pytest.fixture(autouse=True)
+def node():
+    if sandbox.js_pool is None:
+        pytest.fail("SANDBOX_TESTS_REQUIRE_NODE is set but Node.js was not found")
+
+
+def run_js(*submissions, cpu_seconds=1.0):
+    """
+    Run each submission on one single-worker pool; returns (replies, stats)
+    with a sandbox exception in place of the reply when a run failed
+    """
+    async def go():
+        pool = sandbox.SandboxPool(
+            size=1, timeout=10, cpu_seconds=cpu_seconds, memory_mb=256,
+            command=sandbox.node_command, name="javascript-test",
+        )
+        try:
+            replies = []
+            for code in submissions:
+                try:
+                    replies.append(await pool.run({"code": code, "cases": [{"input": [], "expected": "55"}]}))
+                except (sandbox.SandboxTimeout, sandbox.SandboxCrashed) as e:
+                    replies.append(e)
+                while pool._respawns:
+                    await asyncio.sleep(0.05)
+            return replies, pool.stats()
+        finally:
+            await pool.close()
+
+    return asyncio.run(go())
+
+
+def test_solution_runs():
+    (reply,), _ = run_js("function solution() { let s = 0; for (let i = 0; i <= 10; i++) s += i; return s; }")
+    assert reply["stage"] == "done"
+    assert reply["cases"][0]["passed"]
+
+
+@pytest.mark.parametrize("code", [
+    "function solution() { return this.constructor.constructor('return process')().pid }",
+    "function solution() { return (() => {}).constructor('return process')().pid }",
+    "function solution() { return [].constructor.constructor('return globalThis.process')().pid }",
+])
+def test_constructor_escape_is_blocked(code):
+    (reply,), _ = run_js(code)
+    case = reply["cases"][0]
+    assert not case["passed"]
+    assert "Code generation from strings disallowed" in case["error"]
+
+
+def test_eval_is_blocked():
+    (reply,), _ = run_js("function solution() { return eval('55') }")
+    assert "Code generation from strings disallowed" in reply["cases"][0]["error"]
+
+
+def test_node_globals_are_missing():
+    (reply,), _ = run_js("function solution() { return typeof require + typeof process + typeof setTimeout }")
+    assert reply["cases"][0]["actual"] == "undefinedundefinedundefined"
+
+
+@pytest.mark.parametrize("code", [
+    "function solution() { while (true) {} }",
+    "while (true) {}\nfunction solution() { return 55 }",
+])
+def test_infinite_loop_times_out(code):
+    replies, stats = run_js(code, "function solution() { return 55 }")
+    timeout, after = replies
+    assert timeout["stage"] == "timeout"
+    # vm timeouts interrupt the loop, so the same worker carries on
+    assert after["cases"][0]["passed"]
+    assert stats["crashes"] == 0
+
+
+def test_microtask_loop_does_not_hang_the_worker():
+    replies, _ = run_js(
+        "function solution() { Promise.resolve().then(function f() { return Promise.resolve().then(f) }); return 55 }",
+        "function solution() { return 55 }",
+    )
+    loop, after = replies
+    # Either the time budget stops the loop or its promises exhaust the heap
+    # and the worker is replaced; the next run is served normally
+    assert isinstance(loop, sandbox.SandboxCrashed) or loop["stage"] == "timeout"
+    assert after["cases"][0]["passed"]
+
+
+def test_answer_vectors(answer_vectors):
+    """compareAnswers agrees with answers.compare_answers on every shared vector"""
+    async def go():
+        pool = sandbox.SandboxPool(
+            size=1, timeout=10, cpu_seconds=5, memory_mb=256,
+            command=sandbox.node_command, name="javascript-test",
+        )
+        try:
+            return await pool.run({
+                "code": "function solution(answer) { return answer; }",
+                "cases": [{"input": [v["actual"]], "expected": v["expected"]} for v in answer_vectors],
+            })
+        finally:
+            await pool.close()
+
+    reply = asyncio.run(go())
+    assert reply["stage"] == "done"
+    assert [case["actual"] for case in reply["cases"]] == [v["actual"] for v in answer_vectors]
+    mismatches = [
+        vector for vector, case in zip(answer_vectors, reply["cases"])
+        if case["passed"] != vector["passed"]
+    ]
+    assert mismatches == []
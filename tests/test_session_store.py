@@ -0,0 +1,129 @@
+"""
+Both session_store backends through the SessionStore interface: history,
+TTL expiry, appending to an expired session and cleanup on create.
+"""
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+import async_db
+import session_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path, monkeypatch):
+    # Run the SQLite store's blocking calls inline
+    async def run_sync(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    monkeypatch.setattr(async_db, "run_sync", run_sync)
+
+    def make(ttl=60):
+        if request.param == "memory":
+            return session_store.MemorySessionStore(ttl=ttl)
+        return session_store.SQLiteSessionStore(path=str(tmp_path / "sessions.sqlite3"), ttl=ttl)
+
+    return make
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        session_store.SessionStore()
+
+
+def test_create_get_append(make_store):
+    store = make_store()
+    run(store.create("s1", {"user_id": 1, "stage": "intro", "history": [{"role": "assistant", "content": "Hi"}]}))
+    run(store.append_message("s1", {"role": "user", "content": "Hello"}))
+
+    session = run(store.get("s1"))
+    assert session["user_id"] == 1
+    assert session["stage"] == "intro"
+    assert [m["content"] for m in session["history"]] == ["Hi", "Hello"]
+
+
+def test_get_returns_a_copy(make_store):
+    store = make_store()
+    run(store.create("s1", {"user_id": 1}))
+    run(store.get("s1"))["history"].append({"role": "user", "content": "not stored"})
+    assert run(store.get("s1"))["history"] == []
+
+
+def test_missing_session(make_store):
+    store = make_store()
+    assert run(store.get("nope")) is None
+    with pytest.raises(KeyError):
+        run(store.append_message("nope", {"role": "user", "content": "x"}))
+
+
+def test_session_expires(make_store, monkeypatch):
+    store = make_store(ttl=60)
+    run(store.create("s1", {"user_id": 1}))
+
+    later = time.time() + 61
+    monkeypatch.setattr(session_store.time, "time", lambda: later)
+    assert run(store.get("s1")) is None
+    # A turn arriving after expiry is refused, not written
+    with pytest.raises(KeyError):
+        run(store.append_message("s1", {"role": "user", "content": "late"}))
+
+
+def test_append_refreshes_ttl(make_store, monkeypatch):
+    store = make_store(ttl=60)
+    run(store.create("s1", {"user_id": 1}))
+
+    now = time.time()
+    monkeypatch.setattr(session_store.time, "time", lambda: now + 50)
+    run(store.append_message("s1", {"role": "user", "content": "still here"}))
+
+    monkeypatch.setattr(session_store.time, "time", lambda: now + 100)
+    assert run(store.get("s1")) is not None
+
+
+def test_delete(make_store):
+    store = make_store()
+    run(store.create("s1", {"user_id": 1}))
+    run(store.delete("s1"))
+    assert run(store.get("s1")) is None
+    run(store.delete("s1"))  # idempotent
+
+
+def test_create_purges_expired_sessions(make_store, monkeypatch):
+    store = make_store(ttl=60)
+    run(store.create("old", {"user_id": 1, "history": [{"role": "user", "content": "x"}]}))
+
+    later = time.time() + 61
+    monkeypatch.setattr(session_store.time, "time", lambda: later)
+    run(store.create("new", {"user_id": 2}))
+
+    if isinstance(store, session_store.MemorySessionStore):
+        assert "old" not in store._sessions
+    else:
+        conn = store._conn()
+        assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM session_messages").fetchone()[0] == 0
+
+
+def test_sqlite_store_is_shared_and_lazy(tmp_path, monkeypatch):
+    async def run_sync(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    monkeypatch.setattr(async_db, "run_sync", run_sync)
+    path = tmp_path / "sessions.sqlite3"
+
+    first = session_store.SQLiteSessionStore(path=str(path))
+    assert not path.exists()
+
+    run(first.create("s1", {"user_id": 1}))
+    assert sqlite3.connect(str(path)).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # A second store on the same file, as another worker process would have
+    second = session_store.SQLiteSessionStore(path=str(path))
+    run(second.append_message("s1", {"role": "user", "content": "from worker 2"}))
+    assert run(first.get("s1"))["history"][0]["content"] == "from worker 2"
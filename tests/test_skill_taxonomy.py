@@ -0,0 +1,85 @@
+"""
+skill_taxonomy's matcher and index, against the shipped taxonomy and small
+inline ones: whole-token matching, `!` names that only match via aliases, and
+`&` aliases shared between skills.
+"""
+import pytest
+
+import skill_taxonomy
+from skill_taxonomy import SkillIndex, SkillMatcher, load_taxonomy
+
+
+def test_whole_tokens_only():
+    found = skill_taxonomy.extract_skills("JavaScript and TypeScript, some Java")
+    assert set(found) == {"JavaScript", "TypeScript", "Java"}
+    assert skill_taxonomy.extract_skills("javascripting") == []
+
+
+@pytest.mark.parametrize("text", [
+    "Grade C student",
+    "Vitamin C supplements",
+    "Plan A, plan B and plan C",
+    "Rated C in the final review",
+])
+def test_bare_c_is_not_a_skill(text):
+    assert "C" not in skill_taxonomy.extract_skills(text)
+
+
+@pytest.mark.parametrize("text", [
+    "Systems programming in C language",
+    "Firmware in ANSI C",
+    "Strict c99 codebase",
+])
+def test_c_matches_through_aliases(text):
+    assert skill_taxonomy.extract_skills(text) == ["C"]
+
+
+@pytest.mark.parametrize("text", ["C/C++ developer", "Fluent in C / C++"])
+def test_c_slash_cpp_counts_for_both(text):
+    assert set(skill_taxonomy.extract_skills(text)) == {"C", "C++"}
+
+
+def test_c_family_kept_apart():
+    assert skill_taxonomy.extract_skills("Skilled in C++ and C#") == ["C++", "C#"]
+
+
+def test_most_mentioned_first():
+    found = skill_taxonomy.extract_skills("Docker. Python, python3 and Python again. Docker.")
+    assert found == ["Python", "Docker"]
+
+
+def test_canonicalize_aliases():
+    names = ["ReactJS", "react.js", "golang", "  Some   Tool "]
+    assert skill_taxonomy.canonicalize(names) == ["React", "Go", "Some Tool"]
+
+
+def test_load_taxonomy_markers(tmp_path):
+    path = tmp_path / "skills.txt"
+    path.write_text(
+        "# comment\n"
+        "\n"
+        "!Go | golang\n"
+        "Rust | rustlang | &systems langs\n"
+        "Zig | &systems langs\n"
+    )
+    entries = load_taxonomy(str(path))
+    assert entries == [
+        ("Go", ["golang"]),
+        ("Rust", ["Rust", "rustlang", "&systems langs"]),
+        ("Zig", ["Zig", "&systems langs"]),
+    ]
+
+    matcher = SkillMatcher(entries)
+    assert matcher.find("let's go") == []
+    assert set(matcher.find("Loves systems langs")) == {"Rust", "Zig"}
+    assert matcher.find("rustlang") == ["Rust"]
+
+    index = SkillIndex(entries)
+    assert index.canonical("Systems Langs") == "Rust"
+    assert index.canonical("go") == "Go"
+
+
+def test_duplicate_alias_keeps_first_owner(caplog):
+    matcher = SkillMatcher([("Rust", ["rust"]), ("Oxide", ["rust"])])
+    assert matcher.find("rust") == ["Rust"]
+    assert "already maps to Rust" in caplog.text
@@ -0,0 +1,159 @@
+"""
+uploads.receive_upload against a fake streamed request: bad uploads are
+rejected without reading the rest of the body, the multipart parser copes with
+a boundary split across chunks, and the spooled temp file never outlives an
+error.
+"""
+import asyncio
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import uploads
+
+BOUNDARY = "evaluxtestboundary"
+TEXT = b"Experienced engineer working with Python and distributed systems. " * 20
+
+
+def multipart(*parts):
+    """Encode (name, filename, data) parts as a multipart/form-data body"""
+    body = b""
+    for name, filename, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += (
+            f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode() + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+class FakeBody:
+    """ASGI receive() that hands out the body in fixed chunks and counts reads"""
+
+    def __init__(self, body, chunk_size=1024, fail_after=None):
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        self.fail_after = fail_after
+        self.reads = 0
+
+    async def __call__(self):
+        if self.fail_after is not None and self.reads == self.fail_after:
+            raise ConnectionResetError("client went away")
+        index = self.reads
+        self.reads += 1
+        return {
+            "type": "http.request",
+            "body": self.chunks[index] if index < len(self.chunks) else b"",
+            "more_body": index < len(self.chunks) - 1,
+        }
+
+
+def make_request(receive, content_length=None):
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+@pytest.fixture
+def spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "CV_SPOOL_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_spools_file_and_hashes_it(spool):
+    data = TEXT[:1000]
+    fake = FakeBody(multipart(("note", None, b"hello"), ("file", "cv.txt", data)))
+    upload = asyncio.run(uploads.receive_upload(make_request(fake)))
+    try:
+        assert upload.filename == "cv.txt"
+        assert upload.mime_type == "text/plain"
+        assert upload.size == len(data)
+        assert upload.sha256 == hashlib.sha256(data).hexdigest()
+        with open(upload.path, "rb") as f:
+            assert f.read() == data
+    finally:
+        upload.close()
+    assert list(spool.iterdir()) == []
+
+
+def test_boundary_split_across_chunks(spool):
+    data = TEXT[:1000]
+    body = multipart(("file", "cv.txt", data))
+    # Every chunk boundary lands somewhere inside a multipart delimiter or header
+    for chunk_size in (7, 13, 64):
+        upload = asyncio.run(uploads.receive_upload(make_request(FakeBody(body, chunk_size=chunk_size))))
+        try:
+            with open(upload.path, "rb") as f:
+                assert f.read() == data
+            assert upload.sha256 == hashlib.sha256(data).hexdigest()
+        finally:
+            upload.close()
+
+
+def test_declared_oversize_rejected_before_reading(spool):
+    fake = FakeBody(multipart(("file", "cv.txt", TEXT)))
+    request = make_request(fake, content_length=4096 + uploads.MULTIPART_OVERHEAD + 1)
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(uploads.receive_upload(request, max_bytes=4096))
+    assert e.value.status_code == 413
+    assert fake.reads == 0
+
+
+def test_streamed_oversize_rejected_early(spool):
+    # No Content-Length, so the limit is only hit while streaming
+    data = TEXT * 10
+    fake = FakeBody(multipart(("file", "cv.txt", data)), chunk_size=1024)
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(uploads.receive_upload(make_request(fake), max_bytes=4096))
+    assert e.value.status_code == 413
+    assert fake.reads < len(fake.chunks)
+    assert list(spool.iterdir()) == []
+
+
+def test_wrong_type_rejected_after_sniffing(spool):
+    data = b"\x7fELF\x02\x01\x01\x00" + b"\x00" * 20000
+    fake = FakeBody(multipart(("file", "cv.pdf", data)), chunk_size=1024)
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(uploads.receive_upload(make_request(fake)))
+    assert e.value.status_code == 415
+    # Known bad after the first SNIFF_BYTES, long before the end of the body
+    assert fake.reads <= 2
+    assert list(spool.iterdir()) == []
+
+
+def test_zip_that_is_not_docx_rejected(spool):
+    data = b"PK\x03\x04" + b"not really a zip" * 100
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(uploads.receive_upload(make_request(FakeBody(multipart(("file", "cv.docx", data))))))
+    assert e.value.status_code == 415
+    assert list(spool.iterdir()) == []
+
+
+def test_missing_file_part(spool):
+    body = multipart(("note", None, b"hello"), ("resume", "cv.txt", TEXT[:200]))
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(uploads.receive_upload(make_request(FakeBody(body))))
+    assert e.value.status_code == 400
+    assert "file" in e.value.detail
+
+
+def test_not_multipart():
+    request = Request(
+        {"type": "http", "method": "POST", "headers": [(b"content-type", b"application/json")]},
+        FakeBody(b"{}"),
+    )
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(uploads.receive_upload(request))
+    assert e.value.status_code == 400
+
+
+def test_temp_file_removed_when_stream_fails(spool):
+    fake = FakeBody(multipart(("file", "cv.txt", TEXT)), chunk_size=256, fail_after=3)
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(uploads.receive_upload(make_request(fake)))
+    assert fake.reads == 3
+    assert list(spool.iterdir()) == []
@@ -0,0 +1,216 @@
+"""
+Streaming upload handling for EVALUX
+Parses multipart CV uploads chunk by chunk straight into a temp file on disk,
+hashing as it goes, so memory per upload stays bounded. Oversized files and
+files whose magic bytes don't match a supported type are rejected as soon as
+that is known, without waiting for the rest of the body.
+"""
+import os
+import hashlib
+import logging
+import zipfile
+import tempfile
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+
+from extraction import EXTRACTORS, DOCX_MIME
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+CV_MAX_BYTES = int(os.getenv("CV_MAX_BYTES", str(5 * 1024 * 1024)))
+CV_SPOOL_DIR = os.getenv("CV_SPOOL_DIR") or None
+
+# Room for multipart boundaries/headers on top of the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+SNIFF_BYTES = 512
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def detect_type(head: bytes) -> Optional[str]:
+    """Guess the MIME type from the first bytes of a file"""
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head.startswith(b"PK\x03\x04"):
+        # Any zip for now; _finish() checks it is really a Word document
+        return DOCX_MIME
+    if b"\x00" in head:
+        return None
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sniff window is fine
+        if e.start < len(head) - 3:
+            return None
+    return "text/plain"
+
+
+# Whatever the extraction registry can read
+SUPPORTED_TYPES = set(EXTRACTORS)
+
+
+def is_docx(path: str) -> bool:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return "word/document.xml" in archive.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+
+class SpooledUpload:
+    """An uploaded file spooled to disk; call close() to delete it"""
+
+    def __init__(self, field: str, max_bytes: int):
+        self.field = field
+        self.max_bytes = max_bytes
+        self.filename: Optional[str] = None
+        self.mime_type: Optional[str] = None
+        self.size = 0
+        self.path: Optional[str] = None
+
+        self._sha256 = hashlib.sha256()
+        self._file = None
+        self._head = b""
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    def _open(self, filename: str):
+        self.filename = filename
+        self._file = tempfile.NamedTemporaryFile(
+            prefix="evalux-upload-", dir=CV_SPOOL_DIR, delete=False
+        )
+        self.path = self._file.name
+
+    def _write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadRejected(413, f"File too large (max {self.max_bytes // (1024 * 1024)} MB)")
+
+        if self.mime_type is None:
+            self._head += data[:SNIFF_BYTES]
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniff()
+
+        self._sha256.update(data)
+        self._file.write(data)
+
+    def _sniff(self):
+        self.mime_type = detect_type(self._head[:SNIFF_BYTES])
+        if self.mime_type not in SUPPORTED_TYPES:
+            raise UploadRejected(415, "Unsupported file type")
+
+    def _finish(self):
+        if self.mime_type is None:
+            self._sniff()
+        self._file.close()
+        if self.mime_type == DOCX_MIME and not is_docx(self.path):
+            raise UploadRejected(415, "Unsupported file type")
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+async def receive_upload(request: Request, field: str = "file",
+                         max_bytes: int = CV_MAX_BYTES) -> SpooledUpload:
+    """
+    Stream the multipart body of `request` and spool the `field` file part to
+    disk. Raises HTTPException 413/415/400 as soon as the upload is known to be
+    unacceptable.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    # Cheapest rejection: the client told us the size up front
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + MULTIPART_OVERHEAD:
+        raise HTTPException(status_code=413, detail=f"File too large (max {max_bytes // (1024 * 1024)} MB)")
+
+    upload = SpooledUpload(field, max_bytes)
+    part: Dict = {}
+    state = {"header_field": b"", "header_value": b"", "error": None, "found": False}
+
+    def on_part_begin():
+        part.clear()
+        part["headers"] = {}
+        part["target"] = None
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        name = disposition.get(b"name", b"").decode("utf-8", "replace")
+        filename = disposition.get(b"filename")
+        if name == field and filename is not None and not state["found"]:
+            state["found"] = True
+            part["target"] = upload
+            upload._open(filename.decode("utf-8", "replace"))
+
+    def on_part_data(data, start, end):
+        if part.get("target") is None or state["error"]:
+            return
+        try:
+            upload._write(data[start:end])
+        except UploadRejected as e:
+            state["error"] = e
+
+    def on_part_end():
+        if part.get("target") is not None and not state["error"]:
+            try:
+                upload._finish()
+            except UploadRejected as e:
+                state["error"] = e
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if state["error"]:
+                raise state["error"]
+        parser.finalize()
+
+        if not state["found"]:
+            raise UploadRejected(400, f"Missing file field '{field}'")
+    except UploadRejected as e:
+        upload.close()
+        logger.warning(f"⛔ Upload rejected after {upload.size} bytes: {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception:
+        upload.close()
+        raise
+
+    return upload